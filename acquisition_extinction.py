@@ -23,42 +23,8 @@ def get_acq_final_days(df, criteria, correct_amount, session_length):
     df_copy = df_copy.loc[(df_copy['Corrects'] >= correct_amount) & (df_copy['SessionLength'] <= session_length)]
     df_copy.replace(0, 1, inplace=True)
 
-    df_copy.sort_values(['ID', 'Day'], inplace=True)
-    df_copy.reset_index(drop=True, inplace=True)
-
-    row_index = 0
-    while row_index < df_copy.shape[0] - (criteria - 1):
-        rows_to_sum = list()
-        # compare x amount of rows in a row
-        for sum_numbers in range(criteria):
-            rows_to_add = df_copy.loc[row_index + sum_numbers]
-            while rows_to_add['ID'] != df_copy.at[row_index, 'ID'] and row_index < df_copy.shape[0] - 1:
-                row_index += 1
-            rows_to_sum.append(rows_to_add)
-
-        last_row_info = rows_to_sum[-1]
-
-        if len(rows_to_sum) < criteria:
-            continue
-
-        if last_row_info['ID'] != rows_to_sum[0]['ID']:
-            continue
-
-        day_counter = list()
-        for row in rows_to_sum:
-            day_counter.append(row['Day'])
-        # if the days are consecutive, it passes the criteria
-        if day_counter == sorted(range(day_counter[0], day_counter[-1] + 1)):
-            df_copy.at[last_row_info.name, 'Criteria Passed?'] = 'yes'
-
-        row_index += 1
-
-    # only take the first occurrence of the rows that passed the criteria
-    df_copy = df_copy.loc[df_copy['Criteria Passed?'] == 'yes']
-    df_copy['Mice ID'] = df_copy['ID']
-    df_copy = df_copy.groupby('Mice ID').first()
-
-    return df_copy
+    # n days in a row
+    return get_first_criteria_days(df_copy, criteria)
 
 
 def get_acquisition_normal(df, criteria, correct_amount, session_length):
@@ -74,8 +40,37 @@ def get_acquisition_normal(df, criteria, correct_amount, session_length):
     """
 
     df_copy = get_acq_final_days(df, criteria, correct_amount, session_length)
-    for index in df_copy.iterrows():
-        df.drop(df.loc[(df['ID'] == index[1]['ID']) & (df['Day'] > index[1]['Day'])].index, inplace=True)
+    drop_days_after_criteria(df, df_copy)
+
+
+def get_acq_criteria_sweep(df, criteria_values, correct_amounts, session_lengths):
+    """
+    This function finds the day that every animal met the Acquisition criteria for every combination of the n days in
+    a row, the minimum correct trials amounts and the maximum session lengths. All the combinations are checked in one
+    pass over the cleaned data instead of cleaning the data again for each one.
+
+    :param df: A dataframe that represents the cleaned Acquisition data.
+    :param criteria_values: A list of the n days in a row to try
+    :param correct_amounts: A list of the minimum required correct trials amounts to try
+    :param session_lengths: A list of the maximum session lengths to try
+    :return: df_sweep: A dataframe with one row per combination per animal with the 'Criteria', 'CorrectAmount',
+    'SessionLength', 'ID' and 'CriteriaDay' columns. If an animal did not reach the criteria, its 'CriteriaDay' is
+    empty.
+    """
+
+    df_copy = df.copy(deep=True)
+    df_copy['Day'] = df_copy.groupby('ID').cumcount() + 1
+    parameter_grid = [(criteria, correct_amount, session_length) for criteria in criteria_values
+                      for correct_amount in correct_amounts for session_length in session_lengths]
+    grid_values = np.array(parameter_grid).reshape(-1, 3)
+    session_passed = (df_copy['Corrects'].to_numpy(dtype=float)[:, None] >= grid_values[:, 1]) & \
+                     (df_copy['SessionLength'].to_numpy(dtype=float)[:, None] <= grid_values[:, 2])
+
+    # n days in a row
+    animal_ids, criteria_days = get_criteria_sweep_days(df_copy, session_passed, grid_values[:, 0],
+                                                        [False] * len(parameter_grid))
+    return get_criteria_sweep_table(parameter_grid, ['Criteria', 'CorrectAmount', 'SessionLength'], animal_ids,
+                                    criteria_days)
 
 
 def acq_widget_check(criteria, correct_amount, session_length):
@@ -115,6 +110,34 @@ def acq_widget_check(criteria, correct_amount, session_length):
     return criteria_value, correct_trials_num, session_time_sec
 
 
+def acq_sweep_widget_check(criteria, correct_amount, session_length):
+    """
+    This function checks that the criteria widgets of a criteria sweep are not empty and have valid inputs. Each widget
+    can have many values separated by commas, like '3, 4, 5'.
+
+    :param criteria: The n days in the row to try
+    :param correct_amount: The minimum required correct trials amounts to try
+    :param session_length: The maximum session lengths to try
+    :return: (criteria_values, correct_trials_nums, session_times_sec): The lists of values for all the criteria
+    """
+
+    sweep_values = list()
+    for widget, name in [(criteria, 'n days in a row'), (correct_amount, 'correct trials'),
+                         (session_length, 'session length')]:
+        try:
+            values = [int(value) for value in get_sweep_values(widget.get())]
+            if len(values) == 0:
+                raise ValueError
+        except ValueError:
+            mb.showerror('Acquisition Criteria Error',
+                         'acq_sweep_widget_check() error: The %s is either empty or invalid!' % name)
+            print('acq_sweep_widget_check() error: The %s is either empty or invalid!' % name)
+            return None
+        sweep_values.append(values)
+
+    return tuple(sweep_values)
+
+
 def button_acquisition_all(criteria, correct_amount, session_length):
     """
     This function creates a csv file for the Acquisition test. Each animal will have rows that start from their
@@ -141,6 +164,32 @@ def button_acquisition_all(criteria, correct_amount, session_length):
         save_file_message(df)
 
 
+def button_acquisition_sweep(criteria, correct_amount, session_length):
+    """
+    This function creates a csv file for the Acquisition test that has the day that every animal met the criteria for
+    every combination of the criteria values in the widgets. The raw data is only read and cleaned once for all of
+    them. At the end, the function will ask the user to save the newly created csv file in a directory.
+
+    :param criteria: The n days in the row to try, separated by commas
+    :param correct_amount: The minimum required correct trials amounts to try, separated by commas
+    :param session_length: The maximum session lengths to try, separated by commas
+    """
+
+    if acq_sweep_widget_check(criteria, correct_amount, session_length) is not None:
+        criteria_values, correct_trials_nums, session_times_sec = \
+            acq_sweep_widget_check(criteria, correct_amount, session_length)
+    else:
+        mb.showerror('Acquisition Criteria Error',
+                     'button_acquisition_sweep() error: One of the three criteria is invalid or empty!')
+        print('button_acquisition_sweep() error: One of the three criteria is invalid or empty!')
+        return
+
+    df = data_setup('Acq')
+    if df is not None:
+        df_sweep = get_acq_criteria_sweep(df, criteria_values, correct_trials_nums, session_times_sec)
+        save_file_message(df_sweep)
+
+
 def button_acquisition_first(criteria, correct_amount, session_length):
     """
     This function creates a csv file for the Acquisition test. Each row will be the first day the animal ran the
@@ -286,50 +335,9 @@ def get_ext_last_day(df, criteria, max_days, omission_amount):
     df_copy = df.copy(deep=True)
     df_copy = df_copy.loc[(df_copy['Omissions'] >= omission_amount)]
 
-    df_copy.sort_values(['ID', 'Day'], inplace=True)
-
-    df_copy.reset_index(drop=True, inplace=True)
-
-    row_index = 0
-    while row_index < df_copy.shape[0] - (criteria - 1):
-        rows_to_sum = list()
-        # compare rows with the same ID
-        for sum_numbers in range(criteria):
-            row_to_add = df_copy.loc[row_index + sum_numbers]
-            while row_to_add['ID'] != df_copy.at[row_index, 'ID'] and row_index < df_copy.shape[0] - 1:
-                row_index += 1
-            rows_to_sum.append(row_to_add)
-
-        last_row_info = rows_to_sum[-1]
-        if len(rows_to_sum) < criteria:
-            continue
-        if last_row_info['ID'] != rows_to_sum[0]['ID']:
-            continue
-
-        day_counter = list()
-        for row in rows_to_sum:
-            day_counter.append(row['Day'])
-        # if the days are consecutive, it passes the criteria
-        if day_counter == sorted(range(day_counter[0], day_counter[-1] + 1)):
-            df_copy.at[last_row_info.name, 'Criteria Passed?'] = 'yes'
-
-        difference_list = np.diff(day_counter)
-        max_days_apart_ctn = difference_list.tolist().count(1)
-        one_day_apart_ctn = difference_list.tolist().count(2)
-        total_days = sum(difference_list)
-
-        # due to the n/n+1 criteria, there can only be (1) count of a difference of two days and the rest have to be 1s
-        if total_days == criteria and one_day_apart_ctn == max_days - 3 and max_days_apart_ctn == 1:
-            df_copy.at[last_row_info.name, 'Criteria Passed?'] = 'yes'
-
-        row_index += 1
-
-    # only take the first occurrence of the rows that passed the criteria
-    df_copy = df_copy.loc[df_copy['Criteria Passed?'] == 'yes']
-    df_copy['Mice ID'] = df_copy['ID']
-    df_copy = df_copy.groupby('Mice ID').first()
-
-    return df_copy
+    # the n/n+1 criteria only allows one skipped day when it is 3/4 days, which is what the day difference counts of the
+    # row by row check came down to
+    return get_first_criteria_days(df_copy, criteria, skipped_day_allowed=criteria == 3 and max_days == 4)
 
 
 def get_extinction_all(df, criteria, max_days, omission_amount):
@@ -345,8 +353,36 @@ def get_extinction_all(df, criteria, max_days, omission_amount):
     """
 
     df_copy = get_ext_last_day(df, criteria, max_days, omission_amount)
-    for index in df_copy.iterrows():
-        df.drop(df.loc[(df['ID'] == index[1]['ID']) & (df['Day'] > index[1]['Day'])].index, inplace=True)
+    drop_days_after_criteria(df, df_copy)
+
+
+def get_ext_criteria_sweep(df, criteria_list, omission_amounts):
+    """
+    This function finds the day that every animal met the Extinction criteria for every combination of the n/n+1 days
+    criteria and the minimum required omissions. All the combinations are checked in one pass over the cleaned data
+    instead of cleaning the data again for each one.
+
+    :param df: A dataframe that represents cleaned Extinction data
+    :param criteria_list: A list of (n days, n+1 days) pairs of the criteria to try
+    :param omission_amounts: A list of the minimum required omissions to try
+    :return: df_sweep: A dataframe with one row per combination per animal with the 'Criteria', 'MaxDays',
+    'OmissionAmount', 'ID' and 'CriteriaDay' columns. If an animal did not reach the criteria, its 'CriteriaDay' is
+    empty.
+    """
+
+    df_copy = df.copy(deep=True)
+    df_copy['Day'] = df_copy.groupby('ID').cumcount() + 1
+    parameter_grid = [(criteria, max_days, omission_amount) for criteria, max_days in criteria_list
+                      for omission_amount in omission_amounts]
+    grid_values = np.array(parameter_grid).reshape(-1, 3)
+    session_passed = df_copy['Omissions'].to_numpy(dtype=float)[:, None] >= grid_values[:, 2]
+    # same as get_ext_last_day(), only the 3/4 days criteria allows one skipped day
+    skipped_days_allowed = (grid_values[:, 0] == 3) & (grid_values[:, 1] == 4)
+
+    animal_ids, criteria_days = get_criteria_sweep_days(df_copy, session_passed, grid_values[:, 0],
+                                                        skipped_days_allowed)
+    return get_criteria_sweep_table(parameter_grid, ['Criteria', 'MaxDays', 'OmissionAmount'], animal_ids,
+                                    criteria_days)
 
 
 def ext_widget_check(criteria, omission_amount):
@@ -396,6 +432,40 @@ def ext_criteria_list_check(criteria_list):
         return None
 
 
+def ext_sweep_widget_check(criteria, omission_amount):
+    """
+    This function checks that the criteria widgets of a criteria sweep are not empty and have valid inputs. Each widget
+    can have many values separated by commas, like '3/4, 4/5' for the criteria and '10, 15' for the omissions.
+
+    :param criteria: A widget that contains a string that represents the n days/n+1 days criteria to try
+    :param omission_amount: A widget that contains the minimum required omissions to try
+    :return: (criteria_list, min_omissions): The list of (n days, n+1 days) pairs and the list of minimum omissions
+    """
+
+    try:
+        criteria_list = [tuple(int(value) for value in criteria_value.split('/'))
+                         for criteria_value in get_sweep_values(criteria.get())]
+        if len(criteria_list) == 0 or any(len(criteria_pair) != 2 for criteria_pair in criteria_list):
+            raise ValueError
+    except ValueError:
+        mb.showerror('Extinction Criteria Error',
+                     'ext_sweep_widget_check() error: The criteria days are empty or invalid!')
+        print('ext_sweep_widget_check() error: The criteria days are empty or invalid!')
+        return None
+
+    try:
+        min_omissions = [int(value) for value in get_sweep_values(omission_amount.get())]
+        if len(min_omissions) == 0:
+            raise ValueError
+    except ValueError:
+        mb.showerror('Extinction Criteria Error',
+                     'ext_sweep_widget_check() error: The omissions is empty or invalid!')
+        print('ext_sweep_widget_check() error: The omissions is empty or invalid!')
+        return None
+
+    return criteria_list, min_omissions
+
+
 def button_extinction_all(criteria, omission_amount):
     """
     This function creates a csv file for the Extinction test. Each animal will have rows that start from their
@@ -428,6 +498,30 @@ def button_extinction_all(criteria, omission_amount):
         save_file_message(df)
 
 
+def button_extinction_sweep(criteria, omission_amount):
+    """
+    This function creates a csv file for the Extinction test that has the day that every animal met the criteria for
+    every combination of the criteria values in the widgets. The raw data is only read and cleaned once for all of
+    them. At the end, the function will ask the user to save the newly created csv file in a directory.
+
+    :param criteria: A widget that contains the n days/n+1 days criteria to try, separated by commas
+    :param omission_amount: A widget that contains the minimum required omissions to try, separated by commas
+    """
+
+    if ext_sweep_widget_check(criteria, omission_amount) is not None:
+        criteria_list, min_omissions = ext_sweep_widget_check(criteria, omission_amount)
+    else:
+        mb.showerror('Extinction Criteria Error',
+                     'button_extinction_sweep() error: One of the criteria is empty or invalid!')
+        print('button_extinction_sweep() error: One of the criteria is empty or invalid!')
+        return None
+
+    df = data_setup('Ext')
+    if df is not None:
+        df_sweep = get_ext_criteria_sweep(df, criteria_list, min_omissions)
+        save_file_message(df_sweep)
+
+
 def button_extinction_first(criteria, omission_amount):
     """
     This function creates a csv file for the Extinction test. Each row will be the first day the animal ran the
@@ -607,6 +701,12 @@ def make_extinction_buttons(tk, root):
                                    command=lambda: button_acquisition_all(acq_criteria_text, acq_min_correct_text,
                                                                           acq_min_session_length_text), width=30)
     acquisition_button.grid(row=3, column=0)
+    acquisition_sweep_button = tk.Button(root, text='Acquisition (Criteria Sweep)',
+                                         command=lambda: button_acquisition_sweep(acq_criteria_text,
+                                                                                  acq_min_correct_text,
+                                                                                  acq_min_session_length_text),
+                                         width=30)
+    acquisition_sweep_button.grid(row=3, column=1)
     acquisition_first_button = tk.Button(root, text='Acquisition (First Day)',
                                          command=lambda: button_acquisition_first(acq_criteria_text,
                                                                                   acq_min_correct_text,
@@ -659,6 +759,10 @@ def make_extinction_buttons(tk, root):
                                       command=lambda: button_extinction_all(ext_criteria_text, ext_min_omissions_text),
                                       width=30)
     extinction_all_button.grid(row=11, column=0)
+    extinction_sweep_button = tk.Button(root, text='Extinction (Criteria Sweep)',
+                                        command=lambda: button_extinction_sweep(ext_criteria_text,
+                                                                                ext_min_omissions_text), width=30)
+    extinction_sweep_button.grid(row=11, column=1)
     extinction_first_button = tk.Button(root, text='Extinction (First Day)',
                                         command=lambda: button_extinction_first(ext_criteria_text,
                                                                                 ext_min_omissions_text), width=30)
@@ -0,0 +1,365 @@
+from parameterized import *
+
+# the criteria options that each test type needs, in the order that its criteria functions take them
+criteria_options = {'PI': ['min_trials', 'percent_one', 'percent_two'], 'LD Train': ['criteria', 'min_reversal'],
+                    'Acq': ['criteria', 'correct_amount', 'session_length'], 'Ext': ['criteria', 'omissions']}
+
+# the test types whose criteria option is given as n days/n+1 days instead of n days in a row
+pair_criteria_tests = ['LD Train', 'Ext']
+
+# the outputs that can be made for each test type, the same ones as the buttons of the application
+general_ts_outputs = ['all', 'first-day', 'last-day', 'select-day', 'select-id', 'parameterized']
+criteria_test_outputs = general_ts_outputs + ['criteria-day', 'sweep']
+ld_probe_outputs = ['first-day-difficulty', 'last-day-difficulty', 'select-day', 'select-id', 'select-block',
+                    'last-day-average', 'block-average', 'id-average', 'type-average', 'parameterized']
+test_outputs = {'Hab1': general_ts_outputs, 'Hab2': general_ts_outputs, 'IT': general_ts_outputs,
+                'MT': general_ts_outputs, 'MI': general_ts_outputs, 'PI': general_ts_outputs + ['criteria-day'],
+                'LD Train': criteria_test_outputs, 'LD Probe': ld_probe_outputs, 'Acq': criteria_test_outputs,
+                'Ext': criteria_test_outputs}
+
+# the csv outputs that are saved by the all outputs mode, with the options of each output
+general_ts_all_outputs = [('all', dict()), ('first-day', dict()), ('last-day', dict())]
+criteria_test_all_outputs = general_ts_all_outputs + [('criteria-day', dict())]
+ld_probe_all_outputs = [('first-day-difficulty', dict()), ('last-day-difficulty', dict()),
+                        ('last-day-average', dict()), ('type-average', {'difficulty': 'easy'}),
+                        ('type-average', {'difficulty': 'hard'})]
+test_all_outputs = {'Hab1': general_ts_all_outputs, 'Hab2': general_ts_all_outputs, 'IT': general_ts_all_outputs,
+                    'MT': general_ts_all_outputs, 'MI': general_ts_all_outputs, 'PI': criteria_test_all_outputs,
+                    'LD Train': criteria_test_all_outputs, 'LD Probe': ld_probe_all_outputs,
+                    'Acq': criteria_test_all_outputs, 'Ext': criteria_test_all_outputs}
+
+# the file name and parameters of the parameterized workbooks that are made with general_parameterized()
+parameterized_workbooks = {data_setup_name: (file_name, parameter_list)
+                           for data_setup_name, file_name, parameter_list in general_ts_workbooks}
+parameterized_workbooks.update({'PI': ('Punish Incorrect', pi_parameters), 'Acq': ('Acquisition', acq_parameters),
+                                'Ext': ('Extinction', ext_parameters)})
+
+
+def get_criteria_values(test_type, option_texts, sweep=False):
+    """
+    This function checks the criteria of a test type and turns them into the values that its criteria functions take.
+    The criteria are given as the text of the criteria widgets, like '3/4' for the n days/n+1 days criteria.
+
+    :param test_type: The type of test that the animal ran, listed under schedule type
+    :param option_texts: A dictionary with the text of every criteria option of the test type, see criteria_options
+    :param sweep: A boolean that represents whether each option can have many values separated by commas
+    :return: A list with the value of every criteria option of the test type, or a list of values for each option if
+    sweep is True
+    :except ValueError: If a criteria option is missing or invalid
+    """
+
+    criteria_values = list()
+    for option in criteria_options.get(test_type, list()):
+        text = option_texts.get(option)
+        if text is None:
+            raise ValueError('the ' + option.replace('_', ' ') + ' criteria is needed for ' + test_type + '!')
+        try:
+            if option == 'criteria' and test_type in pair_criteria_tests:
+                values = [tuple(int(value) for value in criteria_value.split('/'))
+                          for criteria_value in get_sweep_values(text)]
+                if any(len(criteria_pair) != 2 for criteria_pair in values):
+                    raise ValueError
+            else:
+                values = [int(value) for value in get_sweep_values(text)]
+            if len(values) == 0 or (not sweep and len(values) != 1):
+                raise ValueError
+        except ValueError:
+            raise ValueError('the ' + option.replace('_', ' ') + ' criteria is empty or invalid!')
+        criteria_values.append(values if sweep else values[0])
+
+    return criteria_values
+
+
+def apply_test_criteria(df, test_type, criteria_values):
+    """
+    This function drops the rows of every animal after the day it met the criteria, the same way the buttons of the
+    application do. For LD Train and LD Probe, the other difficulties are dropped first.
+
+    :param df: A cleaned dataframe returned by data_setup()
+    :param test_type: The type of test that the animal ran, listed under schedule type
+    :param criteria_values: The criteria values from get_criteria_values()
+    :return: df_criteria: A dataframe with the rows of the day that every animal met the criteria, or None if the test
+    does not have criteria
+    """
+
+    df_criteria = None
+    if test_type == 'PI':
+        df_criteria = punish_incorrect_last_days(df, *criteria_values)
+    elif test_type == 'LD Train':
+        (criteria_value, criteria_max_days), min_rev = criteria_values
+        ld_train_delete_other_difficulties(df)
+        df_criteria = get_ld_last_days(df, criteria_value, criteria_max_days, min_rev)
+    elif test_type == 'LD Probe':
+        ld_probe_delete_other_difficulties(df)
+    elif test_type == 'Acq':
+        df_criteria = get_acq_final_days(df, *criteria_values)
+    elif test_type == 'Ext':
+        (criteria_value, criteria_max_days), min_omission = criteria_values
+        df_criteria = get_ext_last_day(df, criteria_value, criteria_max_days, min_omission)
+
+    if df_criteria is not None:
+        drop_days_after_criteria(df, df_criteria)
+    return df_criteria
+
+
+def get_sweep_output(df, test_type, sweep_values):
+    """
+    This function finds the day that every animal met the criteria for every combination of the criteria values.
+
+    :param df: A cleaned dataframe returned by data_setup()
+    :param test_type: The type of test that the animal ran, either LD Train, Acq or Ext
+    :param sweep_values: The criteria values from get_criteria_values() with sweep set to True
+    :return: A dataframe with one row per combination per animal
+    """
+
+    if test_type == 'LD Train':
+        ld_train_delete_other_difficulties(df)
+        return get_ld_train_criteria_sweep(df, *sweep_values)
+    if test_type == 'Acq':
+        return get_acq_criteria_sweep(df, *sweep_values)
+    if test_type == 'Ext':
+        return get_ext_criteria_sweep(df, *sweep_values)
+
+
+def get_output_view(df, test_type, output, df_criteria=None, day=None, animal_id=None, block=None, difficulty=None):
+    """
+    This function picks the rows of a csv output from the dataframe that the criteria were applied to. Some outputs
+    change the dataframe, so pass a copy when more than one output is made from it.
+
+    :param df: A dataframe returned by data_setup() after apply_test_criteria()
+    :param test_type: The type of test that the animal ran, listed under schedule type
+    :param output: The name of the output, one of test_outputs
+    :param df_criteria: The dataframe returned by apply_test_criteria(), needed for the criteria-day output
+    :param day: The selected day, needed for the select-day output
+    :param animal_id: The selected animal id, needed for the select-id and id-average outputs
+    :param block: The selected LD Probe block, needed for the select-block and block-average outputs
+    :param difficulty: The LD Probe difficulty to average, needed for the id-average and type-average outputs
+    :return: The dataframe of the output
+    """
+
+    if output == 'all':
+        return df
+    if output == 'first-day':
+        return df.loc[df['Day'] == 1]
+    if output == 'last-day' or output == 'criteria-day':
+        if test_type == 'Ext':
+            df.sort_values(['ID', 'Date'], inplace=True)
+        df_last = df.drop_duplicates(subset='ID', keep='last')
+        # the last day is the criteria day for the animals that met the criteria
+        if output == 'criteria-day':
+            df_last = df_last.loc[df_last['ID'].isin(df_criteria['ID'])]
+        return df_last
+    if output == 'select-day':
+        return df.loc[df['Day'] == day]
+    if output == 'select-id':
+        return df.loc[df['ID'] == animal_id]
+    if output == 'first-day-difficulty':
+        get_first_day_difficulty(df)
+        return df
+    if output == 'last-day-difficulty':
+        get_last_day_difficulty(df)
+        return df
+    if output == 'select-block':
+        return get_block_last_days(df, block)
+    if output == 'last-day-average':
+        return get_last_day_average(df)
+    if output == 'block-average':
+        return get_block_average(df, block)
+    if output == 'id-average':
+        return get_id_average(df, animal_id, difficulty)
+    if output == 'type-average':
+        return get_type_average(df, difficulty)
+
+
+def write_parameterized_output(df, test_type, output_directory):
+    """
+    This function writes the parameterized Excel Workbooks of a test to a directory.
+
+    :param df: A dataframe returned by data_setup() after apply_test_criteria()
+    :param test_type: The type of test that the animal ran, listed under schedule type
+    :param output_directory: The directory to save the workbooks to
+    """
+
+    os.makedirs(output_directory, exist_ok=True)
+
+    if test_type == 'LD Train':
+        ld_train_parameterized(df, output_directory)
+    elif test_type == 'LD Probe':
+        get_last_day_difficulty(df)
+        ld_probe_parameterized(df, output_directory)
+    else:
+        file_name, parameter_list = parameterized_workbooks[test_type]
+        general_parameterized(df, file_name, parameter_list, test_type, output_directory)
+
+
+def write_all_outputs(df, test_type, criteria_values, output_directory):
+    """
+    This function saves every output of a test that does not need a selected day, id or block, and its parameterized
+    Excel Workbooks, to a directory. The raw data is only read and cleaned once and the criteria are only checked once,
+    then every output is picked from the same dataframe.
+
+    :param df: A cleaned dataframe returned by data_setup()
+    :param test_type: The type of test that the animal ran, listed under schedule type
+    :param criteria_values: The criteria values from get_criteria_values()
+    :param output_directory: The directory to save the csv files and workbooks to
+    """
+
+    os.makedirs(output_directory, exist_ok=True)
+    df_criteria = apply_test_criteria(df, test_type, criteria_values)
+
+    all_outputs = test_all_outputs[test_type]
+    for output_number, (output, view_options) in enumerate(all_outputs):
+        report_progress('Saving the outputs', output_number, len(all_outputs) + 1)
+        file_name = ' '.join([test_type, output] + list(view_options.values())) + '.csv'
+        df_output = get_output_view(df.copy(), test_type, output, df_criteria, **view_options)
+        save_file_message(df_output, os.path.join(output_directory, file_name))
+
+    report_progress('Saving the outputs', len(all_outputs), len(all_outputs) + 1)
+    write_parameterized_output(df, test_type, output_directory)
+    report_progress('Saving the outputs', len(all_outputs) + 1, len(all_outputs) + 1)
+
+
+def all_outputs_button(test_type, criteria_entries):
+    """
+    This function saves every output of a test to a directory from one run of the raw data. It asks for the raw data
+    directory and then for the directory to save the outputs to.
+
+    :param test_type: The type of test that the animal ran, listed under schedule type
+    :param criteria_entries: A dictionary with the entry widget of every criteria option of the test type, see
+    criteria_options
+    """
+
+    try:
+        criteria_values = get_criteria_values(test_type, {option: entry.get() for option, entry in
+                                                          criteria_entries.items()})
+    except ValueError as error:
+        mb.showerror('All Outputs Error', 'all_outputs_button() error: ' + str(error))
+        print('all_outputs_button() error: ' + str(error))
+        return
+
+    df = data_setup(test_type)
+    if df is None:
+        return
+
+    print('Please open the directory to save all the outputs to')
+    output_directory = filedialog.askdirectory(title='Open the directory to save the outputs to')
+    if len(output_directory) == 0:
+        mb.showerror('All Outputs Error',
+                     'all_outputs_button() error: The cancel button was clicked! Please try again!')
+        print('all_outputs_button() error: The cancel button was clicked! Please try again!')
+        return
+
+    write_all_outputs(df, test_type, criteria_values, output_directory)
+    print('All the outputs have been created at:', output_directory)
+
+
+def make_all_outputs_buttons(tk, root):
+    """
+    This function creates all the all outputs buttons found on the All Outputs sub-menu.
+
+    :param tk: The TKinter library
+    :param root: A specific frame where all the buttons will live on.
+    """
+
+    # creates the punish incorrect criteria widgets
+    pi_min_trials_label = tk.Label(root, text='Enter the min req trial amount:')
+    pi_min_trials_label.grid(row=0, column=0)
+    pi_min_trials_text = tk.Entry(root, width=30, justify='center')
+    pi_min_trials_text.grid(row=0, column=1)
+
+    pi_correct_one_label = tk.Label(root, text='Enter the min % correct for first day:')
+    pi_correct_one_label.grid(row=1, column=0)
+    pi_correct_one_text = tk.Entry(root, width=30, justify='center')
+    pi_correct_one_text.grid(row=1, column=1)
+
+    pi_correct_two_label = tk.Label(root, text='Enter the min % correct for second day:')
+    pi_correct_two_label.grid(row=2, column=0)
+    pi_correct_two_text = tk.Entry(root, width=30, justify='center')
+    pi_correct_two_text.grid(row=2, column=1)
+
+    # creates the punish incorrect button
+    pi_all_outputs_btn = tk.Button(root, text='Punish Incorrect (All Outputs)',
+                                   command=lambda: all_outputs_button('PI', {'min_trials': pi_min_trials_text,
+                                                                             'percent_one': pi_correct_one_text,
+                                                                             'percent_two': pi_correct_two_text}),
+                                   width=30)
+    pi_all_outputs_btn.grid(row=3, column=0)
+
+    # visual spacer between punish incorrect and ld train
+    spacer_btw_pi_ld = tk.Label(root, text='', bg='#D6D6D6', width=57)
+    spacer_btw_pi_ld.grid(row=4, columnspan=2)
+
+    # creates the ld train criteria widgets
+    ld_train_criteria_label = tk.Label(root, text='Enter criteria as n days/n+1 days: ')
+    ld_train_criteria_label.grid(row=5, column=0)
+    ld_train_criteria_text = tk.Entry(root, width=30, justify='center')
+    ld_train_criteria_text.grid(row=5, column=1)
+
+    ld_train_min_rev_num_label = tk.Label(root, text='Enter the min reversal number: ')
+    ld_train_min_rev_num_label.grid(row=6, column=0)
+    ld_train_min_rev_num_text = tk.Entry(root, width=30, justify='center')
+    ld_train_min_rev_num_text.grid(row=6, column=1)
+
+    # creates the ld buttons
+    ld_train_all_outputs_btn = tk.Button(root, text='LD Train (All Outputs)',
+                                         command=lambda: all_outputs_button('LD Train',
+                                                                            {'criteria': ld_train_criteria_text,
+                                                                             'min_reversal':
+                                                                                 ld_train_min_rev_num_text}),
+                                         width=30)
+    ld_train_all_outputs_btn.grid(row=7, column=0)
+
+    ld_probe_all_outputs_btn = tk.Button(root, text='LD Probe (All Outputs)',
+                                         command=lambda: all_outputs_button('LD Probe', dict()), width=30)
+    ld_probe_all_outputs_btn.grid(row=8, column=0)
+
+    # visual spacer between ld and acquisition
+    spacer_btw_ld_acq = tk.Label(root, text='', bg='#D6D6D6', width=57)
+    spacer_btw_ld_acq.grid(row=9, columnspan=2)
+
+    # creates the acquisition criteria widgets
+    acq_criteria_label = tk.Label(root, text='Enter criteria as n days in a row: ')
+    acq_criteria_label.grid(row=10, column=0)
+    acq_criteria_text = tk.Entry(root, width=30, justify='center')
+    acq_criteria_text.grid(row=10, column=1)
+
+    acq_corrects_label = tk.Label(root, text='Enter the min corrects amount:')
+    acq_corrects_label.grid(row=11, column=0)
+    acq_corrects_text = tk.Entry(root, width=30, justify='center')
+    acq_corrects_text.grid(row=11, column=1)
+
+    acq_session_len_label = tk.Label(root, text='Enter the min session length time:')
+    acq_session_len_label.grid(row=12, column=0)
+    acq_session_len_text = tk.Entry(root, width=30, justify='center')
+    acq_session_len_text.grid(row=12, column=1)
+
+    # creates the acquisition button
+    acq_all_outputs_btn = tk.Button(root, text='Acquisition (All Outputs)',
+                                    command=lambda: all_outputs_button('Acq', {'criteria': acq_criteria_text,
+                                                                               'correct_amount': acq_corrects_text,
+                                                                               'session_length':
+                                                                                   acq_session_len_text}),
+                                    width=30)
+    acq_all_outputs_btn.grid(row=13, column=0)
+
+    # visual spacer between acquisition and extinction
+    spacer_btw_acq_ext = tk.Label(root, text='', bg='#D6D6D6', width=57)
+    spacer_btw_acq_ext.grid(row=14, columnspan=2)
+
+    # creates extinction criteria widgets
+    ext_criteria_label = tk.Label(root, text='Enter criteria as n days/n+1 days:')
+    ext_criteria_label.grid(row=15, column=0)
+    ext_criteria_text = tk.Entry(root, width=30, justify='center')
+    ext_criteria_text.grid(row=15, column=1)
+
+    ext_omissions_label = tk.Label(root, text='Enter the min omissions req:')
+    ext_omissions_label.grid(row=16, column=0)
+    ext_omissions_text = tk.Entry(root, width=30, justify='center')
+    ext_omissions_text.grid(row=16, column=1)
+
+    # creates extinction button
+    ext_all_outputs_btn = tk.Button(root, text='Extinction (All Outputs)',
+                                    command=lambda: all_outputs_button('Ext', {'criteria': ext_criteria_text,
+                                                                               'omissions': ext_omissions_text}),
+                                    width=30)
+    ext_all_outputs_btn.grid(row=17, column=0)
@@ -0,0 +1,906 @@
+import importlib.util
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import parameterized
+from setup_functions import *
+from acquisition_extinction import get_acq_final_days, get_ext_last_day
+from general_touchscreen import punish_incorrect_last_days
+from ld_train import get_ld_last_days
+
+# the peak memory of a process can only be read on Linux and macOS
+peak_memory_available = importlib.util.find_spec('resource') is not None
+if peak_memory_available:
+    import resource
+
+
+def make_wide_export(number_of_rows=2000, number_of_trial_columns=800, seed=0):
+    """
+    This function creates a synthetic raw ABET export that looks like what read_csv gives for a wide LD export. The
+    first 13 columns are text (database, schedule name, run date, animal id and so on). The rest are trial columns,
+    where some are read in as numbers with blank cells (NaN) and some are read in as text because a file had '-' (no
+    value) cells in them.
+
+    :param number_of_rows: The number of sessions (rows) in the export
+    :param number_of_trial_columns: The number of trial columns after the 13 info columns
+    :param seed: The seed of the random number generator, so every run uses the same export
+    :return: df: A dataframe that represents the synthetic raw ABET export
+    """
+
+    rng = np.random.default_rng(seed)
+    info_headers = ['Database', 'Machine Name', 'Schedule name', 'Schedule run date', 'Animal ID', 'Group ID',
+                    'Max_Number_Trials', 'Max_Schedule_Time', 'Version', 'Version Name', 'Application_Version',
+                    'Environment', 'Analysis Name']
+    raw_columns = {header: np.full(number_of_rows, 'text', dtype=object) for header in info_headers}
+    raw_columns['Animal ID'] = rng.integers(1, 25, number_of_rows).astype(str).astype(object)
+
+    for column in range(number_of_trial_columns):
+        values = rng.integers(0, 100, number_of_rows).astype(float)
+        values[rng.random(number_of_rows) < 0.2] = np.nan
+        header = 'Trial Analysis - Correct Image Response Latency (' + str(column + 1) + ')'
+        if column % 3 == 0:
+            # a column with '-' in some files is read in as text
+            text_values = np.array([str(int(value)) if value == value else '-' for value in values], dtype=object)
+            raw_columns[header] = text_values
+        else:
+            raw_columns[header] = values
+
+    return pd.DataFrame(raw_columns)
+
+
+def convert_to_int_replace(header_index_range, raw_data_headers, dataframe):
+    """
+    This function is the regex replace version of convert_to_int() that was used before, kept here to compare against.
+
+    :param header_index_range: A list of indices for specific parameters
+    :param raw_data_headers: A list of all the column names from raw data
+    :param dataframe: A dataframe with columns that need to be converted from strings to numerics
+    :return: dataframe: A dataframe with a specific section converted from strings to numerics
+    """
+
+    dataframe.replace(np.nan, '999999999', regex=True, inplace=True)
+    dataframe.replace('^[-]{1}$', '999999999', regex=True, inplace=True)
+
+    header_names_range = get_header_names(raw_data_headers, header_index_range)
+    dataframe[header_names_range] = dataframe[header_names_range].apply(pd.to_numeric)
+
+    dataframe.replace('999999999', np.nan, regex=True, inplace=True)
+    dataframe.replace(999999999, np.nan, regex=True, inplace=True)
+
+    return dataframe
+
+
+def extract_columns_one_by_one(df, column_indices, column_names):
+    """
+    This function is the column by column version of extract_columns() that the setup functions used before, kept here
+    to compare against.
+
+    :param df: A dataframe that represents the raw ABET data, after convert_to_int()
+    :param column_indices: A list of (column name, header indices, reducer) made by resolve_column_specs()
+    :param column_names: A list of all the column names of the cleaned dataframe, in order
+    :return: df_final: The cleaned dataframe
+    """
+
+    df_final = pd.DataFrame(columns=column_names)
+    for column_name, header_indices, reducer in column_indices:
+        if reducer == 'first':
+            df_final[column_name] = df.iloc[:, header_indices[0]]
+        elif reducer == 'sum':
+            df_final[column_name] = df.iloc[:, header_indices].sum(axis=1)
+        else:
+            df_final[column_name] = df.iloc[:, header_indices].mean(axis=1)
+
+    return df_final
+
+
+def get_percent_correctness_first_loop(df1, df2, column_names):
+    """
+    This function is the row by row version of get_percent_correctness_first() that was used before, kept here to
+    compare against.
+
+    :param df1: A dataframe that represents the raw ABET data file
+    :param df2: A dataframe that represents the cleaned LD Train/LD Probe data
+    :param column_names: A list of column names used to determine the percent correctness
+    """
+
+    for index in df1.iterrows():
+        stop_point = df1.at[index[0], 'No trials to criterion - Generic Evaluation (1)']
+        # if did not reach first reversal, make the value the correct percentage value
+        if np.isnan(stop_point) or index[1]['End Summary - Times Criteria reached (1)'] == 0:
+            stop_point = df1.at[index[0], 'End Summary - Trials Completed (1)']
+            df1.at[index[0], 'PercentCorrectTo1stReversal'] = df1.at[index[
+                                                                         0], 'End Summary - Percentage Correct (1)']
+            int_stop_point = int(stop_point)
+
+            df1.at[index[0], 'PercentCorrectTo1stReversal'] = (df1[column_names[0:int_stop_point + 1]].mean(axis=1)[
+                index[0]]) * 100
+            df2.at[index[0], 'NumberOfTrialTo1stReversal'] = int_stop_point + 1
+        else:
+            int_stop_point = int(stop_point)
+            df1.at[index[0], 'PercentCorrectTo1stReversal'] = (df1[column_names[0:int_stop_point]].mean(axis=1)[
+                index[0]]) * 100
+
+
+def get_percent_correctness_second_loop(df1, df2, column_names):
+    """
+    This function is the row by row version of get_percent_correctness_second() that was used before, kept here to
+    compare against.
+
+    :param df1: A dataframe that represents the raw ABET data file
+    :param df2: A dataframe that represents the cleaned LD Train/LD Probe data
+    :param column_names: A list of column names used to determine the percent correctness
+    """
+
+    for index in df1.iterrows():
+        start_point = df1.at[index[0], 'No trials to criterion - Generic Evaluation (1)']
+        stop_point = df2.at[index[0], 'NumberOfTrialTo2ndReversal'] + start_point
+        if np.isnan(start_point) or np.isnan(stop_point):
+            df1.at[index[0], 'PercentCorrectTo2ndReversal'] = np.nan
+        elif index[1]['End Summary - Times Criteria reached (1)'] == 1:
+            int_start_point = int(start_point)
+            list_wo_nans = df1[column_names[int_start_point:]].count(axis=1).tolist()
+            df1.at[index[0], 'PercentCorrectTo2ndReversal'] = \
+                (df1[column_names[int_start_point:]].mean(axis=1)[index[0]]) * 100
+            df2.at[index[0], 'NumberOfTrialTo2ndReversal'] = list_wo_nans[index[0]]
+        else:
+            int_start_point = int(start_point)
+            int_stop_point = int(stop_point)
+            df1.at[index[0], 'PercentCorrectTo2ndReversal'] = \
+                (df1[column_names[int_start_point:int_stop_point]].mean(axis=1)[index[0]]) * 100
+
+
+def get_missing_reversal_trials_loop(df):
+    """
+    This function is the row by row version of get_missing_reversal_trials() that was used before, kept here to compare
+    against.
+
+    :param df: The cleaned dataframe that has LD Train/LD Probe data.
+    """
+    for index in df.iterrows():
+        if np.isnan(index[1]['NumberOfTrialTo1stReversal']):
+            # if not reach first reversal, make it the total number of trials
+            df.at[index[0], 'NumberOfTrialTo1stReversal'] = df.at[index[0], 'NumberOfTrial']
+        if np.isnan(index[1]['NumberOfTrialTo2ndReversal']) and index[1]['NumberOfReversal'] > 0:
+            # if not reach second reversal and made more than one reversal, make it the difference
+            df.at[index[0], 'NumberOfTrialTo2ndReversal'] = df.at[index[0], 'NumberOfTrial'] - df.at[
+                index[0], 'NumberOfTrialTo1stReversal']
+
+
+def get_fixed_session_time_loop(df, df2):
+    """
+    This function is the row by row version of get_fixed_session_time() that was used before, kept here to compare
+    against.
+
+    :param df: The cleaned dataframe that has LD Train/LD Probe data.
+    :param df2: A dataframe that represents the raw ABET data
+    """
+
+    for index in df.iterrows():
+        if index[1]['NumberOfReversal'] == 0:
+            df.at[index[0], 'SessionLengthTo1stReversalDuration'] = df.at[index[0], 'SessionLength']
+        elif index[1]['NumberOfReversal'] == 1:
+            df.at[index[0], 'SessionLengthTo2ndReversalDuration'] = df.at[index[0], 'SessionLength'] - df.at[
+                index[0], 'SessionLengthTo1stReversalDuration']
+        else:
+            df.at[index[0], 'SessionLengthTo2ndReversalDuration'] = \
+                df2.at[index[0], 'No trials to criterion - Condition (2)'] - \
+                df2.at[index[0], 'No trials to criterion - Condition (1)']
+
+
+def get_test_type_loop(df1, column_names):
+    """
+    This function is the row by row version of get_test_type() that was used before, kept here to compare against.
+
+    :param df1: A dataframe that represents the cleaned LD Train/LD Probe data
+    :param column_names: A list of column names used to determine the type
+    """
+
+    some_list = df1[column_names].values.tolist()
+    for index in df1.iterrows():
+        if 8.0 in some_list[index[0]] or 11.0 in some_list[index[0]]:
+            df1.at[index[0], 'Type'] = 'intermediate'
+        elif 9.0 in some_list[index[0]] or 10.0 in some_list[index[0]]:
+            df1.at[index[0], 'Type'] = 'hard'
+        elif 7.0 in some_list[index[0]] or 12.0 in some_list[index[0]]:
+            df1.at[index[0], 'Type'] = 'easy'
+        else:
+            df1.at[index[0], 'Type'] = 'undetermined'
+
+
+def get_ld_last_days_loop(df, criteria, max_days, min_reversal_number):
+    """
+    This function is the row by row version of get_ld_last_days() that was used before, kept here to compare
+    against.
+
+    :param df: A dataframe that represents cleaned LD Train data
+    :param criteria: A value that represents how many days the minimum required reversal number must be met
+    :param max_days: A value that represents how many days are allotted to meet the n/n+1 criteria
+    :param min_reversal_number: A value that represents the minimum required reversal number for an animal
+    :return: df_copy: A dataframe that only contains the rows that the animals met their criteria on. If an animal did
+    not reach the criteria, it will not show up.
+    """
+
+    df_copy = df.copy(deep=True)
+    df_copy = df_copy.loc[df_copy['NumberOfReversal'] >= min_reversal_number]
+
+    df_copy.sort_values(['ID', 'Day'], inplace=True)
+    df_copy.reset_index(drop=True, inplace=True)
+
+    row_index = 0
+    while row_index < df_copy.shape[0] - (criteria - 1):
+        rows_to_sum = list()
+        # compare rows with the same ID
+        for sum_numbers in range(criteria):
+            row_to_add = df_copy.loc[row_index + sum_numbers]
+            while row_to_add['ID'] != df_copy.at[row_index, 'ID'] and row_index < df_copy.shape[0] - 1:
+                row_index += 1
+            rows_to_sum.append(row_to_add)
+
+        last_row_info = rows_to_sum[-1]
+        if len(rows_to_sum) < criteria:
+            continue
+        if last_row_info['ID'] != rows_to_sum[0]['ID']:
+            continue
+
+        day_counter = list()
+        for row in rows_to_sum:
+            day_counter.append(row['Day'])
+        # if the days are consecutive, it passes the criteria
+        if day_counter == sorted(range(day_counter[0], day_counter[-1] + 1)):
+            df_copy.at[last_row_info.name, 'Criteria Passed?'] = 'yes'
+
+        difference_list = np.diff(day_counter)
+        max_days_apart_ctn = difference_list.tolist().count(2)
+        one_day_apart_ctn = difference_list.tolist().count(1)
+        total_days = sum(difference_list)
+
+        # due to the n/n+1 criteria, there can only be (1) count of a difference of two days and the rest have to be 1s
+        if total_days == criteria and max_days_apart_ctn == 1 and one_day_apart_ctn == max_days - 3:
+            df_copy.at[last_row_info.name, 'Criteria Passed?'] = 'yes'
+
+        row_index += 1
+
+    # only take the first occurrence of the rows that passed the criteria
+    df_copy = df_copy.loc[df_copy['Criteria Passed?'] == 'yes']
+    df_copy['Mice ID'] = df_copy['ID']
+    df_copy = df_copy.groupby('Mice ID').first()
+
+    return df_copy
+
+
+def get_acq_final_days_loop(df, criteria, correct_amount, session_length):
+    """
+    This function is the row by row version of get_acq_final_days() that was used before, kept here to compare
+    against.
+
+    :param df: A dataframe that represents the cleaned Acquisition data.
+    :param criteria: The n days in the row that the animal needs to complete with the other criteria
+    :param correct_amount: The minimum required correct trials amount that animal needs to achieve
+    :param session_length: The maximum session length given to the animal to achieve the other criteria
+
+    :return: df_copy: A dataframe with all the first instances of the animals that met the criteria.
+    """
+
+    df['Day'] = df.groupby('ID').cumcount() + 1
+    df_copy = df.copy(deep=True)
+    df_copy.sort_values(['ID', 'Day'], ascending=[1, 1], inplace=True)
+    df_copy = df_copy.loc[(df_copy['Corrects'] >= correct_amount) & (df_copy['SessionLength'] <= session_length)]
+    df_copy.replace(0, 1, inplace=True)
+
+    df_copy.sort_values(['ID', 'Day'], inplace=True)
+    df_copy.reset_index(drop=True, inplace=True)
+
+    row_index = 0
+    while row_index < df_copy.shape[0] - (criteria - 1):
+        rows_to_sum = list()
+        # compare x amount of rows in a row
+        for sum_numbers in range(criteria):
+            rows_to_add = df_copy.loc[row_index + sum_numbers]
+            while rows_to_add['ID'] != df_copy.at[row_index, 'ID'] and row_index < df_copy.shape[0] - 1:
+                row_index += 1
+            rows_to_sum.append(rows_to_add)
+
+        last_row_info = rows_to_sum[-1]
+
+        if len(rows_to_sum) < criteria:
+            continue
+
+        if last_row_info['ID'] != rows_to_sum[0]['ID']:
+            continue
+
+        day_counter = list()
+        for row in rows_to_sum:
+            day_counter.append(row['Day'])
+        # if the days are consecutive, it passes the criteria
+        if day_counter == sorted(range(day_counter[0], day_counter[-1] + 1)):
+            df_copy.at[last_row_info.name, 'Criteria Passed?'] = 'yes'
+
+        row_index += 1
+
+    # only take the first occurrence of the rows that passed the criteria
+    df_copy = df_copy.loc[df_copy['Criteria Passed?'] == 'yes']
+    df_copy['Mice ID'] = df_copy['ID']
+    df_copy = df_copy.groupby('Mice ID').first()
+
+    return df_copy
+
+
+def get_ext_last_day_loop(df, criteria, max_days, omission_amount):
+    """
+    This function is the row by row version of get_ext_last_day() that was used before, kept here to compare
+    against.
+
+    :param df: A dataframe that represents cleaned Extinction data
+    :param criteria: A value that represents how many days the minimum required reversal number must be met
+    :param max_days: A value that represents how many days are allotted to meet the n/n+1 criteria
+    :param omission_amount: A value that represents the minimum required omissions for an animal
+    :return: df_copy: A dataframe that only contains the rows that the animals met their criteria on. If an animal did
+    not reach the criteria, it will not show up.
+    """
+
+    df['Day'] = df.groupby('ID').cumcount() + 1
+    df_copy = df.copy(deep=True)
+    df_copy = df_copy.loc[(df_copy['Omissions'] >= omission_amount)]
+
+    df_copy.sort_values(['ID', 'Day'], inplace=True)
+
+    df_copy.reset_index(drop=True, inplace=True)
+
+    row_index = 0
+    while row_index < df_copy.shape[0] - (criteria - 1):
+        rows_to_sum = list()
+        # compare rows with the same ID
+        for sum_numbers in range(criteria):
+            row_to_add = df_copy.loc[row_index + sum_numbers]
+            while row_to_add['ID'] != df_copy.at[row_index, 'ID'] and row_index < df_copy.shape[0] - 1:
+                row_index += 1
+            rows_to_sum.append(row_to_add)
+
+        last_row_info = rows_to_sum[-1]
+        if len(rows_to_sum) < criteria:
+            continue
+        if last_row_info['ID'] != rows_to_sum[0]['ID']:
+            continue
+
+        day_counter = list()
+        for row in rows_to_sum:
+            day_counter.append(row['Day'])
+        # if the days are consecutive, it passes the criteria
+        if day_counter == sorted(range(day_counter[0], day_counter[-1] + 1)):
+            df_copy.at[last_row_info.name, 'Criteria Passed?'] = 'yes'
+
+        difference_list = np.diff(day_counter)
+        max_days_apart_ctn = difference_list.tolist().count(1)
+        one_day_apart_ctn = difference_list.tolist().count(2)
+        total_days = sum(difference_list)
+
+        # due to the n/n+1 criteria, there can only be (1) count of a difference of two days and the rest have to be 1s
+        if total_days == criteria and one_day_apart_ctn == max_days - 3 and max_days_apart_ctn == 1:
+            df_copy.at[last_row_info.name, 'Criteria Passed?'] = 'yes'
+
+        row_index += 1
+
+    # only take the first occurrence of the rows that passed the criteria
+    df_copy = df_copy.loc[df_copy['Criteria Passed?'] == 'yes']
+    df_copy['Mice ID'] = df_copy['ID']
+    df_copy = df_copy.groupby('Mice ID').first()
+
+    return df_copy
+
+
+def punish_incorrect_last_days_loop(df, min_trial_req, criteria_one, criteria_two):
+    """
+    This function is the row by row version of punish_incorrect_last_days() that was used before, kept here to compare
+    against.
+
+    :param df: A dataframe that represents cleaned Punish Incorrect data
+    :param min_trial_req: A value that represents the minimum required trials to pass the criteria (int)
+    :param criteria_one: A value that represents the minimum percent correctness for the first day (int)
+    :param criteria_two: A value that represents the minimum precent correctness for the second day (int)
+    :return: A dataframe that only contains the rows that the animals met their criteria on. If an animal did not reach
+    the criteria, it will not show up.
+    """
+
+    df_copy = df.copy(deep=True)
+    df_copy = df_copy.loc[df_copy['NumberOfTrial'] >= min_trial_req]
+    df_copy.sort_values(['ID', 'Day'], inplace=True)
+    df_copy.reset_index(drop=True, inplace=True)
+
+    row_index = 0
+
+    while row_index < df_copy.shape[0] - 1:
+        rows_to_check = list()
+        # compare two rows at a time with the same ID
+        for row in range(2):
+            row_to_add = df_copy.loc[row_index + row]
+            while row_to_add['ID'] != df_copy.at[row_index, 'ID'] and row_index < df_copy.shape[0] - 1:
+                row_index += 1
+            rows_to_check.append(row_to_add)
+
+        last_row_info = rows_to_check[-1]
+        if len(rows_to_check) < 2:
+            continue
+        if last_row_info['ID'] != rows_to_check[0]['ID']:
+            continue
+
+        # checks the correctness matches the requirement and that both days are only 1 day apart
+        if rows_to_check[0]['PercentCorrect'] >= criteria_one and rows_to_check[1]['PercentCorrect'] >= criteria_two \
+                and abs(rows_to_check[0]['Day'] - rows_to_check[1]['Day']) == 1:
+            df_copy.at[last_row_info.name, 'Criteria Passed?'] = 'yes'
+
+        row_index += 1
+
+    # only take the first occurrence of the rows that passed the criteria
+    df_copy = df_copy.loc[df_copy['Criteria Passed?'] == 'yes']
+    df_copy['Mice ID'] = df_copy['ID']
+    df_copy = df_copy.groupby('Mice ID').first()
+
+    return df_copy
+
+
+def time_function(function, make_arguments, repeats=3):
+    """
+    This function times a function, using a fresh set of arguments for every run so functions that change their
+    arguments can be timed as well. Only the time of the function itself is measured.
+
+    :param function: The function that will be timed
+    :param make_arguments: A function that returns the tuple of arguments to call the function with
+    :param repeats: The number of times the function is run
+    :return: (best_time, result): The fastest time in seconds and the result of the last run
+    """
+
+    best_time = np.inf
+    result = None
+    for _ in range(repeats):
+        arguments = make_arguments()
+        start_time = time.perf_counter()
+        result = function(*arguments)
+        best_time = min(best_time, time.perf_counter() - start_time)
+
+    return best_time, result
+
+
+def benchmark_convert_to_int(number_of_rows=2000, number_of_trial_columns=800):
+    """
+    This function compares convert_to_int() against the regex replace version on a wide synthetic export and checks
+    that both give the same dataframe.
+
+    :param number_of_rows: The number of sessions (rows) in the export
+    :param number_of_trial_columns: The number of trial columns after the 13 info columns
+    """
+
+    df = make_wide_export(number_of_rows, number_of_trial_columns)
+    raw_data_headers = df.columns.values.tolist()
+    all_numeric_values = [*range(13, len(raw_data_headers), 1)]
+
+    def make_arguments():
+        return all_numeric_values, raw_data_headers, df.copy()
+
+    old_time, df_old = time_function(convert_to_int_replace, make_arguments)
+    new_time, df_new = time_function(convert_to_int, make_arguments)
+    pd.testing.assert_frame_equal(df_old, df_new)
+
+    print('convert_to_int on', df.shape[0], 'rows x', df.shape[1], 'columns:')
+    print('    regex replace: %.3f s, vectorized: %.3f s, speedup: %.1fx' % (old_time, new_time, old_time / new_time))
+
+
+def benchmark_extract_columns(number_of_rows=2000, number_of_trial_columns=800):
+    """
+    This function compares extract_columns() against adding the columns one by one on a wide synthetic export and
+    checks that both give the same dataframe.
+
+    :param number_of_rows: The number of sessions (rows) in the export
+    :param number_of_trial_columns: The number of trial columns after the 13 info columns
+    """
+
+    df = make_wide_export(number_of_rows, number_of_trial_columns)
+    raw_data_headers = df.columns.values.tolist()
+    df = convert_to_int([*range(13, len(raw_data_headers), 1)], raw_data_headers, df)
+
+    # split the trial columns into groups, like the latency and touch headers of a real export
+    column_specs = [('Date', ['Schedule run date'], 'first'), ('ID', ['Animal ID'], 'first')]
+    for group in range(1, 10):
+        header_prefix = 'Trial Analysis - Correct Image Response Latency (' + str(group)
+        column_specs.append(('Mean' + str(group), [header_prefix], 'mean'))
+        column_specs.append(('Total' + str(group), [header_prefix], 'sum'))
+    column_indices = resolve_column_specs(column_specs, get_header_index(raw_data_headers))
+    column_names = [column_name for column_name, _, _ in column_specs] + ['Day']
+
+    def make_arguments():
+        return df, column_indices, column_names
+
+    old_time, df_old = time_function(extract_columns_one_by_one, make_arguments)
+    new_time, df_new = time_function(extract_columns, make_arguments)
+    pd.testing.assert_frame_equal(df_old, df_new, check_exact=True)
+
+    print('setup columns from', df.shape[0], 'rows x', df.shape[1], 'columns:')
+    print('    one by one: %.3f s, all at once: %.3f s, speedup: %.1fx' % (old_time, new_time, old_time / new_time))
+
+
+def make_ld_cohort(number_of_animals=48, number_of_days=25, number_of_trials=100, seed=0):
+    """
+    This function creates a synthetic cohort of LD Train sessions with the columns that the percent correctness
+    functions use. Some animals reach no reversal, some only the 1st reversal and some both reversals.
+
+    :param number_of_animals: The number of animals in the cohort
+    :param number_of_days: The number of sessions every animal ran
+    :param number_of_trials: The number of 'Trial Analysis - No. Correct (n)' columns
+    :param seed: The seed of the random number generator, so every run uses the same cohort
+    :return: (df_raw, df_clean, column_names): The raw data, the cleaned data and the number correct column names
+    """
+
+    rng = np.random.default_rng(seed)
+    number_of_rows = number_of_animals * number_of_days
+    column_names = ['Trial Analysis - No. Correct (' + str(trial + 1) + ')' for trial in range(number_of_trials)]
+
+    trials_completed = rng.integers(20, number_of_trials, number_of_rows)
+    trial_values = rng.integers(0, 2, (number_of_rows, number_of_trials)).astype(float)
+    trial_values[np.arange(number_of_trials) >= trials_completed[:, None]] = np.nan
+    times_criteria_reached = rng.integers(0, 3, number_of_rows)
+    first_criteria = np.where(times_criteria_reached > 0, rng.integers(8, 20, number_of_rows), np.nan)
+    second_criteria = np.where(times_criteria_reached > 1, rng.integers(8, 20, number_of_rows), np.nan)
+
+    df_raw = pd.DataFrame(trial_values, columns=column_names)
+    df_raw['End Summary - Trials Completed (1)'] = trials_completed
+    df_raw['End Summary - Percentage Correct (1)'] = np.nanmean(trial_values, axis=1) * 100
+    df_raw['End Summary - Times Criteria reached (1)'] = times_criteria_reached
+    df_raw['No trials to criterion - Generic Evaluation (1)'] = first_criteria
+    df_raw['PercentCorrectTo1stReversal'] = np.nan
+    df_raw['PercentCorrectTo2ndReversal'] = np.nan
+
+    df_clean = pd.DataFrame({'NumberOfTrial': trials_completed.astype(float),
+                             'NumberOfReversal': times_criteria_reached,
+                             'NumberOfTrialTo1stReversal': first_criteria,
+                             'NumberOfTrialTo2ndReversal': second_criteria})
+    get_missing_reversal_trials(df_clean)
+
+    return df_raw, df_clean, column_names
+
+
+def benchmark_percent_correctness(number_of_animals=48, number_of_days=25, number_of_trials=100):
+    """
+    This function compares the vectorized percent correctness to the 1st/2nd reversal against the row by row version on
+    a synthetic LD Train cohort and checks that both write the same values.
+
+    :param number_of_animals: The number of animals in the cohort
+    :param number_of_days: The number of sessions every animal ran
+    :param number_of_trials: The number of 'Trial Analysis - No. Correct (n)' columns
+    """
+
+    df_raw, df_clean, column_names = make_ld_cohort(number_of_animals, number_of_days, number_of_trials)
+
+    def percent_correctness_loop(df1, df2):
+        get_percent_correctness_first_loop(df1, df2, column_names)
+        get_percent_correctness_second_loop(df1, df2, column_names)
+        return df1, df2
+
+    def percent_correctness(df1, df2):
+        trial_values = df1[column_names].to_numpy(dtype=float)
+        get_percent_correctness_first(df1, df2, trial_values)
+        get_percent_correctness_second(df1, df2, trial_values)
+        return df1, df2
+
+    def make_arguments():
+        return df_raw.copy(), df_clean.copy()
+
+    old_time, (df_raw_old, df_clean_old) = time_function(percent_correctness_loop, make_arguments)
+    new_time, (df_raw_new, df_clean_new) = time_function(percent_correctness, make_arguments)
+    pd.testing.assert_frame_equal(df_raw_old, df_raw_new)
+    pd.testing.assert_frame_equal(df_clean_old, df_clean_new)
+
+    print('percent correctness to 1st/2nd reversal on', len(df_raw), 'sessions x', number_of_trials, 'trials:')
+    print('    row by row: %.3f s, vectorized: %.3f s, speedup: %.1fx' % (old_time, new_time, old_time / new_time))
+
+
+def make_ld_fix_up_cohort(number_of_animals=48, number_of_days=25, number_of_trials=100, seed=0):
+    """
+    This function creates a synthetic cohort of LD Train sessions with the columns that the reversal trials, the
+    reversal durations and the test type are fixed from. Some animals reach no reversal, some only the 1st reversal and
+    some both reversals, and the correct positions are a mix of the easy, intermediate and hard squares.
+
+    :param number_of_animals: The number of animals in the cohort
+    :param number_of_days: The number of sessions every animal ran
+    :param number_of_trials: The number of 'Trial Analysis - Correct Position (n)' columns
+    :param seed: The seed of the random number generator, so every run uses the same cohort
+    :return: (df_raw, df_clean, column_names): The raw data, the cleaned data and the correct position column names
+    """
+
+    rng = np.random.default_rng(seed)
+    number_of_rows = number_of_animals * number_of_days
+    column_names = ['Trial Analysis - Correct Position (' + str(trial + 1) + ')' for trial in range(number_of_trials)]
+
+    # every session only uses one pair of squares, or none for a few of them
+    square_pairs = np.array([[7.0, 12.0], [8.0, 11.0], [9.0, 10.0], [np.nan, np.nan]])
+    session_pairs = square_pairs[rng.choice(4, number_of_rows, p=[0.3, 0.3, 0.3, 0.1])]
+    positions = session_pairs[np.arange(number_of_rows)[:, None], rng.integers(0, 2, (number_of_rows,
+                                                                                        number_of_trials))]
+    trials_completed = rng.integers(20, number_of_trials, number_of_rows)
+    positions[np.arange(number_of_trials) >= trials_completed[:, None]] = np.nan
+
+    times_criteria_reached = rng.integers(0, 3, number_of_rows).astype(float)
+    times_criteria_reached[rng.random(number_of_rows) < 0.02] = np.nan
+    first_criteria_time = np.where(times_criteria_reached > 0, rng.uniform(100, 1000, number_of_rows), np.nan)
+    second_criteria_time = np.where(times_criteria_reached > 1, first_criteria_time + rng.uniform(100, 1000,
+                                                                                                  number_of_rows),
+                                    np.nan)
+
+    df_raw = pd.DataFrame(positions, columns=column_names)
+    df_raw['No trials to criterion - Condition (1)'] = first_criteria_time
+    df_raw['No trials to criterion - Condition (2)'] = second_criteria_time
+    df_raw['Type'] = ''
+
+    df_clean = pd.DataFrame({'SessionLength': rng.uniform(1000, 3600, number_of_rows),
+                             'NumberOfTrial': trials_completed.astype(float),
+                             'NumberOfReversal': times_criteria_reached,
+                             'SessionLengthTo1stReversalDuration': first_criteria_time,
+                             'SessionLengthTo2ndReversalDuration': second_criteria_time,
+                             'NumberOfTrialTo1stReversal': np.where(times_criteria_reached > 0,
+                                                                    rng.integers(8, 20, number_of_rows), np.nan),
+                             'NumberOfTrialTo2ndReversal': np.where(times_criteria_reached > 1,
+                                                                    rng.integers(8, 20, number_of_rows), np.nan)})
+
+    return df_raw, df_clean, column_names
+
+
+def benchmark_ld_fix_ups(number_of_animals=48, number_of_days=25, number_of_trials=100):
+    """
+    This function compares the vectorized LD Train/LD Probe fix ups (the missing reversal trials, the reversal
+    durations and the test type) against the row by row versions on a synthetic cohort and checks that both write the
+    same values.
+
+    :param number_of_animals: The number of animals in the cohort
+    :param number_of_days: The number of sessions every animal ran
+    :param number_of_trials: The number of 'Trial Analysis - Correct Position (n)' columns
+    """
+
+    df_raw, df_clean, column_names = make_ld_fix_up_cohort(number_of_animals, number_of_days, number_of_trials)
+
+    def fix_ups_loop(df1, df2):
+        get_test_type_loop(df1, column_names)
+        get_missing_reversal_trials_loop(df2)
+        get_fixed_session_time_loop(df2, df1)
+        return df1, df2
+
+    def fix_ups(df1, df2):
+        get_test_type(df1, df1[column_names].to_numpy(dtype=float))
+        get_missing_reversal_trials(df2)
+        get_fixed_session_time(df2, df1)
+        return df1, df2
+
+    def make_arguments():
+        return df_raw.copy(), df_clean.copy()
+
+    old_time, (df_raw_old, df_clean_old) = time_function(fix_ups_loop, make_arguments)
+    new_time, (df_raw_new, df_clean_new) = time_function(fix_ups, make_arguments)
+    pd.testing.assert_frame_equal(df_raw_old, df_raw_new)
+    pd.testing.assert_frame_equal(df_clean_old, df_clean_new)
+
+    print('reversal trials, reversal durations and test type on', len(df_raw), 'sessions x', number_of_trials,
+          'trials:')
+    print('    row by row: %.3f s, vectorized: %.3f s, speedup: %.1fx' % (old_time, new_time, old_time / new_time))
+
+
+def benchmark_trial_matrices(number_of_animals=48, number_of_days=25, number_of_trials=100):
+    """
+    This function compares reading the per trial blocks of LD Train from one trial matrix against selecting the columns
+    of every block again for every function that reads it, on a synthetic cohort, and checks that both write the same
+    values.
+
+    :param number_of_animals: The number of animals in the cohort
+    :param number_of_days: The number of sessions every animal ran
+    :param number_of_trials: The number of trials of every block
+    """
+
+    df_number_correct, df_clean, number_correct_names = make_ld_cohort(number_of_animals, number_of_days,
+                                                                        number_of_trials)
+    df_correct_position, _, correct_position_names = make_ld_fix_up_cohort(number_of_animals, number_of_days,
+                                                                           number_of_trials)
+    df_raw = pd.concat([df_number_correct, df_correct_position[correct_position_names + ['Type']]], axis=1)
+    block_header_indices = {'NumberCorrect': df_raw.columns.get_indexer(number_correct_names).tolist(),
+                            'CorrectPosition': df_raw.columns.get_indexer(correct_position_names).tolist()}
+
+    def select_every_time(df1, df2):
+        get_test_type(df1, df1[correct_position_names].to_numpy(dtype=float))
+        get_percent_correctness_first(df1, df2, df1[number_correct_names].to_numpy(dtype=float))
+        get_percent_correctness_second(df1, df2, df1[number_correct_names].to_numpy(dtype=float))
+        return df1, df2
+
+    def trial_matrices(df1, df2):
+        trial_matrices = get_trial_matrices(df1, block_header_indices)
+        get_test_type(df1, trial_matrices['CorrectPosition'])
+        get_percent_correctness_first(df1, df2, trial_matrices['NumberCorrect'])
+        get_percent_correctness_second(df1, df2, trial_matrices['NumberCorrect'])
+        return df1, df2
+
+    def make_arguments():
+        return df_raw.copy(), df_clean.copy()
+
+    old_time, (df_raw_old, df_clean_old) = time_function(select_every_time, make_arguments)
+    new_time, (df_raw_new, df_clean_new) = time_function(trial_matrices, make_arguments)
+    pd.testing.assert_frame_equal(df_raw_old, df_raw_new)
+    pd.testing.assert_frame_equal(df_clean_old, df_clean_new)
+
+    print('test type and percent correctness from the trial blocks of', len(df_raw), 'sessions x', number_of_trials,
+          'trials:')
+    print('    select every time: %.3f s, trial matrix: %.3f s, speedup: %.1fx' % (old_time, new_time,
+                                                                                  old_time / new_time))
+
+
+def make_criteria_cohort(number_of_animals=200, number_of_days=40, seed=0):
+    """
+    This function creates a synthetic cohort of cleaned sessions with the columns that the criteria of LD Train,
+    Acquisition, Extinction and Punish Incorrect use.
+
+    :param number_of_animals: The number of animals in the cohort
+    :param number_of_days: The number of sessions every animal ran
+    :param seed: The seed of the random number generator, so every run uses the same cohort
+    :return: df: A dataframe that represents the cleaned sessions of the cohort
+    """
+
+    rng = np.random.default_rng(seed)
+    number_of_rows = number_of_animals * number_of_days
+    df = pd.DataFrame({'Date': np.tile(np.arange(number_of_days), number_of_animals).astype(str).astype(object),
+                       'ID': np.repeat(np.arange(1, number_of_animals + 1), number_of_days),
+                       'NumberOfReversal': rng.integers(0, 3, number_of_rows),
+                       'Corrects': rng.integers(0, 40, number_of_rows),
+                       'SessionLength': rng.integers(600, 3600, number_of_rows),
+                       'Omissions': rng.integers(0, 30, number_of_rows),
+                       'NumberOfTrial': rng.integers(0, 60, number_of_rows),
+                       'PercentCorrect': rng.choice([50.0, 70.0, 80.0, 90.0], number_of_rows)})
+    df['Day'] = df.groupby('ID').cumcount() + 1
+
+    return df
+
+
+def benchmark_criteria(number_of_animals=200, number_of_days=40):
+    """
+    This function compares the criteria functions of LD Train, Acquisition, Extinction and Punish Incorrect against the
+    row by row versions on a synthetic cohort and checks that both find the same days.
+
+    :param number_of_animals: The number of animals in the cohort
+    :param number_of_days: The number of sessions every animal ran
+    """
+
+    df = make_criteria_cohort(number_of_animals, number_of_days)
+
+    def make_arguments():
+        return (df.copy(),)
+
+    print('first day meeting the criteria on', number_of_animals, 'animals x', number_of_days, 'days:')
+    for name, function_loop, function, arguments in [
+            ('LD Train 2/3', get_ld_last_days_loop, get_ld_last_days, (2, 3, 1)),
+            ('Acquisition', get_acq_final_days_loop, get_acq_final_days, (2, 20, 3000)),
+            ('Extinction 3/4', get_ext_last_day_loop, get_ext_last_day, (3, 4, 10)),
+            ('Punish Incorrect', punish_incorrect_last_days_loop, punish_incorrect_last_days, (30, 70, 80))]:
+        old_time, df_old = time_function(lambda df_test: function_loop(df_test, *arguments), make_arguments, 1)
+        new_time, df_new = time_function(lambda df_test: function(df_test, *arguments), make_arguments)
+        pd.testing.assert_frame_equal(df_old, df_new)
+        print('    %s: row by row: %.3f s, vectorized: %.3f s, speedup: %.1fx' % (name, old_time, new_time,
+                                                                                 old_time / new_time))
+
+
+def make_ld_train_parameters_cohort(number_of_animals=200, number_of_days=120, seed=0):
+    """
+    This function creates a synthetic cohort of cleaned LD Train data with all the parameters of the LD Train
+    parameterized workbook, like a multi-month cohort would have.
+
+    :param number_of_animals: The number of animals in the cohort
+    :param number_of_days: The number of sessions every animal ran
+    :param seed: The seed of the random number generator, so every run uses the same cohort
+    :return: df: A dataframe that represents the cleaned LD Train data of the cohort
+    """
+
+    rng = np.random.default_rng(seed)
+    number_of_rows = number_of_animals * number_of_days
+    days = np.tile(np.arange(1, number_of_days + 1), number_of_animals)
+    df = pd.DataFrame({'Date': (pd.Timestamp('2020-01-01') + pd.to_timedelta(days, unit='D')).date,
+                       'ID': np.repeat(np.arange(1, number_of_animals + 1), number_of_days),
+                       'Type': 'intermediate', 'Day': days})
+    for para in parameterized.ld_parameters:
+        values = rng.random(number_of_rows) * 100
+        values[rng.random(number_of_rows) < 0.1] = np.nan
+        df[para] = values
+
+    return df
+
+
+def write_ld_train_workbook(df, constant_memory, file_name):
+    """
+    This function writes the LD Train parameterized workbook of a cohort. It is run in its own process by
+    benchmark_parameterized_export(), so the peak memory of the process only comes from this workbook.
+
+    :param df: A dataframe that represents the cleaned LD Train data
+    :param constant_memory: A boolean that represents whether the workbook is written in constant memory mode
+    :param file_name: A string that represents the path of the Excel Workbook
+    :return: (write_time, peak_memory_growth): The time in seconds and how much the peak memory grew in MB while
+    writing the workbook
+    """
+
+    parameterized.constant_memory_export = constant_memory
+    memory_unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    peak_memory_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start_time = time.perf_counter()
+    writer = parameterized.make_parameter_workbook(file_name)
+    parameterized.day_parsing_ld_train(df, 'intermediate', df['Day'].max(), parameterized.ld_parameters, writer)
+    write_time = time.perf_counter() - start_time
+    peak_memory_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return write_time, (peak_memory_after - peak_memory_before) / memory_unit
+
+
+def benchmark_parameterized_export(number_of_animals=200, number_of_days=120):
+    """
+    This function compares the peak memory of writing the LD Train parameterized workbook through pandas against the
+    constant memory mode of xlsxwriter. Each workbook is written in a new process so the peak memory of one does not
+    hide the other.
+
+    :param number_of_animals: The number of animals in the cohort
+    :param number_of_days: The number of sessions every animal ran
+    """
+
+    if not peak_memory_available:
+        print('parameterized export: the peak memory can not be measured on this platform!')
+        return
+
+    df = make_ld_train_parameters_cohort(number_of_animals, number_of_days)
+    print('LD Train parameterized workbook on', number_of_animals, 'animals x', number_of_days, 'days x',
+          len(parameterized.ld_parameters), 'parameters:')
+    with tempfile.TemporaryDirectory() as folder:
+        for name, constant_memory in [('pandas to_excel', False), ('constant memory', True)]:
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+                write_time, peak_memory_growth = executor.submit(write_ld_train_workbook, df, constant_memory,
+                                                                 os.path.join(folder, name + '.xlsx')).result()
+            print('    %s: %.3f s, peak memory growth: %.1f MB' % (name, write_time, peak_memory_growth))
+
+
+def time_import(module_name, repeats=3):
+    """
+    This function times importing a module of the application in a new Python process, so the modules that are
+    already imported by this file are not counted as free.
+
+    :param module_name: The name of the module to import
+    :param repeats: The number of new processes the module is imported in
+    :return: The fastest import time in seconds
+    """
+
+    timing_code = ('import time; start_time = time.perf_counter(); import ' + module_name +
+                   '; print(time.perf_counter() - start_time)')
+    return min(float(subprocess.run([sys.executable, '-c', timing_code], capture_output=True, text=True, check=True,
+                                    cwd=os.path.dirname(os.path.abspath(__file__))).stdout)
+               for _ in range(repeats))
+
+
+def benchmark_startup():
+    """
+    This function compares the import time of ts_main.py, which is all the main menu needs, against the import time of
+    every analysis module, which ts_main.py used to import before the main menu was shown. ts_main.py prints how long
+    it took to show the main menu when the application is started.
+    """
+
+    if importlib.util.find_spec('tkinter') is None:
+        print('start up: tkinter is not installed!')
+        return
+
+    main_menu_time = time_import('ts_main')
+    analysis_time = time_import('all_outputs')
+    print('start up imports in a new process:')
+    print('    main menu (ts_main): %.3f s, analysis modules (all_outputs): %.3f s' % (main_menu_time, analysis_time))
+
+
+if __name__ == '__main__':
+    benchmark_convert_to_int()
+    benchmark_extract_columns()
+    benchmark_percent_correctness()
+    benchmark_ld_fix_ups()
+    benchmark_trial_matrices()
+    benchmark_criteria()
+    benchmark_parameterized_export()
+    benchmark_startup()
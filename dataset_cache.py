@@ -0,0 +1,564 @@
+import hashlib
+import importlib.util
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from setup_functions import required_index_range
+
+# the most cleaned dataframes and the most memory (in bytes) that the session cache is allowed to hold
+max_cached_datasets = 8
+max_cache_bytes = 512 * 1024 * 1024
+
+session_cache = OrderedDict()
+
+# the most raw data folders and the most memory (in bytes) that the schedule partitions are allowed to hold
+max_partitioned_folders = 2
+max_partition_bytes = 1024 * 1024 * 1024
+
+schedule_partitions = OrderedDict()
+
+# the folder keys of the raw data folders whose partitions were too large to keep
+oversized_folders = set()
+
+# the columnar cache needs pyarrow, which is optional
+columnar_cache_available = importlib.util.find_spec('pyarrow') is not None
+
+# the hidden folder inside the raw data folder that holds the columnar copy of the raw ABET files
+columnar_cache_folder = '.abet_cache'
+columnar_cache_index = 'cache_index.json'
+source_file_column = '__source_file__'
+value_type_prefix = '__value_type__ '
+
+# the source files of the cleaning code, a stored cleaned dataframe is only reused if they have not changed since
+cleaning_source_files = ['setup.py', 'setup_functions.py']
+cleaning_code_version = None
+
+# the python types that can be mixed with text in a raw data column and how to turn their text back into values
+mixed_value_types = {1: int, 2: float, 3: lambda value: value == 'True'}
+
+
+def make_folder_key(file_path, files):
+    """
+    This function creates the key used to look up the schedule partitions of a raw data folder. The key is made from
+    the raw data folder and the name, size and last modified time of every csv file in the folder. If any file is
+    added, removed or changed on disk, the key will be different and the raw data will be read again.
+
+    :param file_path: The directory that has all the raw data csv files
+    :param files: A list of paths to the raw data csv files
+    :return: A tuple that represents the folder key, or None if one of the files could not be read
+    """
+
+    file_stats = list()
+    try:
+        for file in sorted(files):
+            file_stat = os.stat(file)
+            file_stats.append((os.path.basename(file), file_stat.st_size, file_stat.st_mtime_ns))
+    except OSError:
+        return None
+
+    return os.path.abspath(file_path), tuple(file_stats)
+
+
+def can_partition_folder(folder_key):
+    """
+    This function checks if the schedule partitions of a raw data folder can be kept in memory. A folder is not
+    partitioned if its csv files are larger than max_partition_bytes, or if its partitions were too large to keep the
+    last time it was read, since reading every row and column would then be repeated for every test type.
+
+    :param folder_key: The folder key of the raw data folder created by make_folder_key()
+    :return: A boolean that represents whether the folder can be partitioned
+    """
+
+    if folder_key is None or folder_key in oversized_folders:
+        return False
+
+    folder_path, file_stats = folder_key
+    return sum(file_size for file_name, file_size, file_mtime in file_stats) <= max_partition_bytes
+
+
+def make_cache_key(file_path, files, test_type):
+    """
+    This function creates the key used to look up a cleaned dataframe in the session cache. The key is made from the
+    folder key of the raw data folder and the test type.
+
+    :param file_path: The directory that has all the raw data csv files
+    :param files: A list of paths to the raw data csv files
+    :param test_type: The type of test that the animal ran, listed under schedule type
+    :return: A tuple that represents the cache key, or None if one of the files could not be read
+    """
+
+    folder_key = make_folder_key(file_path, files)
+    if folder_key is None:
+        return None
+
+    return folder_key + (test_type,)
+
+
+def get_cached_dataset(key):
+    """
+    This function looks up a cleaned dataframe in the session cache. A copy is returned so that the button functions
+    can drop and sort rows without changing the cached dataframe.
+
+    :param key: The cache key created by make_cache_key()
+    :return: A copy of the cleaned dataframe, or None if it is not in the cache
+    """
+
+    if key is None or key not in session_cache:
+        return None
+
+    # mark the dataframe as the most recently used
+    session_cache.move_to_end(key)
+    df, size = session_cache[key]
+    return df.copy(deep=True)
+
+
+def cache_dataset(key, df):
+    """
+    This function stores a cleaned dataframe in the session cache. If the cache is holding too many dataframes or too
+    much memory, the least recently used dataframes are removed until it fits again. A dataframe that is larger than
+    the whole cache is not stored.
+
+    :param key: The cache key created by make_cache_key()
+    :param df: The cleaned dataframe returned by one of the setup functions
+    """
+
+    if key is None or df is None:
+        return
+
+    size = int(df.memory_usage(index=True, deep=True).sum())
+    if size > max_cache_bytes:
+        return
+
+    session_cache[key] = (df.copy(deep=True), size)
+    session_cache.move_to_end(key)
+
+    # evict the least recently used dataframes
+    while len(session_cache) > max_cached_datasets or cache_size() > max_cache_bytes:
+        session_cache.popitem(last=False)
+
+
+def cache_size():
+    """
+    This function adds up the memory used by all the dataframes in the session cache.
+
+    :return: The total size of the cached dataframes in bytes
+    """
+
+    return sum(size for df, size in session_cache.values())
+
+
+def clear_dataset_cache():
+    """
+    This function removes every dataframe from the session cache and every schedule partition.
+    """
+
+    session_cache.clear()
+    schedule_partitions.clear()
+    oversized_folders.clear()
+
+
+def partition_by_schedule(df, row_positions):
+    """
+    This function splits the combined raw ABET data of a folder into one partition for every schedule name, so every
+    test type can take its own rows without reading the raw data files again. The rows of a partition stay in the order
+    of the combined raw data.
+
+    The partition under None holds the rows that no test type can select: none if the raw data has a 'Schedule name'
+    column, or every row if it does not, so specific_schedule_name() can still report the wrong files.
+
+    :param df: A dataframe with all the raw ABET files combined, in the order of the files list
+    :param row_positions: An array with the position in the files list of the file that each row came from
+    :return: partitions: A dictionary that maps every schedule name to its (df, row_positions)
+    """
+
+    if 'Schedule name' not in df.columns:
+        return {None: (df, row_positions)}
+
+    partitions = {None: (df.iloc[:0], row_positions[:0])}
+    for schedule_name, schedule_rows in df.groupby('Schedule name', sort=False).indices.items():
+        partitions[schedule_name] = (df.iloc[schedule_rows], row_positions[schedule_rows])
+
+    return partitions
+
+
+def get_schedule_rows(partitions, schedule_name):
+    """
+    This function takes the rows of a schedule from the schedule partitions of a folder.
+
+    :param partitions: The schedule partitions created by partition_by_schedule()
+    :param schedule_name: The name of the test the mouse ran, found under the schedule name in raw data
+    :return: (df, row_positions): The raw ABET data of the schedule and an array with the position in the files list of
+    the file that each row came from
+    """
+
+    return partitions.get(schedule_name, partitions[None])
+
+
+def get_schedule_partitions(key):
+    """
+    This function looks up the schedule partitions of a raw data folder. The partitions are not copied, since the
+    setup functions never change the raw data that they are given.
+
+    :param key: The folder key created by make_folder_key()
+    :return: The schedule partitions, or None if the folder has not been read yet
+    """
+
+    if key is None or key not in schedule_partitions:
+        return None
+
+    # mark the folder as the most recently used
+    schedule_partitions.move_to_end(key)
+    partitions, size = schedule_partitions[key]
+    return partitions
+
+
+def cache_schedule_partitions(key, partitions):
+    """
+    This function stores the schedule partitions of a raw data folder. If too many folders or too much memory are
+    held, the least recently used folders are removed until it fits again. A folder that is larger than the limit is
+    not stored, and is not partitioned again, see can_partition_folder().
+
+    :param key: The folder key created by make_folder_key()
+    :param partitions: The schedule partitions created by partition_by_schedule()
+    """
+
+    if key is None:
+        return
+
+    size = sum(int(df.memory_usage(index=True, deep=True).sum()) for df, row_positions in partitions.values())
+    if size > max_partition_bytes:
+        oversized_folders.add(key)
+        return
+
+    schedule_partitions[key] = (partitions, size)
+    schedule_partitions.move_to_end(key)
+
+    # evict the least recently used folders
+    while len(schedule_partitions) > max_partitioned_folders or \
+            sum(size for partitions, size in schedule_partitions.values()) > max_partition_bytes:
+        schedule_partitions.popitem(last=False)
+
+
+def get_file_hash(file):
+    """
+    This function creates a hash of the contents of a raw data file. It is used to tell if a file really changed when
+    its size or last modified time is different from the one in the manifest (for example when a file is copied again).
+
+    :param file: The path to the raw data csv file
+    :return: A string that represents the SHA-1 hash of the file contents
+    """
+
+    file_hash = hashlib.sha1()
+    with open(file, 'rb') as raw_file:
+        for block in iter(lambda: raw_file.read(1024 * 1024), b''):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+def load_manifest(file_path):
+    """
+    This function loads the manifest of the raw data folder. The manifest lists every raw data file that has been
+    ingested, with its size, last modified time and content hash.
+
+    :param file_path: The directory that has all the raw data csv files
+    :return: A dictionary that represents the manifest, which is empty if there is no manifest yet
+    """
+
+    try:
+        with open(os.path.join(file_path, columnar_cache_folder, columnar_cache_index), 'r') as index_file:
+            return json.load(index_file)
+    except (OSError, ValueError):
+        return dict()
+
+
+def get_file_manifest(file_path, files):
+    """
+    This function creates the manifest entries of the raw data files. The content hash of a file is only computed
+    again if its size or last modified time is different from the one stored in the manifest of the folder.
+
+    :param file_path: The directory that has all the raw data csv files
+    :param files: A list of paths to the raw data csv files
+    :return: file_manifest: A dictionary that maps the name of each file to its path, size, last modified time and
+    content hash
+    """
+
+    stored_files = load_manifest(file_path).get('files', dict())
+    file_manifest = dict()
+    for file in files:
+        file_stat = os.stat(file)
+        entry = {'path': os.path.abspath(file), 'size': file_stat.st_size, 'mtime_ns': file_stat.st_mtime_ns}
+        stored_entry = stored_files.get(os.path.basename(file), dict())
+        if stored_entry.get('size') == entry['size'] and stored_entry.get('mtime_ns') == entry['mtime_ns'] and \
+                'sha1' in stored_entry:
+            entry['sha1'] = stored_entry['sha1']
+        else:
+            entry['sha1'] = get_file_hash(file)
+        file_manifest[os.path.basename(file)] = entry
+
+    return file_manifest
+
+
+def get_cached_file_positions(file_path, files, file_manifest):
+    """
+    This function finds the raw ABET files that are stored in the columnar cache of the raw data folder and can be
+    loaded from it. A file can only be taken from the cache if its contents have not changed since it was ingested and
+    it was read the same way (as the first file of the folder or not).
+
+    :param file_path: The directory that has all the raw data csv files
+    :param files: A list of paths to the raw data csv files, in the order they will be combined
+    :param file_manifest: The manifest entries of the raw data files created by get_file_manifest()
+    :return: file_positions: A dictionary that maps the name of every file that can be loaded from the cache to its
+    position in the files list
+    """
+
+    cache_index = load_manifest(file_path)
+
+    file_positions = dict()
+    for position, file in enumerate(files):
+        entry = cache_index.get('files', dict()).get(os.path.basename(file))
+        if entry is not None and entry.get('sha1') == file_manifest[os.path.basename(file)]['sha1'] and \
+                entry.get('first_file') == (position == 0):
+            file_positions[os.path.basename(file)] = position
+
+    return file_positions
+
+
+def load_columnar_cache(file_path, files, file_manifest, header_prefixes=None, schedule_name=None):
+    """
+    This function loads the raw ABET files that are already stored in the columnar (Parquet) cache of the raw data
+    folder. A file is only taken from the cache if its contents have not changed since it was ingested and it was read
+    the same way (as the first file of the folder or not). Every other file has to be parsed from the csv again.
+
+    The rows of the cached files are returned in the order of the files list, and every file keeps the row index that
+    read_csv gave it, so the result can be combined with newly parsed files as if every file was read from the csv.
+
+    If header prefixes are given, only the columns that a test needs are read from the cache. If a schedule name is
+    given, only the rows of that schedule are read from the cache, and the row index of every file only counts the rows
+    that were kept.
+
+    If the cache does not exist, cannot be read, or pyarrow is not installed, nothing is loaded.
+
+    :param file_path: The directory that has all the raw data csv files
+    :param files: A list of paths to the raw data csv files, in the order they will be combined
+    :param file_manifest: The manifest entries of the raw data files created by get_file_manifest()
+    :param header_prefixes: A list of headers or parts of headers that a test uses, or None to load every column
+    :param schedule_name: The schedule name of the rows to load, or None to load every row
+    :return: (df_cached, row_positions): A dataframe with the raw data of the cached files (None if there are none) and
+    an array with the position in the files list of the file that each row came from
+    """
+
+    no_cached_rows = None, np.array([], dtype=np.int64)
+    cache_path = os.path.join(file_path, columnar_cache_folder)
+    if not os.path.isfile(os.path.join(cache_path, columnar_cache_index)):
+        return no_cached_rows
+
+    try:
+        cache_index = load_manifest(file_path)
+
+        # only keep the files that have not changed since they were stored
+        file_positions = get_cached_file_positions(file_path, files, file_manifest)
+        if len(file_positions) == 0:
+            return no_cached_rows
+
+        columns = None
+        if header_prefixes is not None:
+            raw_columns = cache_index['columns']
+            columns = [raw_columns[index] for index in required_index_range(header_prefixes, raw_columns)]
+            stored_columns = set(cache_index['stored_columns'])
+            columns += [value_type_prefix + column for column in columns if value_type_prefix + column in
+                        stored_columns]
+            columns.append(source_file_column)
+        # the rows of the other schedules are dropped by pyarrow while the cache is read
+        filters = None
+        if schedule_name is not None and 'Schedule name' in cache_index['columns']:
+            filters = [('Schedule name', '==', schedule_name)]
+        df_cached = pd.read_parquet(os.path.join(cache_path, cache_index['data_file']), engine='pyarrow',
+                                    columns=columns, filters=filters)
+    except (ImportError, OSError, ValueError, TypeError, KeyError):
+        print('The columnar cache could not be read! The raw data csv files will be parsed instead....')
+        return no_cached_rows
+
+    # drop the rows of changed or removed files and put the rest in the order of the files list
+    row_positions = df_cached[source_file_column].map(file_positions)
+    if row_positions.isna().any() or not row_positions.is_monotonic_increasing:
+        row_positions = row_positions.loc[row_positions.notna()].sort_values(kind='stable')
+        df_cached = df_cached.loc[row_positions.index]
+    row_positions = row_positions.to_numpy(dtype=np.int64)
+
+    value_types = {column[len(value_type_prefix):]: df_cached[column].to_numpy() for column in df_cached.columns
+                   if column.startswith(value_type_prefix)}
+    raw_columns = dict()
+    for column in df_cached.columns:
+        if column == source_file_column or column.startswith(value_type_prefix):
+            continue
+        if df_cached[column].dtype != object:
+            raw_columns[column] = df_cached[column].to_numpy()
+            continue
+        # parquet gives back None for the blank cells of text columns, read_csv gives NaN
+        values = df_cached[column].to_numpy(dtype=object, copy=True)
+        values[pd.isna(values)] = np.nan
+        # turn the numbers that were stored as text in mixed columns back into numbers
+        if column in value_types:
+            for value_type, convert in mixed_value_types.items():
+                typed_rows = value_types[column] == value_type
+                values[typed_rows] = [convert(value) for value in values[typed_rows]]
+        raw_columns[column] = values
+
+    # build the dataframe in one go, every file starts its own row index at 0 like read_csv does
+    row_index = pd.Series(row_positions).groupby(row_positions).cumcount().to_numpy()
+    df_cached = pd.DataFrame(raw_columns, index=row_index)
+
+    return df_cached, row_positions
+
+
+def save_columnar_cache(file_path, files, df, row_positions, file_manifest):
+    """
+    This function stores the combined raw ABET data in a columnar (Parquet) cache inside a hidden folder of the raw
+    data folder, so the next run can load it without parsing the csv files again. Columns keep the types that read_csv
+    gave them. If a column mixes text and numbers (for example '-' in some files and numbers in others), the column is
+    stored as text and the type of every value is stored next to it so the numbers can be restored exactly.
+
+    If pyarrow is not installed or the cache cannot be written, the raw data is still used but not cached.
+
+    :param file_path: The directory that has all the raw data csv files
+    :param files: A list of paths to the raw data csv files, in the order they were combined
+    :param df: A dataframe with all the raw ABET files combined, in the order of the files list
+    :param row_positions: An array with the position in the files list of the file that each row came from
+    :param file_manifest: The manifest entries of the raw data files created by get_file_manifest()
+    """
+
+    cache_path = os.path.join(file_path, columnar_cache_folder)
+    file_names = np.array([os.path.basename(file) for file in files], dtype=object)
+    cache_columns = dict()
+    try:
+        for column in df.columns:
+            values = df[column].to_numpy()
+            if df[column].dtype != object or pd.api.types.infer_dtype(values, skipna=True) in ['string', 'empty']:
+                cache_columns[column] = values
+                continue
+            # store the numbers of a column that mixes text and numbers as text, and remember their types
+            values = values.copy()
+            value_types = np.zeros(len(values), dtype=np.uint8)
+            not_blank = pd.notna(values)
+            # check bool before int since True and False are also ints
+            for value_type, python_type in [(3, bool), (1, int), (2, float)]:
+                typed_rows = (value_types == 0) & not_blank & np.array([isinstance(value, python_type)
+                                                                        for value in values], dtype=bool)
+                value_types[typed_rows] = value_type
+                values[typed_rows] = [repr(value) if value_type == 2 else str(value) for value in values[typed_rows]]
+            if not all(isinstance(value, str) for value in values[not_blank]):
+                raise TypeError('Column ' + column + ' cannot be stored in the columnar cache!')
+            cache_columns[column] = values
+            cache_columns[value_type_prefix + column] = value_types
+        cache_columns[source_file_column] = file_names[row_positions]
+        df_cache = pd.DataFrame(cache_columns)
+
+        os.makedirs(cache_path, exist_ok=True)
+        df_cache.to_parquet(os.path.join(cache_path, 'raw_data.parquet'), engine='pyarrow', index=False)
+
+        cache_index = {'data_file': 'raw_data.parquet', 'columns': df.columns.tolist(),
+                       'stored_columns': df_cache.columns.tolist(), 'files': dict()}
+        for position, file in enumerate(files):
+            cache_index['files'][os.path.basename(file)] = dict(file_manifest[os.path.basename(file)],
+                                                                first_file=position == 0)
+        with open(os.path.join(cache_path, columnar_cache_index), 'w') as index_file:
+            json.dump(cache_index, index_file)
+    except ImportError:
+        print('pyarrow is not installed! The raw data will not be stored in a columnar cache.')
+    except (OSError, ValueError, TypeError):
+        print('The columnar cache could not be written! The raw data will be parsed again next time.')
+
+
+def cleaned_dataset_name(test_type):
+    """
+    This function creates the file name used to store the cleaned dataframe of a test type in the cache folder.
+
+    :param test_type: The type of test that the animal ran, listed under schedule type
+    :return: The file name without an extension
+    """
+
+    return 'cleaned_' + ''.join(character if character.isalnum() else '_' for character in test_type)
+
+
+def get_cleaning_version():
+    """
+    This function creates a hash of the source code that cleans the raw data. It is stored with every cleaned dataframe
+    so that a dataframe cleaned by an older version of the code is cleaned again instead of being reused.
+
+    :return: A string that represents the SHA-1 hash of the cleaning source files
+    """
+
+    global cleaning_code_version
+    if cleaning_code_version is None:
+        code_hash = hashlib.sha1()
+        for source_file in cleaning_source_files:
+            with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), source_file), 'rb') as code_file:
+                code_hash.update(code_file.read())
+        cleaning_code_version = code_hash.hexdigest()
+    return cleaning_code_version
+
+
+def load_cleaned_dataset(file_path, test_type):
+    """
+    This function loads the cleaned dataframe of a test type that was stored by a previous run, together with the
+    manifest of the raw data files it was built from. For every file, the manifest has its content hash and the animal
+    ids that it has rows for.
+
+    The stored dataframe is discarded if it was cleaned by a different version of the cleaning code or its columns are
+    not the ones that were stored with it.
+
+    :param file_path: The directory that has all the raw data csv files
+    :param test_type: The type of test that the animal ran, listed under schedule type
+    :return: (df_clean, built_from): The stored cleaned dataframe and its manifest, or (None, None) if there is no
+    stored dataframe, it cannot be read or it is out of date
+    """
+
+    dataset_path = os.path.join(file_path, columnar_cache_folder, cleaned_dataset_name(test_type))
+    try:
+        with open(dataset_path + '.json', 'r') as manifest_file:
+            stored_dataset = json.load(manifest_file)
+        if stored_dataset.get('cleaning_version') != get_cleaning_version():
+            print('The cleaning code has changed since the cleaned data was stored! All the raw data will be cleaned.')
+            return None, None
+        built_from = stored_dataset['files']
+        df_clean = pd.read_parquet(dataset_path + '.parquet', engine='pyarrow')
+        if df_clean.columns.tolist() != stored_dataset['columns']:
+            return None, None
+    except (ImportError, OSError, ValueError, TypeError, KeyError, AttributeError):
+        return None, None
+
+    # parquet gives back None for the blank cells of text columns
+    text_columns = df_clean.select_dtypes(include='object').columns
+    df_clean[text_columns] = df_clean[text_columns].where(df_clean[text_columns].notna(), np.nan)
+
+    return df_clean, built_from
+
+
+def save_cleaned_dataset(file_path, test_type, df_clean, built_from):
+    """
+    This function stores the cleaned dataframe of a test type in the cache folder, together with the manifest of the
+    raw data files it was built from, so the next run only has to clean the animals that have new or changed files. The
+    version of the cleaning code and the cleaned columns are stored with it, see load_cleaned_dataset().
+
+    :param file_path: The directory that has all the raw data csv files
+    :param test_type: The type of test that the animal ran, listed under schedule type
+    :param df_clean: The cleaned dataframe returned by one of the setup functions
+    :param built_from: A dictionary that maps the name of each raw data file to its content hash and animal ids
+    """
+
+    dataset_path = os.path.join(file_path, columnar_cache_folder, cleaned_dataset_name(test_type))
+    try:
+        os.makedirs(os.path.dirname(dataset_path), exist_ok=True)
+        df_clean.to_parquet(dataset_path + '.parquet', engine='pyarrow', index=False)
+        stored_dataset = {'cleaning_version': get_cleaning_version(), 'columns': df_clean.columns.tolist(),
+                          'files': built_from}
+        with open(dataset_path + '.json', 'w') as manifest_file:
+            json.dump(stored_dataset, manifest_file)
+    except ImportError:
+        print('pyarrow is not installed! The cleaned data will not be stored for incremental runs.')
+    except (OSError, ValueError, TypeError):
+        print('The cleaned data could not be stored! The next run will clean all the raw data again.')
@@ -150,39 +150,10 @@ def punish_incorrect_last_days(df, min_trial_req, criteria_one, criteria_two):
 
     df_copy = df.copy(deep=True)
     df_copy = df_copy.loc[df_copy['NumberOfTrial'] >= min_trial_req]
-    df_copy.sort_values(['ID', 'Day'], inplace=True)
-    df_copy.reset_index(drop=True, inplace=True)
 
-    row_index = 0
-
-    while row_index < df_copy.shape[0] - 1:
-        rows_to_check = list()
-        # compare two rows at a time with the same ID
-        for row in range(2):
-            row_to_add = df_copy.loc[row_index + row]
-            while row_to_add['ID'] != df_copy.at[row_index, 'ID'] and row_index < df_copy.shape[0] - 1:
-                row_index += 1
-            rows_to_check.append(row_to_add)
-
-        last_row_info = rows_to_check[-1]
-        if len(rows_to_check) < 2:
-            continue
-        if last_row_info['ID'] != rows_to_check[0]['ID']:
-            continue
-
-        # checks the correctness matches the requirement and that both days are only 1 day apart
-        if rows_to_check[0]['PercentCorrect'] >= criteria_one and rows_to_check[1]['PercentCorrect'] >= criteria_two \
-                and abs(rows_to_check[0]['Day'] - rows_to_check[1]['Day']) == 1:
-            df_copy.at[last_row_info.name, 'Criteria Passed?'] = 'yes'
-
-        row_index += 1
-
-    # only take the first occurrence of the rows that passed the criteria
-    df_copy = df_copy.loc[df_copy['Criteria Passed?'] == 'yes']
-    df_copy['Mice ID'] = df_copy['ID']
-    df_copy = df_copy.groupby('Mice ID').first()
-
-    return df_copy
+    # checks the correctness matches the requirement and that both days are only 1 day apart
+    return get_first_criteria_days(df_copy, 2, window_minimums=[('PercentCorrect', criteria_one),
+                                                                ('PercentCorrect', criteria_two)])
 
 
 def get_punish_incorrect_normal(df, min_trials, percent_one, percent_two):
@@ -199,8 +170,7 @@ def get_punish_incorrect_normal(df, min_trials, percent_one, percent_two):
 
     df_copy = punish_incorrect_last_days(df, min_trials, percent_one, percent_two)
     # drop rows that have larger day values and same ids (those are probably extra days to retain mouse memory)
-    for index in df_copy.iterrows():
-        df.drop(df.loc[(df['ID'] == index[1]['ID']) & (df['Day'] > index[1]['Day'])].index, inplace=True)
+    drop_days_after_criteria(df, df_copy)
 
 
 def get_punish_incorrect_criteria_days(df, min_trials, percent_one, percent_two):
@@ -1,5 +1,14 @@
 from setup import *
 
+# the columns that are averaged by the LD Probe average buttons, and the columns of the inter-difficulty averages
+ld_probe_average_parameters = ['SessionLength', 'NumberOfTrial', 'PercentCorrect', 'NumberOfReversal',
+                               'TotalITITouches', 'TotalBlankTouches', 'MeanRewardCollectionLatency',
+                               'MeanCorrectTouchLatency', 'MeanIncorrectTouchLatency',
+                               'SessionLengthTo1stReversalDuration', 'SessionLengthTo2ndReversalDuration',
+                               'NumberOfTrialTo1stReversal', 'NumberOfTrialTo2ndReversal',
+                               'PercentCorrectTo1stReversal', 'PercentCorrectTo2ndReversal']
+ld_probe_average_columns = ['Date', 'ID', 'Type', 'Day'] + ld_probe_average_parameters
+
 
 def get_last_day_difficulty(df):
     """
@@ -159,18 +168,40 @@ def ld_probe_select_block(block_number):
         print('ld_probe_select_block() error: The block number criteria is empty or invalid!')
         return None
 
-    block_day_range_max = 4 * selected_block
-    block_day_range_min = block_day_range_max - 3
-    block_day_total_range = [*range(block_day_range_min, block_day_range_max + 1, 1)]
-
     df = data_setup('LD Probe')
     if df is not None:
         ld_probe_delete_other_difficulties(df)
-        df = df.loc[(df['Day'] == block_day_total_range[1]) | (df['Day'] == block_day_total_range[3])]
-
+        df = get_block_last_days(df, selected_block)
         save_file_message(df)
 
 
+def get_block_days(selected_block):
+    """
+    This function gets the days of a LD Probe block. Each block is 4 days.
+
+    :param selected_block: An integer that represents the block number
+    :return: A list of the 4 days of the block
+    """
+
+    block_day_range_max = 4 * selected_block
+    block_day_range_min = block_day_range_max - 3
+    return [*range(block_day_range_min, block_day_range_max + 1, 1)]
+
+
+def get_block_last_days(df, selected_block):
+    """
+    This function gets the rows of the last day of each difficulty for a selected LD Probe block, which are the 2nd and
+    4th days of the block.
+
+    :param df: A dataframe that represents the cleaned LD Probe data with only easy and hard rows.
+    :param selected_block: An integer that represents the block number
+    :return: A dataframe with the rows of the 2nd and 4th days of the block
+    """
+
+    block_day_total_range = get_block_days(selected_block)
+    return df.loc[(df['Day'] == block_day_total_range[1]) | (df['Day'] == block_day_total_range[3])]
+
+
 def averaging_process(df):
     """
     This function does inter-difficulty averages. It will calculate the averages for the two easy days and the two hard
@@ -178,50 +209,35 @@ def averaging_process(df):
     criteria the next day, the average will automatically be the result of the day that it actually reached the
     criteria.
 
+    The rows are paired two at a time in order, so every pair gets a pair index and all the pairs are averaged at the
+    same time by grouping on it.
+
     :param df: A dataframe that contains all the cleaned LD Probe data with only easy and hard rows.
     :return: new_df: A dataframe that contains all the inter-difficulty averages.
     """
 
-    new_df = pd.DataFrame()
-    row_index = 0
-
-    while row_index < df.shape[0] - 1:
-        rows_to_avg = list()
-
-        # average two rows at a time
-        for avg_index in range(2):
-            row_to_add = df.loc[avg_index + row_index]
-            rows_to_avg.append(row_to_add)
-
-        # check that the ids are same and the days are 1 day apart and then does the averaging
-        if rows_to_avg[0]['Day'] + 1 == rows_to_avg[1]['Day'] and rows_to_avg[0]['ID'] == rows_to_avg[1]['ID']:
-            temp_row = (rows_to_avg[0][3:18] + rows_to_avg[1][3:18]) / 2
-            temp_row['Date'] = rows_to_avg[1]['Date']
-            temp_row['Day'] = rows_to_avg[1]['Day']
-            temp_row['Type'] = rows_to_avg[1]['Type']
-            temp_row['ID'] = rows_to_avg[1]['ID']
-            if np.isnan(temp_row['SessionLengthTo2ndReversalDuration']) and not np.isnan(
-                    rows_to_avg[0]['SessionLengthTo2ndReversalDuration']):
-                temp_row['SessionLengthTo2ndReversalDuration'] = rows_to_avg[0]['SessionLengthTo2ndReversalDuration']
-            if np.isnan(temp_row['SessionLengthTo2ndReversalDuration']) and not np.isnan(
-                    rows_to_avg[1]['SessionLengthTo2ndReversalDuration']):
-                temp_row['SessionLengthTo2ndReversalDuration'] = rows_to_avg[1]['SessionLengthTo2ndReversalDuration']
-            if np.isnan(temp_row['NumberOfTrialTo2ndReversal']) and not np.isnan(
-                    rows_to_avg[0]['NumberOfTrialTo2ndReversal']):
-                temp_row['NumberOfTrialTo2ndReversal'] = rows_to_avg[0]['NumberOfTrialTo2ndReversal']
-            if np.isnan(temp_row['NumberOfTrialTo2ndReversal']) and not np.isnan(
-                    rows_to_avg[1]['NumberOfTrialTo2ndReversal']):
-                temp_row['NumberOfTrialTo2ndReversal'] = rows_to_avg[1]['NumberOfTrialTo2ndReversal']
-            if np.isnan(temp_row['PercentCorrectTo2ndReversal']) and not np.isnan(
-                    rows_to_avg[0]['PercentCorrectTo2ndReversal']):
-                temp_row['PercentCorrectTo2ndReversal'] = rows_to_avg[0]['PercentCorrectTo2ndReversal']
-            if np.isnan(temp_row['PercentCorrectTo2ndReversal']) and not np.isnan(
-                    rows_to_avg[1]['PercentCorrectTo2ndReversal']):
-                temp_row['PercentCorrectTo2ndReversal'] = rows_to_avg[1]['PercentCorrectTo2ndReversal']
-            new_df = new_df.append(temp_row, ignore_index=True)
-            row_index += 2
-        else:
-            row_index += 1
+    second_reversal_columns = ['SessionLengthTo2ndReversalDuration', 'NumberOfTrialTo2ndReversal',
+                               'PercentCorrectTo2ndReversal']
+
+    df_rows = df.reset_index(drop=True)
+    # a row can be averaged with the next row if the ids are same and the days are 1 day apart
+    can_pair = (df_rows['Day'] + 1 == df_rows['Day'].shift(-1)) & (df_rows['ID'] == df_rows['ID'].shift(-1))
+    # in a streak of rows that can be paired, the pairs start on every other row since the rows are taken two at a time
+    streak_start = can_pair & ~can_pair.shift(fill_value=False)
+    streak_start_position = pd.Series(np.where(streak_start, df_rows.index, np.nan)).ffill()
+    pair_start = can_pair & ((df_rows.index - streak_start_position) % 2 == 0)
+    pair_end = pair_start.shift(fill_value=False)
+
+    pair_index = pair_start.cumsum()
+    df_pairs = df_rows.loc[pair_start | pair_end]
+    pairs = df_pairs.groupby(pair_index[pair_start | pair_end])
+
+    # the average is empty if one day is empty, except for the 2nd reversal where the day that reached it is used
+    new_df = pairs[ld_probe_average_parameters].sum(min_count=2) / 2
+    new_df[second_reversal_columns] = pairs[second_reversal_columns].mean()
+    new_df.reset_index(drop=True, inplace=True)
+    last_rows = df_rows.loc[pair_end, ['Date', 'Day', 'Type', 'ID']].reset_index(drop=True)
+    new_df[['Date', 'Day', 'Type', 'ID']] = last_rows
 
     return new_df
 
@@ -235,21 +251,25 @@ def ld_probe_last_day_avg():
     df = data_setup('LD Probe')
     if df is not None:
         ld_probe_delete_other_difficulties(df)
-        df.sort_values(['ID', 'Day'], ascending=[1, 1], inplace=True)
-        df.reset_index(drop=True, inplace=True)
+        new_df = get_last_day_average(df)
+        save_file_message(new_df)
 
-        col_names = ['Date', 'ID', 'Type', 'Day', 'SessionLength', 'NumberOfTrial', 'PercentCorrect',
-                     'NumberOfReversal',
-                     'TotalITITouches', 'TotalBlankTouches', 'MeanRewardCollectionLatency', 'MeanCorrectTouchLatency',
-                     'MeanIncorrectTouchLatency', 'SessionLengthTo1stReversalDuration',
-                     'SessionLengthTo2ndReversalDuration',
-                     'NumberOfTrialTo1stReversal', 'NumberOfTrialTo2ndReversal', 'PercentCorrectTo1stReversal',
-                     'PercentCorrectTo2ndReversal']
 
-        new_df = averaging_process(df)
+def get_last_day_average(df):
+    """
+    This function gets the inter-difficulty averages of every LD Probe block for each animal.
 
-        new_df = new_df[col_names]
-        save_file_message(new_df)
+    :param df: A dataframe that represents the cleaned LD Probe data with only easy and hard rows.
+    :return: new_df: A dataframe that contains all the inter-difficulty averages.
+    """
+
+    df.sort_values(['ID', 'Day'], ascending=[1, 1], inplace=True)
+    df.reset_index(drop=True, inplace=True)
+
+    new_df = averaging_process(df)
+
+    new_df = new_df[ld_probe_average_columns]
+    return new_df
 
 
 def ld_probe_block_average(block_number):
@@ -269,30 +289,32 @@ def ld_probe_block_average(block_number):
         print('ld_probe_select_block() error: The block number criteria is empty or invalid!')
         return None
 
-    block_day_range_max = 4 * selected_block
-    block_day_range_min = block_day_range_max - 3
-    block_day_total_range = [*range(block_day_range_min, block_day_range_max + 1, 1)]
-
     df = data_setup('LD Probe')
     if df is not None:
         ld_probe_delete_other_difficulties(df)
-        df = df.loc[df['Day'].isin(block_day_total_range)]
+        new_df = get_block_average(df, selected_block)
+        save_file_message(new_df)
+
 
-        df.sort_values(['ID', 'Day'], ascending=[1, 1], inplace=True)
-        df.reset_index(drop=True, inplace=True)
+def get_block_average(df, selected_block):
+    """
+    This function gets the inter-difficulty averages of a selected LD Probe block for each animal.
 
-        col_names = ['Date', 'ID', 'Type', 'Day', 'SessionLength', 'NumberOfTrial', 'PercentCorrect',
-                     'NumberOfReversal',
-                     'TotalITITouches', 'TotalBlankTouches', 'MeanRewardCollectionLatency', 'MeanCorrectTouchLatency',
-                     'MeanIncorrectTouchLatency', 'SessionLengthTo1stReversalDuration',
-                     'SessionLengthTo2ndReversalDuration',
-                     'NumberOfTrialTo1stReversal', 'NumberOfTrialTo2ndReversal', 'PercentCorrectTo1stReversal',
-                     'PercentCorrectTo2ndReversal']
+    :param df: A dataframe that represents the cleaned LD Probe data with only easy and hard rows.
+    :param selected_block: An integer that represents the block number
+    :return: new_df: A dataframe that contains the inter-difficulty averages of the block.
+    """
 
-        new_df = averaging_process(df)
+    # the rows are copied since they are sorted in place below
+    df = df.loc[df['Day'].isin(get_block_days(selected_block))].copy()
 
-        new_df = new_df[col_names]
-        save_file_message(new_df)
+    df.sort_values(['ID', 'Day'], ascending=[1, 1], inplace=True)
+    df.reset_index(drop=True, inplace=True)
+
+    new_df = averaging_process(df)
+
+    new_df = new_df[ld_probe_average_columns]
+    return new_df
 
 
 def ld_probe_id_average(animal_id, difficulty_type):
@@ -308,37 +330,35 @@ def ld_probe_id_average(animal_id, difficulty_type):
     if df is not None:
         ld_probe_delete_other_difficulties(df)
         selected_id = int(animal_id.get())
-        df = df.loc[(df['ID'] == selected_id) & (df['Type'] == difficulty_type)]
+        new_df = get_id_average(df, selected_id, difficulty_type)
+        save_file_message(new_df)
 
-        df.sort_values(['ID', 'Day'], ascending=[1, 1], inplace=True)
-        df.reset_index(drop=True, inplace=True)
 
-        col_names = ['Date', 'ID', 'Type', 'Day', 'SessionLength', 'NumberOfTrial', 'PercentCorrect',
-                     'NumberOfReversal',
-                     'TotalITITouches', 'TotalBlankTouches', 'MeanRewardCollectionLatency', 'MeanCorrectTouchLatency',
-                     'MeanIncorrectTouchLatency', 'SessionLengthTo1stReversalDuration',
-                     'SessionLengthTo2ndReversalDuration',
-                     'NumberOfTrialTo1stReversal', 'NumberOfTrialTo2ndReversal', 'PercentCorrectTo1stReversal',
-                     'PercentCorrectTo2ndReversal']
+def get_id_average(df, selected_id, difficulty_type):
+    """
+    This function gets the average performance of a selected animal over all the LD Probe days of a difficulty.
 
-        avg_col = ['SessionLength', 'NumberOfTrial', 'PercentCorrect',
-                   'NumberOfReversal',
-                   'TotalITITouches', 'TotalBlankTouches', 'MeanRewardCollectionLatency', 'MeanCorrectTouchLatency',
-                   'MeanIncorrectTouchLatency', 'SessionLengthTo1stReversalDuration',
-                   'SessionLengthTo2ndReversalDuration',
-                   'NumberOfTrialTo1stReversal', 'NumberOfTrialTo2ndReversal', 'PercentCorrectTo1stReversal',
-                   'PercentCorrectTo2ndReversal']
+    :param df: A dataframe that represents the cleaned LD Probe data with only easy and hard rows.
+    :param selected_id: An integer that represents the selected animal id
+    :param difficulty_type: A string that determines which determines which difficulty to average.
+    :return: new_df: A dataframe with one row that has the averages of the animal
+    """
 
-        new_df = df.copy(deep=True)
-        new_df = new_df[col_names]
+    # the rows are copied since they are sorted in place below
+    df = df.loc[(df['ID'] == selected_id) & (df['Type'] == difficulty_type)].copy()
 
-        for col in avg_col:
-            new_df['Avg' + col] = df[col].mean(axis=0)
-            new_df.drop(col, axis=1, inplace=True)
+    df.sort_values(['ID', 'Day'], ascending=[1, 1], inplace=True)
+    df.reset_index(drop=True, inplace=True)
 
-        new_df.drop_duplicates(subset='ID', keep='last', inplace=True)
+    new_df = df.copy(deep=True)
+    new_df = new_df[ld_probe_average_columns]
 
-        save_file_message(new_df)
+    for col in ld_probe_average_parameters:
+        new_df['Avg' + col] = df[col].mean(axis=0)
+        new_df.drop(col, axis=1, inplace=True)
+
+    new_df.drop_duplicates(subset='ID', keep='last', inplace=True)
+    return new_df
 
 
 def ld_probe_type_average(difficulty_type):
@@ -353,37 +373,34 @@ def ld_probe_type_average(difficulty_type):
     df = data_setup('LD Probe')
     if df is not None:
         ld_probe_delete_other_difficulties(df)
-        df = df.loc[(df['Type'] == difficulty_type)]
-
-        df.sort_values(['ID', 'Day'], ascending=[1, 1], inplace=True)
-        df.reset_index(drop=True, inplace=True)
-
-        col_names = ['ID', 'SessionLength', 'NumberOfTrial', 'PercentCorrect',
-                     'NumberOfReversal',
-                     'TotalITITouches', 'TotalBlankTouches', 'MeanRewardCollectionLatency', 'MeanCorrectTouchLatency',
-                     'MeanIncorrectTouchLatency', 'SessionLengthTo1stReversalDuration',
-                     'SessionLengthTo2ndReversalDuration',
-                     'NumberOfTrialTo1stReversal', 'NumberOfTrialTo2ndReversal', 'PercentCorrectTo1stReversal',
-                     'PercentCorrectTo2ndReversal']
-
-        avg_col = ['SessionLength', 'NumberOfTrial', 'PercentCorrect',
-                   'NumberOfReversal',
-                   'TotalITITouches', 'TotalBlankTouches', 'MeanRewardCollectionLatency', 'MeanCorrectTouchLatency',
-                   'MeanIncorrectTouchLatency', 'SessionLengthTo1stReversalDuration',
-                   'SessionLengthTo2ndReversalDuration',
-                   'NumberOfTrialTo1stReversal', 'NumberOfTrialTo2ndReversal', 'PercentCorrectTo1stReversal',
-                   'PercentCorrectTo2ndReversal']
-
-        new_df = pd.DataFrame(columns=col_names)
-        df.reset_index(drop=True, inplace=True)
-        for col in avg_col:
-            new_df[col] = df.groupby('ID')[col].mean()
-
-        new_df['ID'] = df['ID'].unique()
-
+        new_df = get_type_average(df, difficulty_type)
         save_file_message(new_df)
 
 
+def get_type_average(df, difficulty_type):
+    """
+    This function gets the average performance of every animal over all the LD Probe days of a difficulty.
+
+    :param df: A dataframe that represents the cleaned LD Probe data with only easy and hard rows.
+    :param difficulty_type: A string that determines which determines which difficulty to average.
+    :return: new_df: A dataframe with one row per animal that has the averages of the animal
+    """
+
+    # the rows are copied since they are sorted in place below
+    df = df.loc[(df['Type'] == difficulty_type)].copy()
+
+    df.sort_values(['ID', 'Day'], ascending=[1, 1], inplace=True)
+    df.reset_index(drop=True, inplace=True)
+
+    new_df = pd.DataFrame(columns=['ID'] + ld_probe_average_parameters)
+    df.reset_index(drop=True, inplace=True)
+    for col in ld_probe_average_parameters:
+        new_df[col] = df.groupby('ID')[col].mean()
+
+    new_df['ID'] = df['ID'].unique()
+    return new_df
+
+
 def make_ld_probe_buttons(tk, root):
     """
     This function creates all the location discrimination probe buttons found on the LD Probe sub-menu.
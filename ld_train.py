@@ -20,49 +20,8 @@ def get_ld_last_days(df, criteria, max_days, min_reversal_number):
     df_copy = df.copy(deep=True)
     df_copy = df_copy.loc[df_copy['NumberOfReversal'] >= min_reversal_number]
 
-    df_copy.sort_values(['ID', 'Day'], inplace=True)
-    df_copy.reset_index(drop=True, inplace=True)
-
-    row_index = 0
-    while row_index < df_copy.shape[0] - (criteria - 1):
-        rows_to_sum = list()
-        # compare rows with the same ID
-        for sum_numbers in range(criteria):
-            row_to_add = df_copy.loc[row_index + sum_numbers]
-            while row_to_add['ID'] != df_copy.at[row_index, 'ID'] and row_index < df_copy.shape[0] - 1:
-                row_index += 1
-            rows_to_sum.append(row_to_add)
-
-        last_row_info = rows_to_sum[-1]
-        if len(rows_to_sum) < criteria:
-            continue
-        if last_row_info['ID'] != rows_to_sum[0]['ID']:
-            continue
-
-        day_counter = list()
-        for row in rows_to_sum:
-            day_counter.append(row['Day'])
-        # if the days are consecutive, it passes the criteria
-        if day_counter == sorted(range(day_counter[0], day_counter[-1] + 1)):
-            df_copy.at[last_row_info.name, 'Criteria Passed?'] = 'yes'
-
-        difference_list = np.diff(day_counter)
-        max_days_apart_ctn = difference_list.tolist().count(2)
-        one_day_apart_ctn = difference_list.tolist().count(1)
-        total_days = sum(difference_list)
-
-        # due to the n/n+1 criteria, there can only be (1) count of a difference of two days and the rest have to be 1s
-        if total_days == criteria and max_days_apart_ctn == 1 and one_day_apart_ctn == max_days - 3:
-            df_copy.at[last_row_info.name, 'Criteria Passed?'] = 'yes'
-
-        row_index += 1
-
-    # only take the first occurrence of the rows that passed the criteria
-    df_copy = df_copy.loc[df_copy['Criteria Passed?'] == 'yes']
-    df_copy['Mice ID'] = df_copy['ID']
-    df_copy = df_copy.groupby('Mice ID').first()
-
-    return df_copy
+    # due to the n/n+1 criteria, there can only be (1) count of a difference of two days and the rest have to be 1s
+    return get_first_criteria_days(df_copy, criteria, skipped_day_allowed=max_days == criteria + 1)
 
 
 def get_ld_train_normal(df, criteria, max_days, min_reversal_number):
@@ -79,8 +38,7 @@ def get_ld_train_normal(df, criteria, max_days, min_reversal_number):
 
     df_copy = get_ld_last_days(df, criteria, max_days, min_reversal_number)
     # drop rows that have larger day values and same ids (those are probably extra days to retain mouse memory)
-    for index in df_copy.iterrows():
-        df.drop(df.loc[(df['ID'] == index[1]['ID']) & (df['Day'] > index[1]['Day'])].index, inplace=True)
+    drop_days_after_criteria(df, df_copy)
 
 
 def get_ld_train_criteria_day_all(df, criteria, max_days, min_reversal_number):
@@ -98,6 +56,33 @@ def get_ld_train_criteria_day_all(df, criteria, max_days, min_reversal_number):
     df.drop_duplicates(subset='ID', keep='last', inplace=True)
 
 
+def get_ld_train_criteria_sweep(df, criteria_list, min_reversal_numbers):
+    """
+    This function finds the day that every animal met the LD Train criteria for every combination of the n/n+1 days
+    criteria and the minimum required reversal numbers. All the combinations are checked in one pass over the cleaned
+    data instead of cleaning the data again for each one.
+
+    :param df: A dataframe that represents cleaned LD Train data
+    :param criteria_list: A list of (n days, n+1 days) pairs of the criteria to try
+    :param min_reversal_numbers: A list of the minimum required reversal numbers to try
+    :return: df_sweep: A dataframe with one row per combination per animal with the 'Criteria', 'MaxDays',
+    'MinReversalNumber', 'ID' and 'CriteriaDay' columns. If an animal did not reach the criteria, its 'CriteriaDay' is
+    empty.
+    """
+
+    parameter_grid = [(criteria, max_days, min_rev) for criteria, max_days in criteria_list
+                      for min_rev in min_reversal_numbers]
+    min_revs = np.array([min_rev for criteria, max_days, min_rev in parameter_grid])
+    session_passed = df['NumberOfReversal'].to_numpy(dtype=float)[:, None] >= min_revs
+    criteria_values = [criteria for criteria, max_days, min_rev in parameter_grid]
+    # due to the n/n+1 criteria, the sessions can be spread over n+1 days
+    skipped_days_allowed = [max_days == criteria + 1 for criteria, max_days, min_rev in parameter_grid]
+
+    animal_ids, criteria_days = get_criteria_sweep_days(df, session_passed, criteria_values, skipped_days_allowed)
+    return get_criteria_sweep_table(parameter_grid, ['Criteria', 'MaxDays', 'MinReversalNumber'], animal_ids,
+                                    criteria_days)
+
+
 def ld_train_delete_other_difficulties(df):
     """
     This function will delete the other difficulties that aren't used in LD Train. The test type of LD train is
@@ -165,6 +150,43 @@ def ld_criteria_list_check(criteria_list):
         return None
 
 
+def ld_train_sweep_widget_check(criteria, min_reversal_number):
+    """
+    This function checks that the criteria widgets of a criteria sweep are not empty and have valid inputs. Each widget
+    can have many values separated by commas, like '3/4, 4/5' for the criteria and '3, 4' for the minimum reversal
+    number.
+
+    :param criteria: A widget that contains a string that represents the n days/n+1 days criteria to try
+    :param min_reversal_number: An entry widget that contains the minimum required reversal numbers to try
+    :returns: (criteria_list, min_revs): The list of (n days, n+1 days) pairs and the list of minimum reversal numbers
+    """
+
+    try:
+        criteria_list = [tuple(int(value) for value in criteria_value.split('/'))
+                         for criteria_value in get_sweep_values(criteria.get())]
+        if len(criteria_list) == 0 or any(len(criteria_pair) != 2 for criteria_pair in criteria_list):
+            raise ValueError
+    except ValueError:
+        mb.showerror('LD Train Criteria Error',
+                     'ld_train_sweep_widget_check() error: The n/n+1 days criteria is empty or invalid!')
+        print('ld_train_sweep_widget_check() error: The n/n+1 days criteria is empty or invalid!')
+        return None
+
+    try:
+        min_revs = [int(value) for value in get_sweep_values(min_reversal_number.get())]
+        if len(min_revs) == 0:
+            raise ValueError
+    except ValueError:
+        mb.showerror('LD Train Criteria Error',
+                     'ld_train_sweep_widget_check() error: Minimum required reversal number might be empty'
+                     ' or is not numeric!')
+        print('ld_train_sweep_widget_check() error: Minimum required reversal number might be empty'
+              ' or is not numeric!')
+        return None
+
+    return criteria_list, min_revs
+
+
 def button_ld_train_all(criteria, min_reversal_number):
     """
     This function creates a csv file for the LD Train test. Each animal will have rows that start from their
@@ -387,6 +409,38 @@ def button_ld_train_select_id(enter_id, criteria, min_reversal_number):
         return None
 
 
+def button_ld_train_sweep(criteria, min_reversal_number):
+    """
+    This function creates a csv file for the LD Train test that has the day that every animal met the criteria for
+    every combination of the criteria values in the widgets. The raw data is only read and cleaned once for all of
+    them. At the end, the function will ask the user to save the newly created csv file in a directory.
+
+    :param criteria: A widget that contains a string that represents the n days/n+1 days criteria to try, separated by
+    commas
+    :param min_reversal_number: An entry widget that contains the minimum required reversal numbers to try, separated by
+    commas
+    """
+
+    if ld_train_sweep_widget_check(criteria, min_reversal_number) is not None:
+        criteria_list, min_revs = ld_train_sweep_widget_check(criteria, min_reversal_number)
+    else:
+        mb.showerror('LD Train Criteria Error',
+                     'button_ld_train_sweep() error: One of the two criteria is empty or invalid!')
+        print('button_ld_train_sweep() error: One of the two criteria is empty or invalid!')
+        return None
+
+    df = data_setup('LD Train')
+    if df is not None:
+        ld_train_delete_other_difficulties(df)
+        df_sweep = get_ld_train_criteria_sweep(df, criteria_list, min_revs)
+        save_file_message(df_sweep)
+    else:
+        mb.showerror('LD Train Criteria Error',
+                     'button_ld_train_sweep() error:  One of the criterias is invalid or you hit the cancel button!')
+        print('button_ld_train_sweep() error:  One of the criterias is invalid or you hit the cancel button!')
+        return None
+
+
 def make_ld_train_buttons(tk, root):
     """
     This function creates all the location discrimination train buttons found on the LD Train sub-menu.
@@ -413,6 +467,11 @@ def make_ld_train_buttons(tk, root):
                                     width=30)
     ld_train_button_all.grid(row=2, column=0)
 
+    ld_train_button_sweep = tk.Button(root, text='LD Train (Criteria Sweep)',
+                                      command=lambda: button_ld_train_sweep(criteria_text, min_reversal_num_text),
+                                      width=30)
+    ld_train_button_sweep.grid(row=2, column=1)
+
     enter_day = tk.Entry(root, width=30, justify='center')
     enter_day.grid(row=3, column=1)
 
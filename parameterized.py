@@ -1,4 +1,7 @@
-import functools
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import xlsxwriter
 
 from general_touchscreen import *
 from ld_train import *
@@ -35,6 +38,211 @@ ext_parameters = ['Responses', 'Omissions', 'TotalITITouches', 'MeanResponseTouc
 
 script_location = os.path.dirname(os.path.abspath(__file__))
 
+# write the workbooks row by row with the constant memory mode of xlsxwriter instead of through pandas
+constant_memory_export = True
+
+# the number of workbooks that are written at the same time, one per process (None uses the number of CPUs)
+max_workbook_workers = None
+
+# the data setup name, file name and parameters of the General Touchscreen workbooks
+general_ts_workbooks = [('Hab1', 'Habituation 1', hab_one_parameters), ('Hab2', 'Habituation 2', hab_two_parameters),
+                        ('IT', 'Initial Touch', it_parameters), ('MT', 'Must Touch', mt_parameters),
+                        ('MI', 'Must Initiate', mt_parameters)]
+
+
+def get_merged_column_names(sheet_columns, total_groups):
+    """
+    This function gets the column names of a parameter sheet. The sheets used to be made by merging the columns of
+    every day or block one after the other, which added the _x and _y suffixes to the column names that were in both
+    sides of a merge. The same names are kept so the workbooks have the same headers as before.
+
+    :param sheet_columns: A list of the column names of each day or block, without the 'ID' column
+    :param total_groups: An integer that represents how many days or blocks are on the sheet
+    :return: merged_names: A list of the column names of the sheet, starting with the 'ID' column
+    """
+
+    merged_names = ['ID'] + list(sheet_columns)
+    for group_number in range(1, int(total_groups)):
+        overlap = set(merged_names) & set(sheet_columns)
+        merged_names = [name + '_x' if name in overlap else name for name in merged_names] + \
+                       [name + '_y' if name in overlap else name for name in sheet_columns]
+
+    return merged_names
+
+
+def get_parameter_sheets(df, group_column, total_groups, columns_before, columns_after, parameters_list):
+    """
+    This function makes the sheets of a parameterized Excel Workbook. Each sheet has one row per animal and the
+    columns of every day or block next to each other. The cleaned data is reshaped once with all the parameters, so
+    every sheet is a selection of the same wide dataframe instead of a merge of every day or block.
+
+    :param df: A dataframe that represents the cleaned test data, with only the rows that go on the sheets.
+    :param group_column: A string that represents the column used for the day or block of the rows
+    :param total_groups: An integer that represents the maximum value of days or blocks within the dataframe
+    :param columns_before: A list of the column names that go before the parameter for each day or block
+    :param columns_after: A list of the column names that go after the parameter for each day or block
+    :param parameters_list: The list of parameters used to create each sheet of the Excel Workbook.
+    :return: A generator of the (parameter, sheet dataframe) pairs, so only one sheet is made at a time
+    """
+
+    groups = list(range(1, int(total_groups) + 1))
+    df_groups = df.loc[df[group_column].isin(groups)]
+    value_columns = list(dict.fromkeys(columns_before + columns_after + list(parameters_list)))
+
+    # an animal with more than one row on the same day or block gets a row for each of them
+    occurrence = df_groups.groupby(['ID', group_column]).cumcount()
+    df_values = df_groups[value_columns]
+    df_values.index = pd.MultiIndex.from_arrays([df_groups['ID'], occurrence, df_groups[group_column]],
+                                                names=['ID', 'Occurrence', 'Group'])
+    df_wide = df_values.unstack('Group')
+
+    # the animals are in the order they first show up in the days or blocks, like the merges used to do
+    first_rows = df_groups.assign(Occurrence=occurrence.to_numpy()).sort_values(group_column, kind='stable')
+    animal_order = pd.MultiIndex.from_frame(first_rows[['ID', 'Occurrence']]).unique()
+    df_wide = df_wide.reindex(animal_order)
+
+    for para in parameters_list:
+        sheet_columns = columns_before + [para] + columns_after
+        df_sheet = df_wide.reindex(columns=[(column, group) for group in groups for column in sheet_columns])
+        df_sheet.columns = get_merged_column_names(sheet_columns, len(groups))[1:]
+        df_sheet.insert(0, 'ID', animal_order.get_level_values('ID'))
+        df_sheet.reset_index(drop=True, inplace=True)
+        yield para, df_sheet
+
+
+def check_workbook_closed(file_name):
+    """
+    This function checks that an Excel Workbook can be written, which is not the case when it is open in Excel.
+
+    :param file_name: A string that represents the name of the Excel Workbook
+    :except PermissionError: This will occur when the Excel Workbook is open in another program
+    """
+
+    with open(file_name, 'wb'):
+        pass
+
+
+def make_parameter_workbook(file_name, constant_memory=None, output_directory=script_location):
+    """
+    This function creates the writer of a parameterized Excel Workbook. In constant memory mode, the writer is an
+    xlsxwriter workbook that moves each row out of memory once the next row is started instead of keeping every cell of
+    every sheet until the workbook is saved. Otherwise, it is a pandas ExcelWriter.
+
+    :param file_name: A string that represents the name of the Excel Workbook
+    :param constant_memory: A boolean that represents whether to use the constant memory mode. If None,
+    constant_memory_export is used.
+    :param output_directory: The directory to save the Excel Workbook to
+    :return: The writer of the Excel Workbook
+    :except PermissionError: This will occur when the Excel Workbook is open in another program
+    """
+
+    file_name = os.path.join(output_directory, file_name)
+    if constant_memory is None:
+        constant_memory = constant_memory_export
+    if constant_memory:
+        # xlsxwriter only opens the file when the workbook is closed, so check that it can be written first
+        check_workbook_closed(file_name)
+        return xlsxwriter.Workbook(file_name, {'constant_memory': True})
+    return pd.ExcelWriter(file_name, engine='xlsxwriter')
+
+
+def write_parameter_sheet(writer, df_sheet, sheet_name):
+    """
+    This function writes a parameter sheet to the Excel Workbook. In constant memory mode, the rows have to be written
+    in order, so the sheet is written row by row with the same header style, empty cells and frozen panes that
+    to_excel() uses.
+
+    :param writer: The writer of the Excel Workbook from make_parameter_workbook()
+    :param df_sheet: A dataframe that represents the parameter sheet
+    :param sheet_name: A string that represents the name of the sheet
+    """
+
+    if isinstance(writer, pd.ExcelWriter):
+        df_sheet.to_excel(writer, sheet_name=sheet_name, index=False, freeze_panes=(1, 1))
+        return
+
+    worksheet = writer.add_worksheet(sheet_name)
+    header_format = writer.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    datetime_format = writer.add_format({'num_format': 'YYYY-MM-DD HH:MM:SS'})
+    date_format = writer.add_format({'num_format': 'YYYY-MM-DD'})
+    worksheet.write_row(0, 0, [str(column) for column in df_sheet.columns], header_format)
+    worksheet.freeze_panes(1, 1)
+    for row_number, row in enumerate(df_sheet.itertuples(index=False), start=1):
+        for column_number, value in enumerate(row):
+            if pd.isna(value):
+                continue
+            if isinstance(value, datetime.datetime):
+                worksheet.write_datetime(row_number, column_number, value, datetime_format)
+            elif isinstance(value, datetime.date):
+                worksheet.write_datetime(row_number, column_number, value, date_format)
+            elif isinstance(value, float) and np.isinf(value):
+                worksheet.write(row_number, column_number, 'inf' if value > 0 else '-inf')
+            elif isinstance(value, (bool, int, float, str)):
+                worksheet.write(row_number, column_number, value)
+            else:
+                worksheet.write(row_number, column_number, str(value))
+
+
+def save_parameter_workbook(writer):
+    """
+    This function saves the Excel Workbook from make_parameter_workbook().
+
+    :param writer: The writer of the Excel Workbook
+    """
+
+    if isinstance(writer, pd.ExcelWriter):
+        writer.save()
+    else:
+        writer.close()
+
+
+def write_parameter_workbook(file_name, parsing_function, arguments, constant_memory=None,
+                             output_directory=script_location):
+    """
+    This function writes one parameterized Excel Workbook. It is the job that each process runs in
+    write_parameter_workbooks().
+
+    :param file_name: A string that represents the name of the Excel Workbook
+    :param parsing_function: The function that writes the sheets, like general_by_day_parsing()
+    :param arguments: A dictionary with the arguments of the parsing function, other than the writer
+    :param constant_memory: A boolean that represents whether to use the constant memory mode. If None,
+    constant_memory_export is used.
+    :param output_directory: The directory to save the Excel Workbook to
+    """
+
+    writer = make_parameter_workbook(file_name, constant_memory, output_directory)
+    parsing_function(writer=writer, **arguments)
+
+
+def write_parameter_workbooks(workbook_jobs, max_workers=None, output_directory=script_location):
+    """
+    This function writes many parameterized Excel Workbooks at the same time, one workbook per process, since writing
+    the cells of a workbook keeps one CPU busy. Each process is only sent the rows and columns of the cleaned data that
+    go on its workbook. A single workbook is written in this process.
+
+    :param workbook_jobs: A list of (file name, parsing function, arguments) for every workbook, see
+    write_parameter_workbook()
+    :param max_workers: The number of workbooks that are written at the same time. If None, max_workbook_workers is
+    used, and if that is None as well, the number of CPUs.
+    :param output_directory: The directory to save the Excel Workbooks to
+    """
+
+    if max_workers is None:
+        max_workers = max_workbook_workers or os.cpu_count() or 1
+    max_workers = min(max_workers, len(workbook_jobs))
+
+    if max_workers <= 1:
+        for file_name, parsing_function, arguments in workbook_jobs:
+            write_parameter_workbook(file_name, parsing_function, arguments, output_directory=output_directory)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(write_parameter_workbook, file_name, parsing_function, arguments,
+                                   constant_memory_export, output_directory)
+                   for file_name, parsing_function, arguments in workbook_jobs]
+        for future in futures:
+            future.result()
+
 
 def block_parsing_ld_probe(df, test_type, total_blocks, parameters_list, writer):
     """
@@ -48,31 +256,26 @@ def block_parsing_ld_probe(df, test_type, total_blocks, parameters_list, writer)
     :param writer: Used to write and save the dataframe to the sheet on the Excel Workbook.
     """
 
-    for para in parameters_list:
-        all_blocks = list()
-        for block_number in range(1, int(total_blocks) + 1):
-            block_data = df.loc[(df['Block'] == block_number) & (df['Type'] == test_type)]
-            block_data = block_data[['ID', 'Date', para, 'Type', 'Block']]
-            all_blocks.append(block_data)
-        merged_df = functools.reduce(lambda left, right: pd.merge(left, right, on='ID', how='outer'), all_blocks)
-        merged_df.to_excel(writer, sheet_name=test_type + ' ' + para[0:25], index=False, freeze_panes=(1, 1))
-    writer.save()
+    for para, df_sheet in get_parameter_sheets(df.loc[df['Type'] == test_type], 'Block', total_blocks, ['Date'],
+                                               ['Type', 'Block'], parameters_list):
+        write_parameter_sheet(writer, df_sheet, test_type + ' ' + para[0:25])
+    save_parameter_workbook(writer)
 
 
-def ld_probe_parameterized(df):
+def ld_probe_parameterized(df, output_directory=script_location):
     """
     This function is used for the LD Probe test. The function creates an Excel Workbook with each sheet being a testable
     parameter from the LD Probe test. On each sheet, there will be the performance of each animal for all the blocks
-    based on difficulty (easy or hard). The Excel Workbook will be saved in the same location as the application.
+    based on difficulty (easy or hard). The Excel Workbook will be saved in the same location as the application, unless
+    another output directory is given.
 
     :param df: A dataframe that represents cleaned LD Probe data.
+    :param output_directory: The directory to save the Excel Workbooks to
     """
 
     try:
-        writer_easy = pd.ExcelWriter('All Blocks Parameters Easy.xlsx', engine='xlsxwriter')
-        print('A file called All Blocks Parameters Easy.xlsx has been created at:', script_location)
-        writer_hard = pd.ExcelWriter('All Blocks Parameters Hard.xlsx', engine='xlsxwriter')
-        print('A file called All Blocks Parameters Hard.xlsx has been created at:', script_location)
+        check_workbook_closed(os.path.join(output_directory, 'All Blocks Parameters Easy.xlsx'))
+        check_workbook_closed(os.path.join(output_directory, 'All Blocks Parameters Hard.xlsx'))
     except PermissionError:
         mb.showerror('Parameterized Error',
                      'ld_probe_parameterized() error: All Blocks Parameters Easy/Hard.xlsx might be open! '
@@ -82,9 +285,15 @@ def ld_probe_parameterized(df):
         return None
 
     max_blocks = df['Block'].max()
+    sheet_columns = ['ID', 'Date', 'Type', 'Block'] + ld_parameters
 
-    block_parsing_ld_probe(df, 'easy', max_blocks, ld_parameters, writer_easy)
-    block_parsing_ld_probe(df, 'hard', max_blocks, ld_parameters, writer_hard)
+    # the easy and hard workbooks are written at the same time
+    write_parameter_workbooks([('All Blocks Parameters ' + test_type.capitalize() + '.xlsx', block_parsing_ld_probe,
+                                {'df': df.loc[df['Type'] == test_type, sheet_columns], 'test_type': test_type,
+                                 'total_blocks': max_blocks, 'parameters_list': ld_parameters})
+                               for test_type in ['easy', 'hard']], output_directory=output_directory)
+    print('A file called All Blocks Parameters Easy.xlsx has been created at:', output_directory)
+    print('A file called All Blocks Parameters Hard.xlsx has been created at:', output_directory)
 
 
 def day_parsing_ld_train(df, test_type, max_days, parameters_list, writer):
@@ -99,29 +308,27 @@ def day_parsing_ld_train(df, test_type, max_days, parameters_list, writer):
     :param writer: Used to write and save the dataframe to the sheet on the Excel Workbook.
     """
 
-    for para in parameters_list:
-        all_days = list()
-        for day in range(1, int(max_days) + 1):
-            day_data = df.loc[(df['Day'] == day) & (df['Type'] == test_type)]
-            day_data = day_data[['ID', 'Date', 'Day', para, 'Type']]
-            all_days.append(day_data)
-        merged_df = functools.reduce(lambda left, right: pd.merge(left, right, on='ID', how='outer'), all_days)
-        merged_df.to_excel(writer, sheet_name='int ' + para[0:25], index=False, freeze_panes=(1, 1))
-    writer.save()
+    for para, df_sheet in get_parameter_sheets(df.loc[df['Type'] == test_type], 'Day', max_days, ['Date', 'Day'],
+                                               ['Type'], parameters_list):
+        write_parameter_sheet(writer, df_sheet, 'int ' + para[0:25])
+    save_parameter_workbook(writer)
 
 
-def ld_train_parameterized(df):
+def ld_train_parameterized(df, output_directory=script_location):
     """
     This function is used for the LD Train test. The function creates an Excel Workbook with each sheet being a testable
     parameter from the LD Train test. On each sheet, there will be the performance of each animal for all the days
-    the animal performed the test. The Excel Workbook will be saved in the same location as the application.
+    the animal performed the test. The Excel Workbook will be saved in the same location as the application, unless
+    another output directory is given.
 
     :param df: A dataframe that represents the cleaned LD Train data.
+    :param output_directory: The directory to save the Excel Workbook to
 
     """
     try:
-        writer_intermediate = pd.ExcelWriter('LD Train All Days Parameters.xlsx', engine='xlsxwriter')
-        print('A file called LD Train All Days Parameters.xlsx has been created at:', script_location)
+        writer_intermediate = make_parameter_workbook('LD Train All Days Parameters.xlsx',
+                                                      output_directory=output_directory)
+        print('A file called LD Train All Days Parameters.xlsx has been created at:', output_directory)
     except PermissionError:
         mb.showerror('Parameterized Error', 'LD Train All Days Parameters.xlsx is opened! Please close them!')
         print(
@@ -145,31 +352,27 @@ def general_by_day_parsing(df, max_days, parameters_list, writer, test_name):
     :return:
     """
 
-    for para in parameters_list:
-        all_days = list()
-        for day in range(1, int(max_days) + 1):
-            day_data = df.loc[(df['Day'] == day)]
-            day_data = day_data[['ID', 'Date', 'Day', para]]
-            all_days.append(day_data)
-        merged_df = functools.reduce(lambda left, right: pd.merge(left, right, on='ID', how='outer'), all_days)
-        merged_df.to_excel(writer, sheet_name=test_name + para[0:25], index=False, freeze_panes=(1, 1))
-    writer.save()
+    for para, df_sheet in get_parameter_sheets(df, 'Day', max_days, ['Date', 'Day'], [], parameters_list):
+        write_parameter_sheet(writer, df_sheet, test_name + para[0:25])
+    save_parameter_workbook(writer)
 
 
-def general_parameterized(df, name, parameter_list, test_name):
+def general_parameterized(df, name, parameter_list, test_name, output_directory=script_location):
     """
     This function is used for the multiple test. The function creates an Excel Workbook with each sheet being a testable
     parameter from multiple test. On each sheet, there will be the performance of each animal for all the days
-    the animal performed the test. The Excel Workbook will be saved in the same location as the application.
+    the animal performed the test. The Excel Workbook will be saved in the same location as the application, unless
+    another output directory is given.
 
     :param df: A dataframe that represents the cleaned test data.
     :param name: A string that represents the name of the test the animal ran used for naming the file.
     :param parameter_list: The list of parameters used to create each sheet of the Excel Workbook.
     :param test_name: A string that represents the test name used for data setup.
+    :param output_directory: The directory to save the Excel Workbook to
     :return:
     """
     try:
-        some_writer = pd.ExcelWriter(name + ' All Days Parameters.xlsx', engine='xlsxwriter')
+        some_writer = make_parameter_workbook(name + ' All Days Parameters.xlsx', output_directory=output_directory)
     except PermissionError:
         mb.showerror('Parameterized Error', name + ' All Days Parameters.xlsx is opened! Please close them!')
         print(name, 'All Days Parameters.xlsx', 'is opened! Please close them!')
@@ -193,6 +396,41 @@ def general_para_button(data_setup_name, file_name, parameter_list):
         print('A file called', file_name, 'All Days Parameters.xlsx has been created at:', script_location)
 
 
+def general_para_all_button():
+    """
+    This function creates the parameterized Excel Workbooks for all the General Touchscreen tests from one directory.
+    The raw data of each test is cleaned one after another and then the workbooks are written at the same time, one
+    per process.
+    """
+
+    print('Please open the directory that has all the raw data csv files')
+    file_path = filedialog.askdirectory(title='Open the directory with csv files')
+    if len(file_path) == 0:
+        mb.showerror('Parameterized Error', 'general_para_all_button() error: The cancel button was clicked! Please '
+                                            'try again!')
+        print('general_para_all_button() error: The cancel button was clicked! Please try again!')
+        return
+
+    workbook_jobs = list()
+    for data_setup_name, file_name, parameter_list in general_ts_workbooks:
+        df = data_setup(data_setup_name, file_path=file_path)
+        if df is None:
+            continue
+        try:
+            check_workbook_closed(os.path.join(script_location, file_name + ' All Days Parameters.xlsx'))
+        except PermissionError:
+            mb.showerror('Parameterized Error', file_name + ' All Days Parameters.xlsx is opened! Please close them!')
+            print(file_name, 'All Days Parameters.xlsx', 'is opened! Please close them!')
+            continue
+        workbook_jobs.append((file_name + ' All Days Parameters.xlsx', general_by_day_parsing,
+                              {'df': df[['ID', 'Date', 'Day'] + parameter_list], 'max_days': df['Day'].max(),
+                               'parameters_list': parameter_list, 'test_name': data_setup_name}))
+
+    write_parameter_workbooks(workbook_jobs)
+    for file_name, parsing_function, arguments in workbook_jobs:
+        print('A file called', file_name, 'has been created at:', script_location)
+
+
 def pi_para_button(min_trials, percent_one, percent_two):
     """
     This function creates the parameterized Excel Workbook for the Punish Incorrect test.
@@ -360,6 +598,9 @@ def make_parameterized_button(tk, root):
                                  command=lambda: general_para_button('Hab1', 'Habituation 1', hab_one_parameters),
                                  width=30)
     hab_one_para_btn.grid(row=0, column=0)
+    general_para_all_btn = tk.Button(root, text='All General Touchscreen Parameterized',
+                                     command=general_para_all_button, width=30)
+    general_para_all_btn.grid(row=0, column=1)
     hab_two_para_btn = tk.Button(root, text='Habituation 2 Parameterized',
                                  command=lambda: general_para_button('Hab2', 'Habituation 2', hab_two_parameters),
                                  width=30)
@@ -1,13 +1,167 @@
-import tkinter.filedialog as filedialog
+import csv
 import os
+from concurrent.futures import ThreadPoolExecutor
 from setuptools import glob
 import warnings
 from setup_functions import *
-import tkinter.messagebox as mb
+from dataset_cache import *
+from task_runner import mb, filedialog, report_progress, check_cancelled
 
 warnings.simplefilter(action='ignore', category=FutureWarning)
 pd.options.mode.chained_assignment = 'raise'
 
+# the schedule name in the raw data for each test type
+schedule_names = {'Hab1': 'Mouse LD Habituation 1', 'Hab2': 'Mouse LD Habituation 2',
+                  'IT': 'Mouse LD Initial Touch Training v2', 'MT': 'Mouse LD Must Touch Training v2',
+                  'MI': 'Mouse LD Must Initiate Training v2', 'PI': 'Mouse LD Punish Incorrect Training v2',
+                  'LD Train': 'Mouse LD 1 choice reversal v3', 'LD Probe': 'Mouse LD 1 choice reversal v3',
+                  'Acq': 'Mouse Extinction pt 1 v2', 'Ext': 'Mouse Extinction pt 2 v2'}
+
+# the number of rows of a raw data file that are parsed at a time when only the rows of one schedule are kept, so the
+# rows of the other schedules in the file are dropped before the next chunk is parsed
+raw_data_chunk_size = 1000
+
+# the headers (or the start of the headers) that the setup function of each test type reads from the raw data, so only
+# those columns have to be parsed. The first columns of the raw data are always kept, see required_index_range().
+ld_header_prefixes = ['End Summary - Condition (1)', 'Trial Analysis - No. Correct (',
+                      'Trial Analysis - Correct Position (', 'End Summary - Session Time (1)',
+                      'End Summary - Trials Completed (1)', 'End Summary - Percentage Correct (1)',
+                      'End Summary - Times Criteria reached (1)', 'End Summary - Left ITI touches (1)',
+                      'End Summary - Right ITI touches (1)', 'End Summary - Left Blank Touches - Generic Counter (1)',
+                      'End Summary - Right Blank Touches - Generic Counter (1)',
+                      'End Summary - Top row touches - Generic Counter (1)',
+                      'Trial Analysis - Reward Collection Latency (',
+                      'Trial Analysis - Correct Image Response Latency (', 'Trial Analysis - Incorrect Image Latency (',
+                      'No trials to criterion - Condition (1)', 'No trials to criterion - Condition (2)',
+                      'No trials to criterion - Generic Evaluation (1)',
+                      'No trials to criterion - Generic Evaluation (2)']
+must_touch_initiate_header_prefixes = ['End Summary - Condition (1)', 'End Summary - Corrects (1)',
+                                       'End Summary - Blank Touches (1)', 'End Summary - Left ITI touches (1)',
+                                       'End Summary - Right ITI touches (1)', 'Correct touch latency (',
+                                       'Correct Left touch latency (', 'Correct Right touch latency (',
+                                       'Blank Touch Latency (', 'Correct Reward Collection (']
+required_header_prefixes = {
+    'Hab1': ['End Summary - Condition (1)', 'End Summary - Reward IR Beam broken (1)',
+             'End Summary - Screen IR Beam broken (1)', 'End Summary - Crossed reward to screen (1)',
+             'End Summary - Crossed Screen to reward (1)', 'End Summary - Touches to bottom screen windows (1)',
+             'End Summary - Touches to top screen windows (1)', 'End Summary - Tray Entered - Cnt (1)'],
+    'Hab2': ['End Summary - Condition (1)', 'End Summary - Trial Completed (1)',
+             'End Summary - Reward IR Breaks - Reward Beam Cnt (1)',
+             'End Summary - Screen IR Breaks - Screen IR Cnt (1)',
+             'End Summary -  Bottom Left Touches - Bottom Left Cnt (1)',
+             'End Summary - Bottom Right Touches - Bottom Right Cnt (1)', 'End Summary -  Top Touches - Top Cnt (1)',
+             'End Summary - Tray Entered - Cnt (1)', 'Reward Collection Latency ('],
+    'IT': ['End Summary - Condition (1)', 'End Summary - No. images (1)', 'End Summary - Corrects (1)',
+           'End Summary - Blank Touches (1)', 'End Summary - Left ITI Touches (1)',
+           'End Summary - Right ITI Touches (1)',
+           'Correct touch latency (', 'Blank Touch Latency (', 'Correct Reward Collection ('],
+    'MT': must_touch_initiate_header_prefixes,
+    'MI': must_touch_initiate_header_prefixes,
+    'PI': ['End Summary - Condition (1)', 'End Summary - Trials Completed (1)', 'End Summary - % Correct (1)',
+           'End Summary - Left ITI Touches (1)', 'End Summary - Right ITI Touches (1)', 'Correct touch latency (',
+           'Correct Left touch latency (', 'Correct Right touch latency (', 'Blank Touch Latency (',
+           'Correct Reward Collection ('],
+    'LD Train': ld_header_prefixes,
+    'LD Probe': ld_header_prefixes,
+    'Acq': ['End Summary - Condition (1)', 'End Summary - Corrects (1)', 'End Summary - Blank Touches (1)',
+            'End Summary - Left ITI Touches (1)', 'End Summary - Right ITI Touches (1)',
+            'End Summary - Centre ITI Touches (1)', 'Correct touch latency (', 'Blank Touch Latency (',
+            'Correct Reward Collection ('],
+    'Ext': ['End Summary - Condition (1)', 'End Summary - Responses (1)', 'End Summary - Omissions (1)',
+            'Response touch latency ', 'Blank Touch Latency (', 'Tray Entry Latency (',
+            'End Summary - Left ITI Touches (1)', 'End Summary - Right ITI Touches (1)',
+            'End Summary - Centre ITI Touches (1)']}
+
+# the columns that the setup function of each test type reads from the raw data. Every column is made from the headers
+# that start with one of its header prefixes, by a reducer: 'first' takes the first of those headers, 'sum' and 'mean'
+# take the sum or the mean of all of them (skipping the empty cells). The columns that are worked out from other
+# columns are filled in by the setup function itself.
+info_column_specs = [('Date', ['Schedule run date'], 'first'), ('ID', ['Animal ID'], 'first')]
+latency_column_specs = [('MeanCorrectTouchLatency', ['Correct touch latency ('], 'mean'),
+                        ('MeanCorrectRightTouchLatency', ['Correct Right touch latency ('], 'mean'),
+                        ('MeanCorrectLeftTouchLatency', ['Correct Left touch latency ('], 'mean'),
+                        ('MeanBlankTouchLatency', ['Blank Touch Latency ('], 'mean'),
+                        ('MeanRewardCollectionLatency', ['Correct Reward Collection ('], 'mean')]
+must_touch_initiate_column_specs = info_column_specs + [
+    ('SessionLength', ['End Summary - Condition (1)'], 'first'),
+    ('Corrects', ['End Summary - Corrects (1)'], 'first'),
+    ('TotalBlankTouches', ['End Summary - Blank Touches (1)'], 'first'),
+    ('TotalITITouches', ['End Summary - Left ITI touches (1)', 'End Summary - Right ITI touches (1)'], 'sum')] + \
+    latency_column_specs
+ld_column_specs = info_column_specs + [
+    ('SessionLength', ['End Summary - Session Time (1)'], 'first'),
+    ('NumberOfTrial', ['End Summary - Trials Completed (1)'], 'first'),
+    ('PercentCorrect', ['End Summary - Percentage Correct (1)'], 'first'),
+    ('NumberOfReversal', ['End Summary - Times Criteria reached (1)'], 'first'),
+    ('TotalITITouches', ['End Summary - Left ITI touches (1)', 'End Summary - Right ITI touches (1)'], 'sum'),
+    ('TotalBlankTouches', ['End Summary - Left Blank Touches - Generic Counter (1)',
+                           'End Summary - Right Blank Touches - Generic Counter (1)',
+                           'End Summary - Top row touches - Generic Counter (1)'], 'sum'),
+    ('MeanRewardCollectionLatency', ['Trial Analysis - Reward Collection Latency ('], 'mean'),
+    ('MeanCorrectTouchLatency', ['Trial Analysis - Correct Image Response Latency ('], 'mean'),
+    ('MeanIncorrectTouchLatency', ['Trial Analysis - Incorrect Image Latency ('], 'mean'),
+    ('SessionLengthTo1stReversalDuration', ['No trials to criterion - Condition (1)'], 'first'),
+    ('SessionLengthTo2ndReversalDuration', ['No trials to criterion - Condition (2)'], 'first'),
+    ('NumberOfTrialTo1stReversal', ['No trials to criterion - Generic Evaluation (1)'], 'first'),
+    ('NumberOfTrialTo2ndReversal', ['No trials to criterion - Generic Evaluation (2)'], 'first')]
+column_specs = {
+    'Hab1': info_column_specs + [
+        ('SessionLength', ['End Summary - Condition (1)'], 'first'),
+        ('RewardIRBeamBrokenCount', ['End Summary - Reward IR Beam broken (1)'], 'first'),
+        ('ScreenIRBeamBrokenCount', ['End Summary - Screen IR Beam broken (1)'], 'first'),
+        ('CrossedRewardToScreen', ['End Summary - Crossed reward to screen (1)'], 'first'),
+        ('CrossedScreenToReward', ['End Summary - Crossed Screen to reward (1)'], 'first'),
+        ('BottomWindowTouches', ['End Summary - Touches to bottom screen windows (1)'], 'first'),
+        ('TopWindowTouches', ['End Summary - Touches to top screen windows (1)'], 'first'),
+        ('TrayEnteredCount', ['End Summary - Tray Entered - Cnt (1)'], 'first')],
+    'Hab2': info_column_specs + [
+        ('SessionLength', ['End Summary - Condition (1)'], 'first'),
+        ('NumberOfTrial', ['End Summary - Trial Completed (1)'], 'first'),
+        ('RewardIRBeamBrokenCount', ['End Summary - Reward IR Breaks - Reward Beam Cnt (1)'], 'first'),
+        ('ScreenIRBeamBrokenCount', ['End Summary - Screen IR Breaks - Screen IR Cnt (1)'], 'first'),
+        ('BottomLeftWindowTouches', ['End Summary -  Bottom Left Touches - Bottom Left Cnt (1)'], 'first'),
+        ('BottomRightWindowTouches', ['End Summary - Bottom Right Touches - Bottom Right Cnt (1)'], 'first'),
+        ('TopWindowTouches', ['End Summary -  Top Touches - Top Cnt (1)'], 'first'),
+        ('TrayEnteredCount', ['End Summary - Tray Entered - Cnt (1)'], 'first'),
+        ('MeanRewardCollectionLatency', ['Reward Collection Latency ('], 'mean')],
+    'IT': info_column_specs + [
+        ('SessionLength', ['End Summary - Condition (1)'], 'first'),
+        ('ImagesTouched', ['End Summary - No. images (1)'], 'first'),
+        ('Corrects', ['End Summary - Corrects (1)'], 'first'),
+        ('BlankTouches', ['End Summary - Blank Touches (1)'], 'first'),
+        ('TotalITITouches', ['End Summary - Left ITI Touches (1)', 'End Summary - Right ITI Touches (1)'], 'sum'),
+        ('MeanCorrectTouchLatency', ['Correct touch latency ('], 'mean'),
+        ('MeanBlankTouchLatency', ['Blank Touch Latency ('], 'mean'),
+        ('MeanRewardCollectionLatency', ['Correct Reward Collection ('], 'mean')],
+    'MT': must_touch_initiate_column_specs,
+    'MI': must_touch_initiate_column_specs,
+    'PI': info_column_specs + [
+        ('SessionLength', ['End Summary - Condition (1)'], 'first'),
+        ('NumberOfTrial', ['End Summary - Trials Completed (1)'], 'first'),
+        ('PercentCorrect', ['End Summary - % Correct (1)'], 'first'),
+        ('TotalITITouches', ['End Summary - Left ITI Touches (1)', 'End Summary - Right ITI Touches (1)'], 'first')] +
+        latency_column_specs,
+    'LD Train': ld_column_specs,
+    'LD Probe': ld_column_specs,
+    'Acq': info_column_specs + [
+        ('SessionLength', ['End Summary - Condition (1)'], 'first'),
+        ('Corrects', ['End Summary - Corrects (1)'], 'first'),
+        ('BlankTouches', ['End Summary - Blank Touches (1)'], 'first'),
+        ('TotalITITouches', ['End Summary - Left ITI Touches (1)', 'End Summary - Right ITI Touches (1)',
+                             'End Summary - Centre ITI Touches (1)'], 'sum'),
+        ('MeanCorrectTouchLatency', ['Correct touch latency ('], 'mean'),
+        ('MeanBlankTouchLatency', ['Blank Touch Latency ('], 'mean'),
+        ('MeanRewardTouchLatency', ['Correct Reward Collection ('], 'mean')],
+    'Ext': info_column_specs + [
+        ('SessionLength', ['End Summary - Condition (1)'], 'first'),
+        ('Responses', ['End Summary - Responses (1)'], 'first'),
+        ('Omissions', ['End Summary - Omissions (1)'], 'first'),
+        ('TotalITITouches', ['End Summary - Left ITI Touches (1)', 'End Summary - Right ITI Touches (1)',
+                             'End Summary - Centre ITI Touches (1)'], 'sum'),
+        ('MeanResponseTouchLatency', ['Response touch latency '], 'mean'),
+        ('MeanBlankTouchLatency', ['Blank Touch Latency ('], 'mean'),
+        ('MeanTrayEntryLatency', ['Tray Entry Latency ('], 'mean')]}
+
 
 def specific_schedule_name(df, schedule_name):
     """
@@ -139,6 +293,7 @@ def habituation_one(df, script_location):
 
     create_merge_file(df, script_location)
     print('The program is running... Please wait....')
+    report_progress('Cleaning the data', 0, 3)
 
     # sort by time and remove duplicates
     df = df.sort_values(by=['End Summary - Condition (1)'])
@@ -150,38 +305,20 @@ def habituation_one(df, script_location):
     all_numeric_values = [*range(13, len(raw_data_headers), 1)]
     df = convert_to_int(all_numeric_values, raw_data_headers, df)
 
-    # get the column indices for specific parameters
-    date_header = index_range('Schedule run date', raw_data_headers)
-    animal_id_header = index_range('Animal ID', raw_data_headers)
-    session_length_header = index_range('End Summary - Condition (1)', raw_data_headers)
-    reward_ir_beam = index_range('End Summary - Reward IR Beam broken (1)', raw_data_headers)
-    screen_ir_beam = index_range('End Summary - Screen IR Beam broken (1)', raw_data_headers)
-    reward_to_screen = index_range('End Summary - Crossed reward to screen (1)', raw_data_headers)
-    screen_to_reward = index_range('End Summary - Crossed Screen to reward (1)', raw_data_headers)
-    bottom_window_touches = index_range('End Summary - Touches to bottom screen windows (1)', raw_data_headers)
-    top_window_touches = index_range('End Summary - Touches to top screen windows (1)', raw_data_headers)
-    tray_entered_count = index_range('End Summary - Tray Entered - Cnt (1)', raw_data_headers)
+    # get the column indices for specific parameters, using one header index for all the lookups
+    header_index = get_header_index(raw_data_headers)
+    column_indices = resolve_column_specs(column_specs['Hab1'], header_index)
 
     print('The program is still running... Please wait....')
+    report_progress('Cleaning the data', 1, 3)
 
     col_names = ['Date', 'ID', 'SessionLength', 'RewardIRBeamBrokenCount', 'ScreenIRBeamBrokenCount',
                  'CrossedRewardToScreen',
                  'CrossedScreenToReward', 'BottomWindowTouches', 'TopWindowTouches', 'TrayEnteredCount', 'Day']
 
-    df_final = pd.DataFrame(columns=col_names)
-
-    # extract the necessary data from raw data
+    # extract the necessary data from raw data, all the columns at once
     try:
-        df_final['Date'] = df.iloc[:, date_header[0]]
-        df_final['ID'] = df.iloc[:, animal_id_header[0]]
-        df_final['SessionLength'] = df.iloc[:, session_length_header[0]]
-        df_final['RewardIRBeamBrokenCount'] = df.iloc[:, reward_ir_beam[0]]
-        df_final['ScreenIRBeamBrokenCount'] = df.iloc[:, screen_ir_beam[0]]
-        df_final['CrossedRewardToScreen'] = df.iloc[:, reward_to_screen[0]]
-        df_final['CrossedScreenToReward'] = df.iloc[:, screen_to_reward[0]]
-        df_final['BottomWindowTouches'] = df.iloc[:, bottom_window_touches[0]]
-        df_final['TopWindowTouches'] = df.iloc[:, top_window_touches[0]]
-        df_final['TrayEnteredCount'] = df.iloc[:, tray_entered_count[0]]
+        df_final = extract_columns(df, column_indices, col_names)
         df_final['Day'] = df_final.groupby('ID').cumcount() + 1
 
         df_final = df_final.sort_values(by=['ID', 'Date'])
@@ -192,6 +329,7 @@ def habituation_one(df, script_location):
               'or headers are not the same on all files!')
         return
     print('The program is almost done running... Please wait....')
+    report_progress('Cleaning the data', 2, 3)
 
     return df_final
 
@@ -214,6 +352,7 @@ def habituation_two(df, script_location):
 
     create_merge_file(df, script_location)
     print('The program is running... Please wait....')
+    report_progress('Cleaning the data', 0, 3)
 
     # sort by time and remove duplicates
     df = df.sort_values(by=['End Summary - Condition (1)'])
@@ -225,43 +364,21 @@ def habituation_two(df, script_location):
     all_numeric_values = [*range(13, len(raw_data_headers), 1)]
     df = convert_to_int(all_numeric_values, raw_data_headers, df)
 
-    # get the column indices for specific parameters
-    date_header = index_range('Schedule run date', raw_data_headers)
-    animal_id_header = index_range('Animal ID', raw_data_headers)
-    session_length_header = index_range('End Summary - Condition (1)', raw_data_headers)
-    total_trials = index_range('End Summary - Trial Completed (1)', raw_data_headers)
-    reward_ir_beam = index_range('End Summary - Reward IR Breaks - Reward Beam Cnt (1)', raw_data_headers)
-    screen_ir_beam = index_range('End Summary - Screen IR Breaks - Screen IR Cnt (1)', raw_data_headers)
-    bottom_left_window_touches = index_range('End Summary -  Bottom Left Touches - Bottom Left Cnt (1)',
-                                             raw_data_headers)
-    bottom_right_window_touches = index_range('End Summary - Bottom Right Touches - Bottom Right Cnt (1)',
-                                              raw_data_headers)
-    top_window_touches = index_range('End Summary -  Top Touches - Top Cnt (1)', raw_data_headers)
-    tray_entered_count = index_range('End Summary - Tray Entered - Cnt (1)', raw_data_headers)
-    mean_reward_collection_latency = index_range('Reward Collection Latency (', raw_data_headers)
+    # get the column indices for specific parameters, using one header index for all the lookups
+    header_index = get_header_index(raw_data_headers)
+    column_indices = resolve_column_specs(column_specs['Hab2'], header_index)
 
     print('The program is still running... Please wait....')
+    report_progress('Cleaning the data', 1, 3)
 
     col_names = ['Date', 'ID', 'SessionLength', 'NumberOfTrial', 'RewardIRBeamBrokenCount', 'ScreenIRBeamBrokenCount',
                  'BottomLeftWindowTouches',
                  'BottomRightWindowTouches', 'TopWindowTouches', 'TrayEnteredCount', 'MeanRewardCollectionLatency',
                  'Day']
 
-    df_final = pd.DataFrame(columns=col_names)
-
-    # extract the necessary data from raw data
+    # extract the necessary data from raw data, all the columns at once
     try:
-        df_final['Date'] = df.iloc[:, date_header[0]]
-        df_final['ID'] = df.iloc[:, animal_id_header[0]]
-        df_final['SessionLength'] = df.iloc[:, session_length_header[0]]
-        df_final['NumberOfTrial'] = df.iloc[:, total_trials[0]]
-        df_final['RewardIRBeamBrokenCount'] = df.iloc[:, reward_ir_beam[0]]
-        df_final['ScreenIRBeamBrokenCount'] = df.iloc[:, screen_ir_beam[0]]
-        df_final['BottomLeftWindowTouches'] = df.iloc[:, bottom_left_window_touches[0]]
-        df_final['BottomRightWindowTouches'] = df.iloc[:, bottom_right_window_touches[0]]
-        df_final['TopWindowTouches'] = df.iloc[:, top_window_touches[0]]
-        df_final['TrayEnteredCount'] = df.iloc[:, tray_entered_count[0]]
-        df_final['MeanRewardCollectionLatency'] = df.iloc[:, mean_reward_collection_latency].mean(axis=1)
+        df_final = extract_columns(df, column_indices, col_names)
         df_final['Day'] = df_final.groupby('ID').cumcount() + 1
 
         df_final = df_final.sort_values(by=['ID', 'Date'])
@@ -273,6 +390,7 @@ def habituation_two(df, script_location):
             'or headers are not the same on all files!')
         return None
     print('The program is almost done running... Please wait....')
+    report_progress('Cleaning the data', 2, 3)
 
     return df_final
 
@@ -294,6 +412,7 @@ def initial_touch(df, script_location):
 
     create_merge_file(df, script_location)
     print('The program is running... Please wait....')
+    report_progress('Cleaning the data', 0, 3)
 
     # sort by time and remove duplicates
     df = df.sort_values(by=['End Summary - Condition (1)'])
@@ -305,38 +424,20 @@ def initial_touch(df, script_location):
     all_numeric_values = [*range(13, len(raw_data_headers), 1)]
     df = convert_to_int(all_numeric_values, raw_data_headers, df)
 
-    # get the column indices for specific parameters
-    date_header = index_range('Schedule run date', raw_data_headers)
-    animal_id_header = index_range('Animal ID', raw_data_headers)
-    session_length_header = index_range('End Summary - Condition (1)', raw_data_headers)
-    images_touched = index_range('End Summary - No. images (1)', raw_data_headers)
-    correct_touches = index_range('End Summary - Corrects (1)', raw_data_headers)
-    blank_touches = index_range('End Summary - Blank Touches (1)', raw_data_headers)
-    total_iti_touches = index_range('End Summary - Left ITI Touches (1)', raw_data_headers) + index_range(
-        'End Summary - Right ITI Touches (1)', raw_data_headers)
-    mean_correct_touch_latency = index_range('Correct touch latency (', raw_data_headers)
-    mean_blank_touch_latency = index_range('Blank Touch Latency (', raw_data_headers)
-    mean_reward_collection_latency = index_range('Correct Reward Collection (', raw_data_headers)
+    # get the column indices for specific parameters, using one header index for all the lookups
+    header_index = get_header_index(raw_data_headers)
+    column_indices = resolve_column_specs(column_specs['IT'], header_index)
 
     print('The program is still running... Please wait....')
+    report_progress('Cleaning the data', 1, 3)
 
     col_names = ['Date', 'ID', 'SessionLength', 'ImagesTouched', 'Corrects', 'BlankTouches',
                  'TotalITITouches', 'MeanCorrectTouchLatency', 'MeanBlankTouchLatency', 'MeanRewardCollectionLatency',
                  'Day']
 
-    df_final = pd.DataFrame(columns=col_names)
-
+    # extract the necessary data from raw data, all the columns at once
     try:
-        df_final['Date'] = df.iloc[:, date_header[0]]
-        df_final['ID'] = df.iloc[:, animal_id_header[0]]
-        df_final['SessionLength'] = df.iloc[:, session_length_header[0]]
-        df_final['ImagesTouched'] = df.iloc[:, images_touched[0]]
-        df_final['Corrects'] = df.iloc[:, correct_touches[0]]
-        df_final['BlankTouches'] = df.iloc[:, blank_touches[0]]
-        df_final['TotalITITouches'] = df.iloc[:, total_iti_touches].sum(axis=1)
-        df_final['MeanCorrectTouchLatency'] = df.iloc[:, mean_correct_touch_latency].mean(axis=1)
-        df_final['MeanBlankTouchLatency'] = df.iloc[:, mean_blank_touch_latency].mean(axis=1)
-        df_final['MeanRewardCollectionLatency'] = df.iloc[:, mean_reward_collection_latency].mean(axis=1)
+        df_final = extract_columns(df, column_indices, col_names)
         df_final['Day'] = df_final.groupby('ID').cumcount() + 1
 
         df_final = df_final.sort_values(by=['ID', 'Date'])
@@ -348,6 +449,7 @@ def initial_touch(df, script_location):
             'or headers are not the same on all files!')
         return None
     print('The program is almost done running... Please wait....')
+    report_progress('Cleaning the data', 2, 3)
 
     return df_final
 
@@ -370,6 +472,7 @@ def must_touch_initiate(df, script_location):
 
     create_merge_file(df, script_location)
     print('The program is running... Please wait....')
+    report_progress('Cleaning the data', 0, 3)
 
     # sort by corrects and time, remove duplicates
     df = df.sort_values(by=['End Summary - Corrects (1)', 'End Summary - Condition (1)'])
@@ -381,43 +484,22 @@ def must_touch_initiate(df, script_location):
     all_numeric_values = [*range(13, len(raw_data_headers), 1)]
     df = convert_to_int(all_numeric_values, raw_data_headers, df)
 
-    # get the column indices for specific parameters
-    date_header = index_range('Schedule run date', raw_data_headers)
-    animal_id_header = index_range('Animal ID', raw_data_headers)
-    session_length_header = index_range('End Summary - Condition (1)', raw_data_headers)
-    correct_header = index_range('End Summary - Corrects (1)', raw_data_headers)
-    blank_touches_header = index_range('End Summary - Blank Touches (1)', raw_data_headers)
-    iti_blank_header = index_range('End Summary - Left ITI touches (1)', raw_data_headers) + index_range(
-        'End Summary - Right ITI touches (1)', raw_data_headers)
-    mean_correct_touch_header = index_range('Correct touch latency (', raw_data_headers)
-    mean_correct_left_touch = index_range('Correct Left touch latency (', raw_data_headers)
-    mean_correct_right_touch = index_range('Correct Right touch latency (', raw_data_headers)
-    mean_blank_touch_header = index_range('Blank Touch Latency (', raw_data_headers)
-    mean_reward_header = index_range('Correct Reward Collection (', raw_data_headers)
+    # get the column indices for specific parameters, using one header index for all the lookups
+    header_index = get_header_index(raw_data_headers)
+    column_indices = resolve_column_specs(must_touch_initiate_column_specs, header_index)
 
     print('The program is still running... Please wait....')
+    report_progress('Cleaning the data', 1, 3)
 
     col_names = ['Date', 'ID', 'SessionLength', 'Corrects', 'TotalBlankTouches', 'TotalITITouches',
                  'MeanCorrectTouchLatency', 'MeanCorrectRightTouchLatency', 'MeanCorrectLeftTouchLatency',
                  'MeanCorrectLeftRightTouchLatency', 'MeanBlankTouchLatency', 'MeanRewardCollectionLatency', 'Day']
 
-    df_final = pd.DataFrame(columns=col_names)
-
-    # extract the necessary data from raw data
+    # extract the necessary data from raw data, all the columns at once
     try:
-        df_final['Date'] = df.iloc[:, date_header[0]]
-        df_final['ID'] = df.iloc[:, animal_id_header[0]]
-        df_final['SessionLength'] = df.iloc[:, session_length_header[0]]
-        df_final['Corrects'] = df.iloc[:, correct_header[0]]
-        df_final['TotalBlankTouches'] = df.iloc[:, blank_touches_header[0]]
-        df_final['TotalITITouches'] = df.iloc[:, iti_blank_header].sum(axis=1)
-        df_final['MeanCorrectTouchLatency'] = df.iloc[:, mean_correct_touch_header].mean(axis=1)
-        df_final['MeanCorrectRightTouchLatency'] = df.iloc[:, mean_correct_right_touch].mean(axis=1)
-        df_final['MeanCorrectLeftTouchLatency'] = df.iloc[:, mean_correct_left_touch].mean(axis=1)
+        df_final = extract_columns(df, column_indices, col_names)
         df_final['MeanCorrectLeftRightTouchLatency'] = df_final[
             ['MeanCorrectLeftTouchLatency', 'MeanCorrectRightTouchLatency']].mean(axis=1)
-        df_final['MeanBlankTouchLatency'] = df.iloc[:, mean_blank_touch_header].mean(axis=1)
-        df_final['MeanRewardCollectionLatency'] = df.iloc[:, mean_reward_header].mean(axis=1)
         df_final['Day'] = df_final.groupby('ID').cumcount() + 1
 
         df_final = df_final.sort_values(by=['ID', 'Date'])
@@ -429,6 +511,7 @@ def must_touch_initiate(df, script_location):
             'or headers are not the same on all files!')
         return None
     print('The program is almost done running... Please wait....')
+    report_progress('Cleaning the data', 2, 3)
 
     return df_final
 
@@ -451,6 +534,7 @@ def punish_incorrect(df, script_location):
 
     create_merge_file(df, script_location)
     print('The program is running... Please wait....')
+    report_progress('Cleaning the data', 0, 3)
 
     # sort by trials, time and remove duplicates
     df = df.sort_values(by=['End Summary - Trials Completed (1)', 'End Summary - Condition (1)'])
@@ -462,43 +546,22 @@ def punish_incorrect(df, script_location):
     all_numeric_values = [*range(13, len(raw_data_headers), 1)]
     df = convert_to_int(all_numeric_values, raw_data_headers, df)
 
-    # get the column indices for specific parameters
-    date_header = index_range('Schedule run date', raw_data_headers)
-    animal_id_header = index_range('Animal ID', raw_data_headers)
-    session_length_header = index_range('End Summary - Condition (1)', raw_data_headers)
-    trial_completed_header = index_range('End Summary - Trials Completed (1)', raw_data_headers)
-    percent_correct_headers = index_range('End Summary - % Correct (1)', raw_data_headers)
-    iti_blank_header = index_range('End Summary - Left ITI Touches (1)', raw_data_headers) + index_range(
-        'End Summary - Right ITI Touches (1)', raw_data_headers)
-    mean_correct_touch_header = index_range('Correct touch latency (', raw_data_headers)
-    mean_correct_left_touch = index_range('Correct Left touch latency (', raw_data_headers)
-    mean_correct_right_touch = index_range('Correct Right touch latency (', raw_data_headers)
-    mean_blank_touch_header = index_range('Blank Touch Latency (', raw_data_headers)
-    mean_reward_header = index_range('Correct Reward Collection (', raw_data_headers)
+    # get the column indices for specific parameters, using one header index for all the lookups
+    header_index = get_header_index(raw_data_headers)
+    column_indices = resolve_column_specs(column_specs['PI'], header_index)
 
     print('The program is still running... Please wait....')
+    report_progress('Cleaning the data', 1, 3)
 
     col_names = ['Date', 'ID', 'SessionLength', 'NumberOfTrial', 'PercentCorrect', 'TotalITITouches',
                  'MeanCorrectTouchLatency', 'MeanCorrectRightTouchLatency', 'MeanCorrectLeftTouchLatency',
                  'MeanCorrectLeftRightTouchLatency', 'MeanBlankTouchLatency', 'MeanRewardCollectionLatency', 'Day']
 
-    df_final = pd.DataFrame(columns=col_names)
-
-    # extract the necessary data from raw data
+    # extract the necessary data from raw data, all the columns at once
     try:
-        df_final['Date'] = df.iloc[:, date_header[0]]
-        df_final['ID'] = df.iloc[:, animal_id_header[0]]
-        df_final['SessionLength'] = df.iloc[:, session_length_header[0]]
-        df_final['NumberOfTrial'] = df.iloc[:, trial_completed_header[0]]
-        df_final['PercentCorrect'] = df.iloc[:, percent_correct_headers[0]]
-        df_final['TotalITITouches'] = df.iloc[:, iti_blank_header[0]]
-        df_final['MeanCorrectTouchLatency'] = df.iloc[:, mean_correct_touch_header].mean(axis=1)
-        df_final['MeanCorrectRightTouchLatency'] = df.iloc[:, mean_correct_right_touch].mean(axis=1)
-        df_final['MeanCorrectLeftTouchLatency'] = df.iloc[:, mean_correct_left_touch].mean(axis=1)
+        df_final = extract_columns(df, column_indices, col_names)
         df_final['MeanCorrectLeftRightTouchLatency'] = df_final[
             ['MeanCorrectLeftTouchLatency', 'MeanCorrectRightTouchLatency']].mean(axis=1)
-        df_final['MeanBlankTouchLatency'] = df.iloc[:, mean_blank_touch_header].mean(axis=1)
-        df_final['MeanRewardCollectionLatency'] = df.iloc[:, mean_reward_header].mean(axis=1)
         df_final['Day'] = df_final.groupby('ID').cumcount() + 1
 
         df_final = df_final.sort_values(by=['ID', 'Date'])
@@ -511,6 +574,7 @@ def punish_incorrect(df, script_location):
         return None
 
     print('The program is almost done running... Please wait....')
+    report_progress('Cleaning the data', 2, 3)
     return df_final
 
 
@@ -534,6 +598,7 @@ def ld(df, script_location):
 
     create_merge_file(df, script_location)
     print('The program is running... Please wait....')
+    report_progress('Cleaning the data', 0, 3)
 
     # sort by trials, time and remove duplicates
     df = df.sort_values(by=['End Summary - Trials Completed (1)', 'End Summary - Condition (1)'])
@@ -545,29 +610,14 @@ def ld(df, script_location):
     all_numeric_values = [*range(13, len(raw_data_headers), 1)]
     df = convert_to_int(all_numeric_values, raw_data_headers, df)
 
-    # get the column indices for specific parameters
-    date_header = index_range('Schedule run date', raw_data_headers)
-    number_correct_header = index_range('Trial Analysis - No. Correct (', raw_data_headers)
-    animal_id_header = index_range('Animal ID', raw_data_headers)
-    correct_position_header = index_range('Trial Analysis - Correct Position (', raw_data_headers)
-    session_length_header = index_range('End Summary - Session Time (1)', raw_data_headers)
-    trials_completed_header = index_range('End Summary - Trials Completed (1)', raw_data_headers)
-    percent_correct_header = index_range('End Summary - Percentage Correct (1)', raw_data_headers)
-    reversal_number_header = index_range('End Summary - Times Criteria reached (1)', raw_data_headers)
-    iti_blank_header = index_range('End Summary - Left ITI touches (1)', raw_data_headers) + index_range(
-        'End Summary - Right ITI touches (1)', raw_data_headers)
-    blank_header = index_range('End Summary - Left Blank Touches - Generic Counter (1)', raw_data_headers) + \
-                   index_range('End Summary - Right Blank Touches - Generic Counter (1)', raw_data_headers) + \
-                   index_range('End Summary - Top row touches - Generic Counter (1)', raw_data_headers)
-    mean_reward_header = index_range('Trial Analysis - Reward Collection Latency (', raw_data_headers)
-    mean_correct_touch_header = index_range('Trial Analysis - Correct Image Response Latency (', raw_data_headers)
-    mean_incorrect_header = index_range('Trial Analysis - Incorrect Image Latency (', raw_data_headers)
-    first_reversal_time_header = index_range('No trials to criterion - Condition (1)', raw_data_headers)
-    second_reversal_time_header = index_range('No trials to criterion - Condition (2)', raw_data_headers)
-    first_reversal_trials_header = index_range('No trials to criterion - Generic Evaluation (1)', raw_data_headers)
-    second_reversal_trials_header = index_range('No trials to criterion - Generic Evaluation (2)', raw_data_headers)
+    # get the column indices for specific parameters, using one header index for all the lookups
+    header_index = get_header_index(raw_data_headers)
+    number_correct_header = index_range('Trial Analysis - No. Correct (', header_index)
+    correct_position_header = index_range('Trial Analysis - Correct Position (', header_index)
+    column_indices = resolve_column_specs(ld_column_specs, header_index)
 
     print('The program is still running... Please wait....')
+    report_progress('Cleaning the data', 1, 3)
 
     col_names = ['Date', 'ID', 'Type', 'SessionLength', 'NumberOfTrial', 'PercentCorrect', 'NumberOfReversal',
                  'TotalITITouches', 'TotalBlankTouches', 'MeanRewardCollectionLatency', 'MeanCorrectTouchLatency',
@@ -575,43 +625,28 @@ def ld(df, script_location):
                  'SessionLengthTo2ndReversalDuration', 'NumberOfTrialTo1stReversal', 'NumberOfTrialTo2ndReversal',
                  'PercentCorrectTo1stReversal', 'PercentCorrectTo2ndReversal', 'Day']
 
-    df_final = pd.DataFrame(columns=col_names)
-
-    # extract the necessary data from raw data
+    # extract the necessary data from raw data, all the columns at once
     try:
-        df_final['Date'] = df.iloc[:, date_header[0]]
-        df_final['ID'] = df.iloc[:, animal_id_header[0]]
+        # the per trial blocks are copied out of the raw data once, and the functions below read views of them
+        trial_header_indices = get_reduced_header_indices(column_indices)
+        trial_header_indices['NumberCorrect'] = number_correct_header
+        trial_header_indices['CorrectPosition'] = correct_position_header
+        trial_matrices = get_trial_matrices(df, trial_header_indices)
+        df_final = extract_columns(df, column_indices, col_names, trial_matrices)
 
         df['Type'] = ''
-        correct_position_names = get_header_names(raw_data_headers, correct_position_header)
-        get_test_type(df, correct_position_names)
+        get_test_type(df, trial_matrices['CorrectPosition'])
         df_final['Type'] = df['Type']
 
-        df_final['SessionLength'] = df.iloc[:, session_length_header[0]]
-        df_final['NumberOfTrial'] = df.iloc[:, trials_completed_header[0]]
-        df_final['PercentCorrect'] = df.iloc[:, percent_correct_header]
-        df_final['NumberOfReversal'] = df.iloc[:, reversal_number_header[0]]
-        df_final['TotalITITouches'] = df.iloc[:, iti_blank_header].sum(axis=1)
-        df_final['TotalBlankTouches'] = df.iloc[:, blank_header].sum(axis=1)
-        df_final['MeanRewardCollectionLatency'] = df.iloc[:, mean_reward_header].mean(axis=1)
-        df_final['MeanCorrectTouchLatency'] = df.iloc[:, mean_correct_touch_header].mean(axis=1)
-        df_final['MeanIncorrectTouchLatency'] = df.iloc[:, mean_incorrect_header].mean(axis=1)
-        df_final['SessionLengthTo1stReversalDuration'] = df.iloc[:, first_reversal_time_header[0]]
-        df_final['SessionLengthTo2ndReversalDuration'] = df.iloc[:, second_reversal_time_header[0]]
-        df_final['NumberOfTrialTo1stReversal'] = df.iloc[:, first_reversal_trials_header[0]]
-        df_final['NumberOfTrialTo2ndReversal'] = df.iloc[:, second_reversal_trials_header[0]]
-
         get_missing_reversal_trials(df_final)
         get_fixed_session_time(df_final, df)
 
-        number_correct_column_names = get_header_names(raw_data_headers, number_correct_header)
-
         df['PercentCorrectTo1stReversal'] = np.nan
-        get_percent_correctness_first(df, df_final, number_correct_column_names)
+        get_percent_correctness_first(df, df_final, trial_matrices['NumberCorrect'])
         df_final['PercentCorrectTo1stReversal'] = df['PercentCorrectTo1stReversal']
 
         df['PercentCorrectTo2ndReversal'] = np.nan
-        get_percent_correctness_second(df, df_final, number_correct_column_names)
+        get_percent_correctness_second(df, df_final, trial_matrices['NumberCorrect'])
         df_final['PercentCorrectTo2ndReversal'] = df['PercentCorrectTo2ndReversal']
 
         df_final['Day'] = df_final.groupby('ID').cumcount() + 1
@@ -626,6 +661,7 @@ def ld(df, script_location):
         return None
 
     print('The program is almost done running... Please wait....')
+    report_progress('Cleaning the data', 2, 3)
 
     return df_final
 
@@ -647,6 +683,7 @@ def acquisition(df, script_location):
 
     create_merge_file(df, script_location)
     print('The program is running... Please wait....')
+    report_progress('Cleaning the data', 0, 3)
 
     # sort by corrects and time, remove duplicates
     df = df.sort_values(by=['End Summary - Corrects (1)', 'End Summary - Condition (1)'])
@@ -659,37 +696,19 @@ def acquisition(df, script_location):
     all_numeric_values = [*range(13, len(raw_data_headers), 1)]
     df = convert_to_int(all_numeric_values, raw_data_headers, df)
 
-    # get the column indices for specific parameters
-    date_header = index_range('Schedule run date', raw_data_headers)
-    animal_id_header = index_range('Animal ID', raw_data_headers)
-    session_length_header = index_range('End Summary - Condition (1)', raw_data_headers)
-    correct_header = index_range('End Summary - Corrects (1)', raw_data_headers)
-    blank_touches_header = index_range('End Summary - Blank Touches (1)', raw_data_headers)
-    iti_blank_header = index_range('End Summary - Left ITI Touches (1)', raw_data_headers) + index_range(
-        'End Summary - Right ITI Touches (1)', raw_data_headers) + index_range(
-        'End Summary - Centre ITI Touches (1)', raw_data_headers)
-    correct_touch_latency_header = index_range('Correct touch latency (', raw_data_headers)
-    blank_touch_latency_header = index_range('Blank Touch Latency (', raw_data_headers)
-    correct_reward_collect_header = index_range('Correct Reward Collection (', raw_data_headers)
+    # get the column indices for specific parameters, using one header index for all the lookups
+    header_index = get_header_index(raw_data_headers)
+    column_indices = resolve_column_specs(column_specs['Acq'], header_index)
 
     print('The program is still running... Please wait....')
+    report_progress('Cleaning the data', 1, 3)
 
     col_names = ['Date', 'ID', 'SessionLength', 'Corrects', 'BlankTouches', 'TotalITITouches',
                  'MeanCorrectTouchLatency', 'MeanBlankTouchLatency', 'MeanRewardTouchLatency', 'Day']
 
-    df_final = pd.DataFrame(columns=col_names)
-
-    # extract the necessary data from raw data
+    # extract the necessary data from raw data, all the columns at once
     try:
-        df_final['Date'] = df.iloc[:, date_header[0]]
-        df_final['ID'] = df.iloc[:, animal_id_header[0]]
-        df_final['SessionLength'] = df.iloc[:, session_length_header[0]]
-        df_final['Corrects'] = df.iloc[:, correct_header[0]]
-        df_final['BlankTouches'] = df.iloc[:, blank_touches_header[0]]
-        df_final['TotalITITouches'] = df.iloc[:, iti_blank_header].sum(axis=1)
-        df_final['MeanCorrectTouchLatency'] = df.iloc[:, correct_touch_latency_header].mean(axis=1)
-        df_final['MeanBlankTouchLatency'] = df.iloc[:, blank_touch_latency_header].mean(axis=1)
-        df_final['MeanRewardTouchLatency'] = df.iloc[:, correct_reward_collect_header].mean(axis=1)
+        df_final = extract_columns(df, column_indices, col_names)
         df_final['Day'] = df_final.groupby('ID').cumcount() + 1
 
         df_final = df_final.sort_values(by=['ID', 'Date'])
@@ -700,6 +719,7 @@ def acquisition(df, script_location):
             'acquisition() error: Either you selected the wrong type of test or headers are not the same on all files!')
         return None
     print('The program is almost done running... Please wait....')
+    report_progress('Cleaning the data', 2, 3)
 
     return df_final
 
@@ -721,6 +741,7 @@ def extinction(df, script_location):
 
     create_merge_file(df, script_location)
     print('The program is running... Please wait....')
+    report_progress('Cleaning the data', 0, 3)
 
     # sort by responses and time, remove duplicates
     df = df.sort_values(by=['End Summary - Responses (1)', 'End Summary - Condition (1)'])
@@ -732,37 +753,19 @@ def extinction(df, script_location):
     all_numeric_values = [*range(13, len(raw_data_headers), 1)]
     df = convert_to_int(all_numeric_values, raw_data_headers, df)
 
-    # get the column indices for specific parameters
-    date_header = index_range('Schedule run date', raw_data_headers)
-    animal_id_header = index_range('Animal ID', raw_data_headers)
-    session_length_header = index_range('End Summary - Condition (1)', raw_data_headers)
-    responses_header = index_range('End Summary - Responses (1)', raw_data_headers)
-    omissions_header = index_range('End Summary - Omissions (1)', raw_data_headers)
-    mean_response_touch_header = index_range('Response touch latency ', raw_data_headers)
-    mean_blank_touch_header = index_range('Blank Touch Latency (', raw_data_headers)
-    mean_tray_entry_latency = index_range('Tray Entry Latency (', raw_data_headers)
-    iti_blank_header = index_range('End Summary - Left ITI Touches (1)', raw_data_headers) + index_range(
-        'End Summary - Right ITI Touches (1)', raw_data_headers) + index_range(
-        'End Summary - Centre ITI Touches (1)', raw_data_headers)
+    # get the column indices for specific parameters, using one header index for all the lookups
+    header_index = get_header_index(raw_data_headers)
+    column_indices = resolve_column_specs(column_specs['Ext'], header_index)
 
     print('The program is still running... Please wait....')
+    report_progress('Cleaning the data', 1, 3)
 
     col_names = ['Date', 'ID', 'SessionLength', 'Responses', 'Omissions', 'TotalITITouches',
                  'MeanResponseTouchLatency', 'MeanBlankTouchLatency', 'MeanTrayEntryLatency', 'Day']
 
-    df_final = pd.DataFrame(columns=col_names)
-
-    # extract the necessary data from raw data
+    # extract the necessary data from raw data, all the columns at once
     try:
-        df_final['Date'] = df.iloc[:, date_header[0]]
-        df_final['ID'] = df.iloc[:, animal_id_header[0]]
-        df_final['SessionLength'] = df.iloc[:, session_length_header[0]]
-        df_final['Responses'] = df.iloc[:, responses_header[0]]
-        df_final['Omissions'] = df.iloc[:, omissions_header[0]]
-        df_final['TotalITITouches'] = df.iloc[:, iti_blank_header].sum(axis=1)
-        df_final['MeanResponseTouchLatency'] = df.iloc[:, mean_response_touch_header].mean(axis=1)
-        df_final['MeanBlankTouchLatency'] = df.iloc[:, mean_blank_touch_header].mean(axis=1)
-        df_final['MeanTrayEntryLatency'] = df.iloc[:, mean_tray_entry_latency].mean(axis=1)
+        df_final = extract_columns(df, column_indices, col_names)
         df_final['Day'] = df_final.groupby('ID').cumcount() + 1
 
         df_final = df_final.sort_values(by=['ID', 'Date'])
@@ -774,11 +777,341 @@ def extinction(df, script_location):
         return None
 
     print('The program is almost done running... Please wait....')
+    report_progress('Cleaning the data', 2, 3)
+
+    return df_final
+
+
+def read_raw_file(file, first_file=False, header_prefixes=None, schedule_name=None):
+    """
+    This function reads a single raw ABET csv file into a dataframe. The first file of a folder is read while skipping
+    any bad lines, the rest are read without using the first column as the index.
+
+    If header prefixes are given, the header line is read first and only the columns that the test needs are parsed.
+
+    If a schedule name is given, the file is parsed in chunks of raw_data_chunk_size rows and only the rows of that
+    schedule are kept from each chunk, so a file that mixes the exports of many tests never has all its rows in memory.
+    The kept rows keep the row index that read_csv gave them. A file without a 'Schedule name' column is kept whole, so
+    specific_schedule_name() can report it.
+
+    :param file: The path to the raw ABET csv file
+    :param first_file: A boolean that represents whether this is the first file of the folder
+    :param header_prefixes: A list of headers or parts of headers that a test uses, or None to parse every column
+    :param schedule_name: The schedule name of the rows to keep, or None to keep every row
+    :return: A dataframe that represents the raw ABET file
+    :except TaskCancelled: If the cancel button was clicked before the file was started
+    """
+
+    # stop before starting another file if the cancel button was clicked
+    check_cancelled()
+
+    if first_file:
+        read_options = {'error_bad_lines': False}
+    else:
+        read_options = {'index_col': False}
+
+    if header_prefixes is not None:
+        with open(file, 'r', encoding='utf-8-sig', newline='') as raw_file:
+            raw_data_headers = next(csv.reader(raw_file, delimiter=','), list())
+        read_options['usecols'] = required_index_range(header_prefixes, raw_data_headers)
+
+    if schedule_name is None:
+        return pd.read_csv(file, encoding='utf-8', delimiter=',', **read_options)
+
+    schedule_frames = list()
+    with pd.read_csv(file, encoding='utf-8', delimiter=',', chunksize=raw_data_chunk_size,
+                     **read_options) as raw_chunks:
+        for df_chunk in raw_chunks:
+            if 'Schedule name' in df_chunk.columns:
+                df_chunk = df_chunk.loc[(df_chunk['Schedule name'] == schedule_name).to_numpy()]
+            schedule_frames.append(df_chunk)
+
+    # a file with only a header line has no chunks
+    if len(schedule_frames) == 0:
+        return pd.read_csv(file, encoding='utf-8', delimiter=',', **read_options)
+    return pd.concat(schedule_frames)
+
+
+def get_files_to_read(files):
+    """
+    This function gets the raw ABET csv files that will be read, in the order they will be combined.
+
+    :param files: A list of paths to the raw ABET csv files
+    :return: A list of paths to the raw ABET csv files that will be read
+    :except IndexError: If the files list is empty
+    """
+
+    # the first file is always read, any other hidden files are skipped
+    return [files[0]] + [file for file in files[1:] if not file.startswith('.')]
+
+
+def read_raw_rows(files_to_read, file_manifest=None, max_workers=None, header_prefixes=None, schedule_name=None,
+                  update_columnar_cache=True):
+    """
+    This function reads the raw ABET csv files at the same time using a pool of worker threads and combines them into a
+    single dataframe with one concatenation, keeping track of the file that each row came from. The rows are kept in
+    the same order as the files list.
+
+    If a manifest of the files is given, files that are already stored in the columnar cache of the raw data folder and
+    have not changed are loaded from the cache, so only files that were added or changed since the cache was built are
+    parsed from the csv. If the cache is updated, it is updated afterwards with the files that had to be parsed.
+
+    If header prefixes are given, only the columns that the test needs are kept. Unless the cache is updated, the other
+    columns are never parsed. When the cache is updated, the new files are parsed in full so the cache keeps every
+    column for the other tests.
+
+    If a schedule name is given, only the rows of that schedule are kept. Unless the cache is updated, the rows of the
+    other schedules are dropped while the csv files are parsed in chunks, or while the columnar cache is loaded, so
+    they are never all in memory at once. When the cache is updated, the new files are parsed in full and the other
+    rows are dropped after the cache is saved, so every new file is in memory with all its rows and columns.
+
+    :param files_to_read: A list of paths to the raw ABET csv files, in the order they will be combined
+    :param file_manifest: The manifest entries of the raw data files created by get_file_manifest(), or None to not
+    use the columnar cache
+    :param max_workers: The number of files that can be read at the same time. If None, a default based on the number
+    of CPUs is used.
+    :param header_prefixes: A list of headers or parts of headers that a test uses, or None to keep every column
+    :param schedule_name: The schedule name of the rows to keep, or None to keep every row
+    :param update_columnar_cache: A boolean that represents whether to parse the new or changed files in full and add
+    them to the columnar cache
+    :return: (df, row_positions): A dataframe with all the raw ABET files combined and an array with the position in
+    the files list of the file that each row came from
+    :except TaskCancelled: If the cancel button was clicked while the files were being read
+    """
+
+    file_path = os.path.dirname(files_to_read[0])
+
+    update_cache = False
+    if file_manifest is not None:
+        cached_file_positions = get_cached_file_positions(file_path, files_to_read, file_manifest)
+        update_cache = update_columnar_cache and len(cached_file_positions) != len(files_to_read)
+    if update_cache:
+        df_cached, row_positions = load_columnar_cache(file_path, files_to_read, file_manifest)
+        parse_header_prefixes = parse_schedule_name = None
+    elif file_manifest is not None:
+        df_cached, row_positions = load_columnar_cache(file_path, files_to_read, file_manifest, header_prefixes,
+                                                       schedule_name)
+        parse_header_prefixes, parse_schedule_name = header_prefixes, schedule_name
+    else:
+        df_cached, row_positions = None, np.array([], dtype=np.int64)
+        parse_header_prefixes, parse_schedule_name = header_prefixes, schedule_name
+    if df_cached is not None:
+        # a file can be cached without having rows of the schedule
+        cached_positions = set(cached_file_positions.values())
+    else:
+        cached_positions = set()
+    positions_to_parse = [position for position in range(len(files_to_read)) if position not in cached_positions]
+    report_progress('Reading the raw data files', len(cached_positions), len(files_to_read))
+
+    raw_frames = list() if df_cached is None else [df_cached]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        raw_files = executor.map(read_raw_file, [files_to_read[position] for position in positions_to_parse],
+                                 [position == 0 for position in positions_to_parse],
+                                 [parse_header_prefixes] * len(positions_to_parse),
+                                 [parse_schedule_name] * len(positions_to_parse))
+        for files_read, (position, df_csv) in enumerate(zip(positions_to_parse, raw_files),
+                                                        start=len(cached_positions) + 1):
+            raw_frames.append(df_csv)
+            row_positions = np.append(row_positions, np.full(len(df_csv), position, dtype=np.int64))
+            report_progress('Reading the raw data files', files_read, len(files_to_read))
+
+    df = pd.concat(raw_frames)
+
+    # put the new files back in between the cached files in the order of the files list
+    if not np.all(np.diff(row_positions) >= 0):
+        row_order = np.argsort(row_positions, kind='stable')
+        df = df.iloc[row_order]
+        row_positions = row_positions[row_order]
+
+    if update_cache and len(positions_to_parse) != 0:
+        save_columnar_cache(file_path, files_to_read, df, row_positions, file_manifest)
+
+    # drop the rows of the other schedules if they were parsed for the columnar cache
+    if schedule_name is not None and 'Schedule name' in df.columns:
+        schedule_rows = (df['Schedule name'] == schedule_name).to_numpy()
+        if not schedule_rows.all():
+            df = df.loc[schedule_rows]
+            row_positions = row_positions[schedule_rows]
+
+    # drop the columns the test does not use if they were parsed for the columnar cache
+    if header_prefixes is not None:
+        df = keep_required_columns(df, header_prefixes)
+
+    return df, row_positions
+
+
+def keep_required_columns(df, header_prefixes):
+    """
+    This function drops the columns of the raw data that a test does not use.
+
+    :param df: A dataframe that represents the raw ABET data
+    :param header_prefixes: A list of headers or parts of headers that a test uses
+    :return: df: A dataframe with only the columns that the test uses
+    """
+
+    required_columns = required_index_range(header_prefixes, df.columns.tolist())
+    if len(required_columns) != len(df.columns):
+        df = df.iloc[:, required_columns]
+
+    return df
+
+
+def read_schedule_rows(folder_key, files_to_read, file_manifest=None, max_workers=None, schedule_name=None,
+                       header_prefixes=None):
+    """
+    This function gets the raw data rows of a schedule from the schedule partitions of the raw data folder. The first
+    time a folder is used, every raw data file is read once with all its rows and columns and split into one partition
+    for every schedule name, so the other test types of the same folder are served from memory without reading the raw
+    data files again.
+
+    :param folder_key: The folder key of the raw data folder created by make_folder_key()
+    :param files_to_read: A list of paths to the raw ABET csv files, in the order they will be combined
+    :param file_manifest: The manifest entries of the raw data files created by get_file_manifest(), or None to not
+    use the columnar cache
+    :param max_workers: The number of files that can be read at the same time. If None, a default based on the number
+    of CPUs is used.
+    :param schedule_name: The name of the test the mouse ran, found under the schedule name in raw data
+    :param header_prefixes: A list of headers or parts of headers that a test uses, or None to keep every column
+    :return: (df, row_positions): A dataframe with the raw data rows of the schedule and an array with the position in
+    the files list of the file that each row came from
+    :except TaskCancelled: If the cancel button was clicked while the files were being read
+    """
+
+    partitions = get_schedule_partitions(folder_key)
+    if partitions is None:
+        df, row_positions = read_raw_rows(files_to_read, file_manifest, max_workers)
+        partitions = partition_by_schedule(df, row_positions)
+        cache_schedule_partitions(folder_key, partitions)
+    else:
+        print('The raw data files have already been read! Using the rows of the', schedule_name, 'schedule....')
+        report_progress('Reading the raw data files', len(files_to_read), len(files_to_read))
+
+    df, row_positions = get_schedule_rows(partitions, schedule_name)
+    if header_prefixes is not None:
+        df = keep_required_columns(df, header_prefixes)
+
+    return df, row_positions
+
+
+def order_cleaned_rows(df_final):
+    """
+    This function puts the rows of a cleaned dataframe in the order the setup functions return them. The row index is
+    the position of the row when sorted by date and animal id, and the rows are sorted by animal id and date.
+
+    :param df_final: A cleaned dataframe returned by one of the setup functions
+    :return: df_final: The cleaned dataframe in the same order as the setup functions return it
+    """
 
+    df_final = df_final.sort_values(['Date', 'ID']).reset_index(drop=True)
+    df_final = df_final.sort_values(by=['ID', 'Date'])
     return df_final
 
 
-def data_setup(test_type):
+def get_built_from(df, test_type, files_to_read, row_positions, file_manifest):
+    """
+    This function creates the manifest of the raw data files that a cleaned dataframe is built from. For every file,
+    the manifest has its content hash and the animal ids that it has rows for.
+
+    :param df: The dataframe that represents the raw ABET file
+    :param test_type: The type of test that the animal ran, listed under schedule type
+    :param files_to_read: A list of paths to the raw ABET csv files, in the order they were combined
+    :param row_positions: An array with the position in the files list of the file that each row came from
+    :param file_manifest: The manifest entries of the raw data files created by get_file_manifest()
+    :return: built_from: A dictionary that maps the name of each raw data file to its content hash and animal ids
+    """
+
+    schedule_rows = (df['Schedule name'] == schedule_names.get(test_type)).to_numpy()
+    file_animal_ids = pd.Series(df['Animal ID'].to_numpy()[schedule_rows]).groupby(
+        row_positions[schedule_rows]).unique()
+    built_from = dict()
+    for position, file in enumerate(files_to_read):
+        animal_ids = file_animal_ids.get(position, np.array([]))
+        built_from[os.path.basename(file)] = {'sha1': file_manifest[os.path.basename(file)]['sha1'],
+                                              'ids': pd.Series(animal_ids).dropna().tolist()}
+
+    return built_from
+
+
+def full_test_type_setup(df, test_type, script_location, files_to_read, row_positions, file_manifest):
+    """
+    This function cleans all the raw data for a test type and stores the cleaned dataframe, replacing the one stored by
+    the last run, so the next incremental run starts from it.
+
+    :param df: The dataframe that represents the raw ABET file
+    :param test_type: The type of test that the animal ran, listed under schedule type
+    :param script_location: The location where the script is located.
+    :param files_to_read: A list of paths to the raw ABET csv files, in the order they were combined
+    :param row_positions: An array with the position in the files list of the file that each row came from
+    :param file_manifest: The manifest entries of the raw data files created by get_file_manifest()
+    :return: A cleaned dataframe with the proper parameters based on the test type.
+    """
+
+    df_final = test_type_setup(df, test_type, script_location)
+    if df_final is not None:
+        save_cleaned_dataset(os.path.dirname(files_to_read[0]), test_type, df_final,
+                             get_built_from(df, test_type, files_to_read, row_positions, file_manifest))
+    return df_final
+
+
+def incremental_test_type_setup(df, test_type, script_location, files_to_read, row_positions, file_manifest):
+    """
+    This function cleans the raw data for a test type by only cleaning the animals that have rows in raw data files
+    that were added, changed or removed since the last run. The cleaned rows of every other animal are taken from the
+    cleaned dataframe stored by the last run. Removing duplicates and counting the days are done per animal, so
+    cleaning all the rows of an affected animal again gives the same result as cleaning the whole folder.
+
+    If there is no stored cleaned dataframe yet, the whole folder is cleaned and stored.
+
+    :param df: The dataframe that represents the raw ABET file
+    :param test_type: The type of test that the animal ran, listed under schedule type
+    :param script_location: The location where the script is located.
+    :param files_to_read: A list of paths to the raw ABET csv files, in the order they were combined
+    :param row_positions: An array with the position in the files list of the file that each row came from
+    :param file_manifest: The manifest entries of the raw data files created by get_file_manifest()
+    :return: A cleaned dataframe with the proper parameters based on the test type.
+    """
+
+    file_path = os.path.dirname(files_to_read[0])
+    built_from = get_built_from(df, test_type, files_to_read, row_positions, file_manifest)
+
+    df_stored, stored_from = load_cleaned_dataset(file_path, test_type)
+    if df_stored is None:
+        return full_test_type_setup(df, test_type, script_location, files_to_read, row_positions, file_manifest)
+
+    # the animals that have rows in new, changed or removed files have to be cleaned again
+    affected_ids = set()
+    for file_name in set(built_from) | set(stored_from):
+        if built_from.get(file_name, dict()).get('sha1') != stored_from.get(file_name, dict()).get('sha1'):
+            affected_ids.update(built_from.get(file_name, dict()).get('ids', list()))
+            affected_ids.update(stored_from.get(file_name, dict()).get('ids', list()))
+
+    if len(affected_ids) == 0:
+        if built_from != stored_from:
+            save_cleaned_dataset(file_path, test_type, df_stored, built_from)
+        return order_cleaned_rows(df_stored)
+
+    print('Only cleaning the animals with new or changed raw data files:', sorted(affected_ids, key=str))
+    df_affected = df.loc[df['Animal ID'].isin(affected_ids)].copy()
+    df_unaffected = df_stored.loc[~df_stored['ID'].isin(affected_ids)]
+
+    if (df_affected['Schedule name'] == schedule_names.get(test_type)).any():
+        df_cleaned = test_type_setup(df_affected, test_type, script_location)
+        if df_cleaned is None:
+            return None
+        if df_cleaned.columns.tolist() != df_stored.columns.tolist():
+            # the stored rows were cleaned with different columns, so every animal has to be cleaned again
+            return full_test_type_setup(df, test_type, script_location, files_to_read, row_positions, file_manifest)
+        df_final = order_cleaned_rows(pd.concat([df_unaffected, df_cleaned]))
+    else:
+        # the affected animals only had rows in files that were removed
+        df_final = order_cleaned_rows(df_unaffected)
+
+    save_cleaned_dataset(file_path, test_type, df_final, built_from)
+    return df_final
+
+
+def data_setup(test_type, max_workers=None, incremental=True, file_path=None, partition_schedules=True,
+               update_columnar_cache=False):
     """
     This functions prompts the user for the location of the raw data. It will read the raw data files and create a
     dataframe. Depending on the test type, the function will clean the data and return the appropriate cleaned dataframe
@@ -790,12 +1123,34 @@ def data_setup(test_type):
 
     If there are no csv files in the directory, the function will print an error message and stop and return.
 
+    If the csv files in the directory have not changed since they were last parsed for the same test type, the cleaned
+    dataframe is taken from the session cache instead of parsing the raw data again.
+
+    If the schedules are partitioned, the raw data files of a folder are read once for every test type, see
+    read_schedule_rows(). A folder whose partitions do not fit in max_partition_bytes is never partitioned, see
+    can_partition_folder(). Otherwise only the rows of the schedule of the test type are read, which needs less memory
+    when a single test type is cleaned. The new or changed raw data files are then only added to the columnar cache if
+    update_columnar_cache is True, since that parses every new file in full with all its rows and columns, so the
+    memory is no longer bounded by the rows of the schedule.
+
     :param test_type: The type of test that the animal ran, listed under schedule type
+    :param max_workers: The number of raw data files that can be read at the same time. If None, a default based on the
+    number of CPUs is used.
+    :param incremental: A boolean that represents whether to only clean the animals that have new or changed raw data
+    files since the last run (needs pyarrow to store the cleaned data). If False, all the raw data is cleaned and
+    replaces the stored cleaned data.
+    :param file_path: The directory that has all the raw data csv files. If None, the user is asked to pick it.
+    :param partition_schedules: A boolean that represents whether to read every schedule of the folder at once and keep
+    them in memory for the other test types
+    :param update_columnar_cache: A boolean that represents whether to add the new or changed raw data files to the
+    columnar cache when the schedules are not partitioned
     :return: A cleaned dataframe with the proper parameters based on the test type.
+    :except TaskCancelled: If the cancel button was clicked while the raw data files were being read
     """
 
-    print('Please open the directory that has all the raw data csv files')
-    file_path = filedialog.askdirectory(title='Open the directory with csv files')
+    if file_path is None:
+        print('Please open the directory that has all the raw data csv files')
+        file_path = filedialog.askdirectory(title='Open the directory with csv files')
 
     if len(file_path) == 0:
         mb.showerror("Setup Error", 'data_setup() error: The cancel button was clicked! Please try again!')
@@ -809,22 +1164,69 @@ def data_setup(test_type):
     script_location = os.path.dirname(os.path.abspath(__file__))
     os.chdir(script_location)
 
+    # reuse the cleaned data if nothing in the folder has changed since the last time it was parsed
+    cache_key = make_cache_key(file_path, files, test_type)
+    df_cached = get_cached_dataset(cache_key)
+    if df_cached is not None:
+        print('The raw data has not changed since it was last parsed! Using the cached data....')
+        report_progress('Using the cached data', 1, 1)
+        return df_cached
+
     try:
-        df = pd.read_csv(files[0], encoding='utf-8', delimiter=',', error_bad_lines=False)
+        files_to_read = get_files_to_read(files)
     except IndexError:
         mb.showerror("Setup Error",
                      'data_setup() error: Either the directory is empty or does not contain any .csv files!')
         print('data_setup() error: Either the directory is empty or does not contain any .csv files!')
         return
-    # append all the other csv files onto the current dataframe
-    for file in files[1:len(files)]:
-        if not file.startswith('.'):
-            df_csv = pd.read_csv(file, index_col=False, encoding='utf-8', delimiter=',')
-            df = df.append(df_csv)
+
+    # the manifest of the folder is needed for both the columnar cache and the stored cleaned data
+    store_cleaned = columnar_cache_available and test_type in schedule_names
+    if columnar_cache_available:
+        file_manifest = get_file_manifest(os.path.dirname(files_to_read[0]), files_to_read)
+    else:
+        file_manifest = None
+    folder_key = make_folder_key(file_path, files)
+    if partition_schedules and test_type in schedule_names and can_partition_folder(folder_key):
+        df, row_positions = read_schedule_rows(folder_key, files_to_read, file_manifest, max_workers,
+                                               schedule_names[test_type],
+                                               required_header_prefixes.get(test_type))
+    else:
+        df, row_positions = read_raw_rows(files_to_read, file_manifest, max_workers,
+                                          required_header_prefixes.get(test_type), schedule_names.get(test_type),
+                                          update_columnar_cache)
+
+    # stop before cleaning the data if the cancel button was clicked while the last files were being read
+    check_cancelled()
+
+    if store_cleaned and incremental:
+        df_final = incremental_test_type_setup(df, test_type, script_location, files_to_read, row_positions,
+                                               file_manifest)
+    elif store_cleaned:
+        # a full clean replaces the stored cleaned data, so it can be used to flush an out of date one
+        df_final = full_test_type_setup(df, test_type, script_location, files_to_read, row_positions, file_manifest)
+    else:
+        df_final = test_type_setup(df, test_type, script_location)
+    cache_dataset(cache_key, df_final)
+    report_progress('Cleaning the data', 3, 3)
+
+    return df_final
+
+
+def test_type_setup(df, test_type, script_location):
+    """
+    This function picks the rows of the raw data for the given test type and cleans them with the setup function of
+    that test.
+
+    :param df: The dataframe that represents the raw ABET file
+    :param test_type: The type of test that the animal ran, listed under schedule type
+    :param script_location: The location where the script is located.
+    :return: A cleaned dataframe with the proper parameters based on the test type.
+    """
 
     if test_type == 'Hab1':
         try:
-            df_specific = specific_schedule_name(df, 'Mouse LD Habituation 1')
+            df_specific = specific_schedule_name(df, schedule_names['Hab1'])
             df_hab_one = habituation_one(df_specific, script_location)
             return df_hab_one
         except (IndexError, ValueError, KeyError, AttributeError):
@@ -837,7 +1239,7 @@ def data_setup(test_type):
 
     if test_type == 'Hab2':
         try:
-            df_specific = specific_schedule_name(df, 'Mouse LD Habituation 2')
+            df_specific = specific_schedule_name(df, schedule_names['Hab2'])
             df_hab_two = habituation_two(df_specific, script_location)
             return df_hab_two
         except (IndexError, ValueError, KeyError, AttributeError):
@@ -850,7 +1252,7 @@ def data_setup(test_type):
 
     if test_type == 'IT':
         try:
-            df_specific = specific_schedule_name(df, 'Mouse LD Initial Touch Training v2')
+            df_specific = specific_schedule_name(df, schedule_names['IT'])
             df_initial_touch = initial_touch(df_specific, script_location)
             return df_initial_touch
         except (IndexError, ValueError, KeyError, AttributeError):
@@ -863,7 +1265,7 @@ def data_setup(test_type):
 
     if test_type == 'MT':
         try:
-            df_specific = specific_schedule_name(df, 'Mouse LD Must Touch Training v2')
+            df_specific = specific_schedule_name(df, schedule_names['MT'])
             df_must_touch = must_touch_initiate(df_specific, script_location)
             return df_must_touch
         except (IndexError, ValueError, KeyError, AttributeError):
@@ -876,7 +1278,7 @@ def data_setup(test_type):
 
     if test_type == 'MI':
         try:
-            df_specific = specific_schedule_name(df, 'Mouse LD Must Initiate Training v2')
+            df_specific = specific_schedule_name(df, schedule_names['MI'])
             df_must_initiate = must_touch_initiate(df_specific, script_location)
             return df_must_initiate
         except (IndexError, ValueError, KeyError, AttributeError):
@@ -889,7 +1291,7 @@ def data_setup(test_type):
 
     if test_type == 'PI':
         try:
-            df_specific = specific_schedule_name(df, 'Mouse LD Punish Incorrect Training v2')
+            df_specific = specific_schedule_name(df, schedule_names['PI'])
             df_punish_incorrect = punish_incorrect(df_specific, script_location)
             return df_punish_incorrect
         except (IndexError, ValueError, KeyError, AttributeError):
@@ -902,7 +1304,7 @@ def data_setup(test_type):
 
     if test_type == 'LD Train' or test_type == 'LD Probe':
         try:
-            df_specific = specific_schedule_name(df, 'Mouse LD 1 choice reversal v3')
+            df_specific = specific_schedule_name(df, schedule_names[test_type])
             df_ld = ld(df_specific, script_location)
             return df_ld
         except (IndexError, ValueError, KeyError, AttributeError) as e:
@@ -916,7 +1318,7 @@ def data_setup(test_type):
 
     if test_type == 'Acq':
         try:
-            df_specific = specific_schedule_name(df, 'Mouse Extinction pt 1 v2')
+            df_specific = specific_schedule_name(df, schedule_names['Acq'])
             df_acq = acquisition(df_specific, script_location)
             return df_acq
         except (IndexError, ValueError, KeyError, AttributeError):
@@ -929,7 +1331,7 @@ def data_setup(test_type):
 
     if test_type == 'Ext':
         try:
-            df_specific = specific_schedule_name(df, 'Mouse Extinction pt 2 v2')
+            df_specific = specific_schedule_name(df, schedule_names['Ext'])
             df_ext = extinction(df_specific, script_location)
             return df_ext
         except (IndexError, ValueError, KeyError, AttributeError):
@@ -941,17 +1343,21 @@ def data_setup(test_type):
             return None
 
 
-def save_file_message(df):
+def save_file_message(df, save_file_path=None):
     """
     This functions prompts the user to save the cleaned dataframe as a csv file. The default save type is .csv and
     cannot be changed!
     :param df: The cleaned dataframe ready to be converted into csv file.
+    :param save_file_path: The path to save the csv file to. If None, the user is asked where to save it.
     :except FileNotFoundError: This will occur when you close the save window before saving!
     """
     try:
-        print('A window has opened asking for you to save your newly created csv file. Please look for it!')
-        save_file_path = filedialog.asksaveasfilename(defaultextension='.csv', title='Save the file')
+        if save_file_path is None:
+            print('A window has opened asking for you to save your newly created csv file. Please look for it!')
+            save_file_path = filedialog.asksaveasfilename(defaultextension='.csv', title='Save the file')
+        report_progress('Saving the csv file', 0, 1)
         df.to_csv(save_file_path, index=False)
+        report_progress('Saving the csv file', 1, 1)
         print('A .csv file has been created. Please look at it in the saved directory!')
         print('\n')
     except FileNotFoundError:
@@ -1,16 +1,25 @@
+import bisect
+
 import numpy as np
 import pandas as pd
 
+# the header indices that were already built, so frames with the same headers share one
+header_index_cache = dict()
+max_cached_header_indices = 32
+
 
 def get_header_names(raw_data_headers, header_index_range):
     """
     This function takes in the raw data column headers and header index list and creates a list with the header names
 
-    :param raw_data_headers: A list of all the column names from raw data
+    :param raw_data_headers: A list of all the column names from raw data, or a header index made by get_header_index()
     :param header_index_range: A list of indices for a specific parameter
     :return: header_names_list: A list of header names that correspond to the header_index_range list
     """
 
+    if isinstance(raw_data_headers, dict):
+        raw_data_headers = raw_data_headers['headers']
+
     header_names_list = list()
     for index in header_index_range:
         header_names_list.append(raw_data_headers[index])
@@ -20,7 +29,11 @@ def get_header_names(raw_data_headers, header_index_range):
 
 def convert_to_int(header_index_range, raw_data_headers, dataframe):
     """
-    This function converts a specific range of the dataframe into a numeric type dataframe.
+    This function converts a specific range of the dataframe into a numeric type dataframe. Cells that only have a '-'
+    (no value) are turned into NaN everywhere in the dataframe, the same way blank cells are read in as NaN.
+
+    Only the text columns need to be looked at, since read_csv already parsed every other column as numbers. The
+    converted columns are put back into the dataframe all at once.
 
     :param header_index_range: A list of indices for specific parameters
     :param raw_data_headers: A list of all the column names from raw data
@@ -28,20 +41,53 @@ def convert_to_int(header_index_range, raw_data_headers, dataframe):
     :return: dataframe: A dataframe with a specific section converted from strings to numerics
     """
 
-    # replace NaNs and - (no values/blank spaces) with a very large placeholder number
-    dataframe.replace(np.nan, '999999999', regex=True, inplace=True)
-    dataframe.replace('^[-]{1}$', '999999999', regex=True, inplace=True)
+    header_names_range = set(get_header_names(raw_data_headers, header_index_range))
+
+    # only text columns can have - (no values) or numbers that still need converting
+    converted_columns = dict()
+    for header in dataframe.columns[(dataframe.dtypes == object).to_numpy()]:
+        values = dataframe[header].to_numpy()
+        no_values = values == '-'
+        if no_values.any():
+            values = np.where(no_values, np.nan, values)
+        if header in header_names_range:
+            converted_columns[header] = pd.to_numeric(values)
+        elif no_values.any():
+            converted_columns[header] = values
+
+    # put the converted columns back all at once
+    if len(converted_columns) != 0:
+        df_converted = pd.DataFrame(converted_columns, index=dataframe.index)
+        column_order = dataframe.columns
+        dataframe = pd.concat([dataframe.drop(columns=list(converted_columns)), df_converted], axis=1)
+        dataframe = dataframe.reindex(columns=column_order)
+
+    return dataframe
+
 
-    header_names_range = get_header_names(raw_data_headers, header_index_range)
+def get_header_index(header_list):
+    """
+    This function creates a header index for a list of column header names. The index keeps the headers sorted, so all
+    the headers that start with the same keyword are next to each other and can be found with a binary search instead
+    of going through every header. Header lists that are the same share the same index.
 
-    # turn this header range from strings to numerics
-    dataframe[header_names_range] = dataframe[header_names_range].apply(pd.to_numeric)
+    :param header_list: A list of column header names from raw data.
+    :return: header_index: A dictionary with the header list, the sorted headers and the original index of each sorted
+    header
+    """
 
-    # replace that very large placeholder number with NaNs again
-    dataframe.replace('999999999', np.nan, regex=True, inplace=True)
-    dataframe.replace(999999999, np.nan, regex=True, inplace=True)
+    header_key = tuple(header_list)
+    header_index = header_index_cache.get(header_key)
+    if header_index is None:
+        header_order = sorted(range(len(header_list)), key=lambda index: header_list[index])
+        header_index = {'headers': list(header_list),
+                        'sorted_headers': [header_list[index] for index in header_order],
+                        'sorted_indices': header_order}
+        if len(header_index_cache) >= max_cached_header_indices:
+            header_index_cache.clear()
+        header_index_cache[header_key] = header_index
 
-    return dataframe
+    return header_index
 
 
 def index_range(keyword, header_list):
@@ -49,20 +95,157 @@ def index_range(keyword, header_list):
     This function takes in a keyword and a list of column header names and creates a list of indices that contains the
     specified keyword.
 
+    If a header index made by get_header_index() is given instead of the header list, the headers that start with the
+    keyword are found with a binary search.
+
     :param keyword: A header or part of a header that you are interested in.
-    :param header_list: A list of column header names from raw data.
+    :param header_list: A list of column header names from raw data, or a header index made by get_header_index()
     :return: index_list: A list of indices that correspond to where the specific keyword shows up in the raw data column
     header list
     """
 
+    if not isinstance(header_list, dict):
+        return [index for index, header in enumerate(header_list) if header.startswith(keyword)]
+
+    sorted_headers = header_list['sorted_headers']
+    first = bisect.bisect_left(sorted_headers, keyword)
+    last = first
+    while last < len(sorted_headers) and sorted_headers[last].startswith(keyword):
+        last += 1
+
+    return sorted(header_list['sorted_indices'][first:last])
+
+
+def required_index_range(header_prefixes, header_list, info_header_count=13):
+    """
+    This function takes in a list of header prefixes and a list of column header names and creates a list with the
+    indices of the columns that a test needs. The first few columns of the raw data (database, schedule name, run date,
+    animal id and so on) are always kept, because the setup functions turn every column after them into numerics.
+
+    :param header_prefixes: A list of headers or parts of headers that a test uses
+    :param header_list: A list of column header names from raw data.
+    :param info_header_count: The number of columns at the start of the raw data that are always kept
+    :return: index_list: A list of indices of the columns that are kept, in the order they show up in the raw data
+    """
+
+    header_prefixes = tuple(header_prefixes)
     index_list = list()
-    for header in header_list:
-        if header.startswith(keyword):
-            index_list.append(header_list.index(header))
+    for index, header in enumerate(header_list):
+        if index < info_header_count or header.startswith(header_prefixes):
+            index_list.append(index)
 
     return index_list
 
 
+def resolve_column_specs(column_specs, header_index):
+    """
+    This function finds the raw data headers of every column in a list of column specs. The headers are looked up once
+    per setup, so extract_columns() only works with column indices.
+
+    :param column_specs: A list of (column name, header prefixes, reducer) for every column that is read from raw data
+    :param header_index: A header index made by get_header_index()
+    :return: column_indices: A list of (column name, header indices, reducer), where the header indices are the ones of
+    every header prefix in order
+    """
+
+    column_indices = list()
+    for column_name, header_prefixes, reducer in column_specs:
+        header_indices = [index for header_prefix in header_prefixes
+                          for index in index_range(header_prefix, header_index)]
+        column_indices.append((column_name, header_indices, reducer))
+
+    return column_indices
+
+
+def get_reduced_header_indices(column_indices):
+    """
+    This function picks the columns that are a sum or a mean of many headers out of the column indices of a test.
+
+    :param column_indices: A list of (column name, header indices, reducer) made by resolve_column_specs()
+    :return: reduced_header_indices: A dictionary with the header indices of every column that is a sum or a mean
+    """
+
+    return {column_name: header_indices for column_name, header_indices, reducer in column_indices
+            if reducer != 'first'}
+
+
+def get_trial_matrices(df, block_header_indices):
+    """
+    This function copies blocks of columns of the raw data, like the per trial 'Trial Analysis - No. Correct (n)' or
+    latency columns, into one contiguous float matrix at once. The matrix has a row for every row of the raw data, in
+    the same order, so its rows line up with the cleaned dataframe by position. The columns of each block are next to
+    each other, and every block is handed out as a view of the matrix, so the functions that read a block do not
+    select or copy its columns again.
+
+    :param df: A dataframe that represents the raw ABET data, after convert_to_int()
+    :param block_header_indices: A dictionary with the header indices of every block
+    :return: trial_matrices: A dictionary with a 2D array view (a row for every session and a column for every header)
+    of every block
+    :except ValueError: If one of the columns is not numeric
+    """
+
+    trial_values = df.iloc[:, [index for header_indices in block_header_indices.values()
+                               for index in header_indices]].to_numpy(dtype=float)
+
+    trial_matrices = dict()
+    start = 0
+    for block_name, header_indices in block_header_indices.items():
+        trial_matrices[block_name] = trial_values[:, start:start + len(header_indices)]
+        start += len(header_indices)
+
+    return trial_matrices
+
+
+def extract_columns(df, column_indices, column_names, trial_matrices=None):
+    """
+    This function creates the cleaned dataframe of a test from the raw data, with all the columns at once instead of
+    adding them one by one. Every sum and mean is reduced from the view of its headers made by get_trial_matrices().
+    Empty cells are skipped the same way DataFrame.sum() and DataFrame.mean() skip them.
+
+    The columns in column_names that are not in column_indices are left empty, for the setup function to fill in.
+
+    :param df: A dataframe that represents the raw ABET data, after convert_to_int()
+    :param column_indices: A list of (column name, header indices, reducer) made by resolve_column_specs()
+    :param column_names: A list of all the column names of the cleaned dataframe, in order
+    :param trial_matrices: The trial matrices of the raw data, with a block for every column that is a sum or a mean.
+    If None, they are made from the column indices.
+    :return: df_final: The cleaned dataframe with the same index as the raw data
+    :except IndexError: If a column that takes the first header has no header in the raw data
+    """
+
+    if trial_matrices is None:
+        trial_matrices = get_trial_matrices(df, get_reduced_header_indices(column_indices))
+    column_dtypes = df.dtypes.to_numpy()
+
+    column_values = dict()
+    for column_name, header_indices, reducer in column_indices:
+        if reducer == 'first':
+            column_values[column_name] = df.iloc[:, header_indices[0]].to_numpy()
+            continue
+
+        values = trial_matrices[column_name]
+        empty_cells = np.isnan(values)
+        if empty_cells.any():
+            values = values.copy()
+            np.putmask(values, empty_cells, 0)
+        value_sums = values.sum(axis=1)
+
+        if reducer == 'sum':
+            # the sum of whole number columns stays a whole number
+            if len(header_indices) != 0 and all(pd.api.types.is_integer_dtype(column_dtypes[index])
+                                                for index in header_indices):
+                value_sums = value_sums.astype(np.int64)
+            column_values[column_name] = value_sums
+        else:
+            value_counts = (len(header_indices) - empty_cells.sum(axis=1)).astype(float)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                value_means = value_sums / value_counts
+            value_means[value_counts == 0] = np.nan
+            column_values[column_name] = value_means
+
+    return pd.DataFrame(column_values, index=df.index, columns=column_names)
+
+
 def get_missing_reversal_trials(df):
     """
     This function fixes the missing trial numbers to the 1st/2nd reversal. If an animal does not reach the 1st reversal,
@@ -70,16 +253,21 @@ def get_missing_reversal_trials(df):
     1st reversal, all trials after the 1st reversal are counted towards the 2nd reversal. This is not reflected in the
     ABET raw data!
 
+    All the rows are fixed at the same time with masks over the columns.
+
     :param df: The cleaned dataframe that has LD Train/LD Probe data.
     """
-    for index in df.iterrows():
-        if np.isnan(index[1]['NumberOfTrialTo1stReversal']):
-            # if not reach first reversal, make it the total number of trials
-            df.at[index[0], 'NumberOfTrialTo1stReversal'] = df.at[index[0], 'NumberOfTrial']
-        if np.isnan(index[1]['NumberOfTrialTo2ndReversal']) and index[1]['NumberOfReversal'] > 0:
-            # if not reach second reversal and made more than one reversal, make it the difference
-            df.at[index[0], 'NumberOfTrialTo2ndReversal'] = df.at[index[0], 'NumberOfTrial'] - df.at[
-                index[0], 'NumberOfTrialTo1stReversal']
+
+    # if not reach first reversal, make it the total number of trials
+    no_first_reversal = df['NumberOfTrialTo1stReversal'].isna()
+    if no_first_reversal.any():
+        df.loc[no_first_reversal, 'NumberOfTrialTo1stReversal'] = df.loc[no_first_reversal, 'NumberOfTrial']
+
+    # if not reach second reversal and made more than one reversal, make it the difference
+    no_second_reversal = df['NumberOfTrialTo2ndReversal'].isna() & (df['NumberOfReversal'] > 0)
+    if no_second_reversal.any():
+        df.loc[no_second_reversal, 'NumberOfTrialTo2ndReversal'] = \
+            df.loc[no_second_reversal, 'NumberOfTrial'] - df.loc[no_second_reversal, 'NumberOfTrialTo1stReversal']
 
 
 def get_fixed_session_time(df, df2):
@@ -87,84 +275,288 @@ def get_fixed_session_time(df, df2):
     This function fixes the duration for each reversal, measured in seconds. The ABET raw data gives absolute time
     instead of duration.
 
+    All the rows are fixed at the same time with masks over the columns.
+
     :param df: The cleaned dataframe that has LD Train/LD Probe data.
     :param df2: A dataframe that represents the raw ABET data
     """
 
-    for index in df.iterrows():
-        if index[1]['NumberOfReversal'] == 0:
-            df.at[index[0], 'SessionLengthTo1stReversalDuration'] = df.at[index[0], 'SessionLength']
-        elif index[1]['NumberOfReversal'] == 1:
-            df.at[index[0], 'SessionLengthTo2ndReversalDuration'] = df.at[index[0], 'SessionLength'] - df.at[
-                index[0], 'SessionLengthTo1stReversalDuration']
-        else:
-            df.at[index[0], 'SessionLengthTo2ndReversalDuration'] = df2.at[index[
-                                                                               0], 'No trials to criterion - Condition (2)'] - \
-                                                                    df2.at[index[
-                                                                               0], 'No trials to criterion - Condition (1)']
+    no_reversal = df['NumberOfReversal'] == 0
+    one_reversal = df['NumberOfReversal'] == 1
+    # every other row, including the ones without a reversal number, uses the time between the two reversals
+    two_reversals = ~(no_reversal | one_reversal)
 
+    if one_reversal.any():
+        df.loc[one_reversal, 'SessionLengthTo2ndReversalDuration'] = \
+            df.loc[one_reversal, 'SessionLength'] - df.loc[one_reversal, 'SessionLengthTo1stReversalDuration']
+    if two_reversals.any():
+        df.loc[two_reversals, 'SessionLengthTo2ndReversalDuration'] = \
+            df2.loc[two_reversals, 'No trials to criterion - Condition (2)'] - \
+            df2.loc[two_reversals, 'No trials to criterion - Condition (1)']
+    if no_reversal.any():
+        df.loc[no_reversal, 'SessionLengthTo1stReversalDuration'] = df.loc[no_reversal, 'SessionLength']
 
-def get_percent_correctness_first(df1, df2, column_names):
+
+def get_range_means(values, start_points, stop_points):
+    """
+    This function takes the mean of a different range of columns for every row of a 2D array, skipping NaNs the same
+    way the pandas mean does. It uses cumulative sums and counts, so every range is found with two lookups instead of
+    taking the mean of the whole range again.
+
+    :param values: A 2D array with a row for every session and a column for every trial
+    :param start_points: An array with the first column of the range for every row
+    :param stop_points: An array with the column after the last column of the range for every row
+    :return: (range_means, range_counts): An array with the mean of every range (NaN if the range has no values) and an
+    array with the number of values that are not NaN in every range
+    """
+
+    has_value = ~np.isnan(values)
+    number_of_rows, number_of_columns = values.shape
+    cumulative_sums = np.zeros((number_of_rows, number_of_columns + 1))
+    cumulative_sums[:, 1:] = np.cumsum(np.where(has_value, values, 0), axis=1)
+    cumulative_counts = np.zeros((number_of_rows, number_of_columns + 1), dtype=np.int64)
+    cumulative_counts[:, 1:] = np.cumsum(has_value, axis=1)
+
+    # the ranges work like list slices, so they are cut off at the last column
+    start_points = np.clip(start_points, 0, number_of_columns)
+    stop_points = np.clip(np.maximum(stop_points, start_points), 0, number_of_columns)
+    rows = np.arange(number_of_rows)
+    range_sums = cumulative_sums[rows, stop_points] - cumulative_sums[rows, start_points]
+    range_counts = cumulative_counts[rows, stop_points] - cumulative_counts[rows, start_points]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        range_means = np.where(range_counts > 0, range_sums / range_counts, np.nan)
+
+    return range_means, range_counts
+
+
+def get_int_points(points):
+    """
+    This function turns an array of trial numbers into integers the same way int() does, and raises the same error
+    that int() does if one of them is NaN.
+
+    :param points: An array of trial numbers
+    :return: An array of integer trial numbers
+    :except ValueError: If one of the trial numbers is NaN
+    """
+
+    points = np.asarray(points, dtype=float)
+    if np.isnan(points).any():
+        raise ValueError('cannot convert float NaN to integer')
+    return np.trunc(points).astype(np.int64)
+
+
+def get_percent_correctness_first(df1, df2, trial_values):
     """
     This function gets/fixes the percent correctness to the 1st reversal. If an animal does not reach the 1st reversal,
     the overall percent correctness is the 1st reversal percent correctness. If an animal does not reach the
     2nd reversal and reaches the 1st reversal, all trials after the 1st reversal are counted towards the 2nd reversal
     percent correctness. This is not reflected in the ABET raw data!
 
+    All the rows are done at the same time on the trial matrix of the number correct columns.
+
     :param df1: A dataframe that represents the raw ABET data file
     :param df2: A dataframe that represents the cleaned LD Train/LD Probe data
-    :param column_names: A list of column names used to determine the percent correctness
+    :param trial_values: A 2D array with the number correct of every trial, with a row for every row of df1, from
+    get_trial_matrices()
     """
 
-    for index in df1.iterrows():
-        stop_point = df1.at[index[0], 'No trials to criterion - Generic Evaluation (1)']
-        # if did not reach first reversal, make the value the correct percentage value
-        if np.isnan(stop_point) or index[1]['End Summary - Times Criteria reached (1)'] == 0:
-            stop_point = df1.at[index[0], 'End Summary - Trials Completed (1)']
-            df1.at[index[0], 'PercentCorrectTo1stReversal'] = df1.at[index[
-                                                                         0], 'End Summary - Percentage Correct (1)']
-            int_stop_point = int(stop_point)
+    criteria_trials = df1['No trials to criterion - Generic Evaluation (1)'].to_numpy(dtype=float)
+    criteria_reached = df1['End Summary - Times Criteria reached (1)'].to_numpy(dtype=float)
 
-            df1.at[index[0], 'PercentCorrectTo1stReversal'] = (df1[column_names[0:int_stop_point + 1]].mean(axis=1)[
-                index[0]]) * 100
-            df2.at[index[0], 'NumberOfTrialTo1stReversal'] = int_stop_point + 1
-        else:
-            int_stop_point = int(stop_point)
-            df1.at[index[0], 'PercentCorrectTo1stReversal'] = (df1[column_names[0:int_stop_point]].mean(axis=1)[
-                index[0]]) * 100
+    # if did not reach first reversal, use all the completed trials (and the one after it)
+    no_reversal = np.isnan(criteria_trials) | (criteria_reached == 0)
+    stop_points = np.zeros(len(df1), dtype=np.int64)
+    if no_reversal.any():
+        stop_points[no_reversal] = get_int_points(
+            df1['End Summary - Trials Completed (1)'].to_numpy(dtype=float)[no_reversal]) + 1
+    if (~no_reversal).any():
+        stop_points[~no_reversal] = get_int_points(criteria_trials[~no_reversal])
+
+    range_means, range_counts = get_range_means(trial_values, np.zeros(len(df1), dtype=np.int64), stop_points)
+    df1['PercentCorrectTo1stReversal'] = range_means * 100
+    if no_reversal.any():
+        df2.loc[df1.index[no_reversal], 'NumberOfTrialTo1stReversal'] = stop_points[no_reversal]
 
 
-def get_percent_correctness_second(df1, df2, column_names):
+def get_percent_correctness_second(df1, df2, trial_values):
     """
     This function gets/fixes the percent correctness to the 2nd reversal. If an animal does not reach the 1st reversal,
     the percent correctness for the 2nd reversal is NaN. If an animal does not reach the 2nd reversal and reaches the
     1st reversal, all trials after the 1st reversal are counted towards the 2nd reversal percent correctness. This is
     not reflected in the ABET raw data!
 
+    All the rows are done at the same time on the trial matrix of the number correct columns.
+
     :param df1: A dataframe that represents the raw ABET data file
     :param df2: A dataframe that represents the cleaned LD Train/LD Probe data
-    :param column_names: A list of column names used to determine the percent correctness
-    """
-
-    for index in df1.iterrows():
-        start_point = df1.at[index[0], 'No trials to criterion - Generic Evaluation (1)']
-        stop_point = df2.at[index[0], 'NumberOfTrialTo2ndReversal'] + start_point
-        if np.isnan(start_point) or np.isnan(stop_point):
-            df1.at[index[0], 'PercentCorrectTo2ndReversal'] = np.nan
-        elif index[1]['End Summary - Times Criteria reached (1)'] == 1:
-            int_start_point = int(start_point)
-            list_wo_nans = df1[column_names[int_start_point:]].count(axis=1).tolist()
-            df1.at[index[0], 'PercentCorrectTo2ndReversal'] = \
-                (df1[column_names[int_start_point:]].mean(axis=1)[index[0]]) * 100
-            df2.at[index[0], 'NumberOfTrialTo2ndReversal'] = list_wo_nans[index[0]]
-        else:
-            int_start_point = int(start_point)
-            int_stop_point = int(stop_point)
-            df1.at[index[0], 'PercentCorrectTo2ndReversal'] = \
-                (df1[column_names[int_start_point:int_stop_point]].mean(axis=1)[index[0]]) * 100
+    :param trial_values: A 2D array with the number correct of every trial, with a row for every row of df1, from
+    get_trial_matrices()
+    """
 
+    start_points = df1['No trials to criterion - Generic Evaluation (1)'].to_numpy(dtype=float)
+    stop_points = df2.loc[df1.index, 'NumberOfTrialTo2ndReversal'].to_numpy(dtype=float) + start_points
+    criteria_reached = df1['End Summary - Times Criteria reached (1)'].to_numpy(dtype=float)
 
-def get_test_type(df1, column_names):
+    has_range = ~np.isnan(start_points) & ~np.isnan(stop_points)
+    # if only reached the first reversal, count all the trials after it
+    one_reversal = has_range & (criteria_reached == 1)
+    int_start_points = np.zeros(len(df1), dtype=np.int64)
+    int_start_points[has_range] = get_int_points(start_points[has_range])
+    int_stop_points = int_start_points.copy()
+    int_stop_points[has_range] = get_int_points(stop_points[has_range])
+    int_stop_points[one_reversal] = trial_values.shape[1]
+
+    range_means, range_counts = get_range_means(trial_values, int_start_points, int_stop_points)
+    df1['PercentCorrectTo2ndReversal'] = np.where(has_range, range_means * 100, np.nan)
+    if one_reversal.any():
+        df2.loc[df1.index[one_reversal], 'NumberOfTrialTo2ndReversal'] = range_counts[one_reversal]
+
+
+def get_first_criteria_days(df, criteria, skipped_day_allowed=False, window_minimums=None):
+    """
+    This function finds the first day that every animal met a criteria of n days. The dataframe should only have the
+    sessions that passed the session criteria of the test (for example, a minimum number of reversals). A day passes
+    the criteria if it and the criteria - 1 sessions before it (of the same animal) were on consecutive days. If a
+    skipped day is allowed (the n/n+1 days criteria), the sessions can also be spread over criteria + 1 days.
+
+    Every window of sessions is checked for all the animals at once by comparing each row with the row criteria - 1
+    rows before it.
+
+    :param df: A dataframe with the 'ID' and 'Day' columns that only has the sessions that passed the session criteria
+    :param criteria: A value that represents how many sessions in a row are needed to pass the criteria
+    :param skipped_day_allowed: A boolean that represents whether the sessions can be spread over criteria + 1 days
+    :param window_minimums: A list with a (column, minimum value) pair for every session of the window, in order, that
+    the session must meet as well. If None, only the days are checked.
+    :return: df_copy: A dataframe that only contains the rows that the animals met their criteria on, with one row per
+    animal. If an animal did not reach the criteria, it will not show up.
+    """
+
+    df_copy = df.sort_values(['ID', 'Day'])
+    df_copy.reset_index(drop=True, inplace=True)
+
+    passed = pd.Series(False, index=df_copy.index)
+    if criteria >= 1:
+        days_apart = df_copy['Day'] - df_copy.groupby('ID')['Day'].shift(criteria - 1)
+        # if the days are consecutive, it passes the criteria
+        passed = days_apart == criteria - 1
+        if skipped_day_allowed:
+            passed = passed | (days_apart == criteria)
+        # check each session of the window on the row of its last session
+        for position, (column, minimum) in enumerate(window_minimums or list()):
+            meets_minimum = df_copy[column] >= minimum
+            passed = passed & meets_minimum.groupby(df_copy['ID']).shift(criteria - 1 - position, fill_value=False)
+    df_copy['Criteria Passed?'] = passed.map({True: 'yes', False: np.nan})
+
+    # only take the first occurrence of the rows that passed the criteria
+    df_copy = df_copy.loc[df_copy['Criteria Passed?'] == 'yes']
+    df_copy['Mice ID'] = df_copy['ID']
+    df_copy = df_copy.groupby('Mice ID').first()
+
+    return df_copy
+
+
+def get_criteria_sweep_days(df, session_passed, criteria_values, skipped_days_allowed):
+    """
+    This function finds the first day that every animal met the criteria for many criteria settings at the same time.
+    It checks the same windows as get_first_criteria_days(), but every setting has its own column of sessions that
+    passed the session criteria, so the whole grid is done in one pass over the rows instead of once per setting.
+
+    The passing sessions of every setting are numbered in order and the first session of each window is found by
+    searching those numbers, which is the same as taking the row criteria - 1 rows before it after the filter.
+
+    :param df: A dataframe with the 'ID' and 'Day' columns of the cleaned data of a test
+    :param session_passed: A boolean array with one row per row of the dataframe and one column per setting that
+    represents whether the session passed the session criteria of that setting
+    :param criteria_values: A list with how many sessions in a row are needed to pass the criteria, for every setting
+    :param skipped_days_allowed: A list with whether the sessions can be spread over criteria + 1 days, for every
+    setting
+    :return: (animal_ids, criteria_days): An array of the animal IDs and an array with one row per animal and one
+    column per setting with the day that the animal met the criteria. If an animal did not reach the criteria, the day
+    is NaN.
+    """
+
+    df_sorted = df[['ID', 'Day']].reset_index(drop=True).sort_values(['ID', 'Day'])
+    ids = df_sorted['ID'].to_numpy()
+    days = df_sorted['Day'].to_numpy(dtype=float)
+    criteria_values = np.asarray(criteria_values, dtype=np.int64)
+    session_passed = np.asarray(session_passed, dtype=bool).reshape(len(df), len(criteria_values))
+    session_passed = session_passed[df_sorted.index.to_numpy()]
+    skipped_days_allowed = np.asarray(skipped_days_allowed, dtype=bool)
+    row_count, setting_count = session_passed.shape
+    if row_count == 0:
+        return ids, np.empty((0, setting_count))
+
+    # number the passing sessions of every setting, the window of a session starts on the session criteria - 1 before
+    ranks = np.cumsum(session_passed, axis=0)
+    window_ranks = ranks - (criteria_values - 1)
+    # stack the columns after each other so one sorted search finds the start of every window
+    offsets = np.arange(setting_count) * (row_count + 1)
+    stacked_ranks = (ranks + offsets).ravel(order='F')
+    window_starts = np.searchsorted(stacked_ranks, window_ranks + offsets) - np.arange(setting_count) * row_count
+    window_starts = np.clip(window_starts, 0, row_count - 1)
+
+    has_window = session_passed & (criteria_values >= 1) & (window_ranks >= 1) & (ids[window_starts] == ids[:, None])
+    days_apart = days[:, None] - days[window_starts]
+    passed = has_window & ((days_apart == criteria_values - 1) |
+                           (skipped_days_allowed & (days_apart == criteria_values)))
+
+    # the rows are sorted by day, so the first day that passed is the smallest one of the animal
+    animal_starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    criteria_days = np.minimum.reduceat(np.where(passed, days[:, None], np.inf), animal_starts, axis=0)
+    criteria_days[np.isinf(criteria_days)] = np.nan
+
+    return ids[animal_starts], criteria_days
+
+
+def get_criteria_sweep_table(parameter_grid, parameter_names, animal_ids, criteria_days):
+    """
+    This function turns the result of get_criteria_sweep_days() into a table with one row per setting per animal.
+
+    :param parameter_grid: A list with the criteria values of every setting, as a tuple in the order of the names
+    :param parameter_names: A list of the column names of the criteria values
+    :param animal_ids: An array of the animal IDs
+    :param criteria_days: An array with one row per animal and one column per setting with the criteria day
+    :return: df_sweep: A dataframe with the criteria values, the 'ID' and the 'CriteriaDay' columns. If an animal did
+    not reach the criteria, its 'CriteriaDay' is empty.
+    """
+
+    df_sweep = pd.DataFrame(list(parameter_grid), columns=parameter_names)
+    df_sweep = df_sweep.loc[df_sweep.index.repeat(len(animal_ids))].reset_index(drop=True)
+    df_sweep['ID'] = np.tile(animal_ids, len(parameter_grid))
+    df_sweep['CriteriaDay'] = criteria_days.T.ravel()
+
+    return df_sweep
+
+
+def get_sweep_values(text):
+    """
+    This function splits the text of a criteria widget into the values of a criteria sweep. The values are separated by
+    commas, so '3, 4, 5' are the values '3', '4' and '5'.
+
+    :param text: A string that represents the input of a criteria widget
+    :return: A list of the values as strings
+    """
+
+    return [value.strip() for value in text.split(',') if value.strip() != '']
+
+
+def drop_days_after_criteria(df, df_criteria):
+    """
+    This function drops the rows of every animal that come after the day it met the criteria. Animals that did not meet
+    the criteria keep all their rows. The criteria day of every animal is joined onto its rows, so all the rows to drop
+    are found with one comparison and dropped at the same time.
+
+    :param df: A dataframe that represents the cleaned data of a test, with the 'ID' and 'Day' columns
+    :param df_criteria: A dataframe with one row per animal that met the criteria, on the day that it met the criteria
+    """
+
+    criteria_days = pd.Series(df_criteria['Day'].to_numpy(), index=df_criteria['ID'].to_numpy())
+    after_criteria = df['Day'] > df['ID'].map(criteria_days)
+    df.drop(df.index[after_criteria.to_numpy()], inplace=True)
+
+
+def get_test_type(df1, correct_positions):
     """
     This function determines the type of location discrimination test that the animal performed on. If the animal ran on
     type = easy, then the squares will be far apart (7 and 12). If the animal ran on type = hard, then the squares will
@@ -173,17 +565,14 @@ def get_test_type(df1, column_names):
 
     Note that these are all bottom row squares!
 
+    All the rows are checked at the same time on the trial matrix of the correct position columns.
+
     :param df1: A dataframe that represents the cleaned LD Train/LD Probe data
-    :param column_names: A list of column names used to determine the type
+    :param correct_positions: A 2D array with the correct position of every trial, with a row for every row of df1,
+    from get_trial_matrices()
     """
 
-    some_list = df1[column_names].values.tolist()
-    for index in df1.iterrows():
-        if 8.0 in some_list[index[0]] or 11.0 in some_list[index[0]]:
-            df1.at[index[0], 'Type'] = 'intermediate'
-        elif 9.0 in some_list[index[0]] or 10.0 in some_list[index[0]]:
-            df1.at[index[0], 'Type'] = 'hard'
-        elif 7.0 in some_list[index[0]] or 12.0 in some_list[index[0]]:
-            df1.at[index[0], 'Type'] = 'easy'
-        else:
-            df1.at[index[0], 'Type'] = 'undetermined'
+    intermediate = np.isin(correct_positions, [8.0, 11.0]).any(axis=1)
+    hard = np.isin(correct_positions, [9.0, 10.0]).any(axis=1)
+    easy = np.isin(correct_positions, [7.0, 12.0]).any(axis=1)
+    df1['Type'] = np.select([intermediate, hard, easy], ['intermediate', 'hard', 'easy'], 'undetermined')
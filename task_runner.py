@@ -0,0 +1,287 @@
+import queue
+import threading
+import traceback
+import types
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+
+# the main window that the button commands were started from. If None, there is no window and every call is made on
+# the thread that asks for it, like when the functions are run from a script.
+tk_root = None
+
+# when True, no dialog is ever shown and tkinter is never imported, like when the functions are run from the command
+# line. The error messages are kept in headless_errors instead, and the file dialogs act as if cancel was clicked.
+headless = False
+headless_errors = list()
+
+# how often (in milliseconds) the main window checks on the running task
+poll_interval = 100
+
+# the calls that the worker thread needs the main thread to make, and the progress that the running task has reported
+main_thread_calls = queue.Queue()
+progress_events = queue.Queue()
+
+# set by the cancel button, or when the window is closed, to stop the running task at the next check
+cancel_event = threading.Event()
+window_closed = False
+
+# a single worker thread, so only one button command runs at a time
+task_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='task')
+current_task = None
+
+
+class TaskCancelled(Exception):
+    """
+    This exception is raised inside the running task when the cancel button was clicked.
+    """
+
+
+def call_on_main_thread(function, *args, **kwargs):
+    """
+    This function makes a call on the thread that runs the main window and waits for its result. Tkinter widgets and
+    dialogs can only be used from that thread, so the running task uses this function for every dialog and every entry
+    box that it reads.
+
+    If there is no main window, or the call is already made from the main thread, the function is called directly.
+
+    :param function: The function to call on the main thread
+    :param args: The positional arguments of the function
+    :param kwargs: The keyword arguments of the function
+    :return: The value returned by the function
+    :except TaskCancelled: If the window was closed while the task was running
+    """
+
+    if tk_root is None or threading.current_thread() is threading.main_thread():
+        return function(*args, **kwargs)
+    if window_closed:
+        raise TaskCancelled()
+
+    call_result = Future()
+    main_thread_calls.put((function, args, kwargs, call_result))
+    while True:
+        try:
+            return call_result.result(timeout=poll_interval / 1000)
+        except TimeoutError:
+            # the window could have been closed before it made the call
+            if window_closed:
+                raise TaskCancelled()
+
+
+def run_main_thread_calls():
+    """
+    This function makes every call that the worker thread has asked the main thread to make and hands back the results.
+    """
+
+    while True:
+        try:
+            function, args, kwargs, call_result = main_thread_calls.get_nowait()
+        except queue.Empty:
+            return
+        if window_closed:
+            call_result.set_exception(TaskCancelled())
+            continue
+        try:
+            call_result.set_result(function(*args, **kwargs))
+        except Exception as error:
+            call_result.set_exception(error)
+
+
+def showerror(title=None, message=None, **options):
+    """
+    This function shows an error message box on the main thread, so it can be used by the running task.
+
+    :param title: The title of the message box
+    :param message: The error message
+    :param options: Any other options of tkinter.messagebox.showerror()
+    :return: The button that was clicked
+    """
+
+    if headless:
+        headless_errors.append((title, message))
+        return 'ok'
+    import tkinter.messagebox
+    return call_on_main_thread(tkinter.messagebox.showerror, title, message, **options)
+
+
+def askdirectory(**options):
+    """
+    This function asks the user to pick a directory on the main thread, so it can be used by the running task.
+
+    :param options: The options of tkinter.filedialog.askdirectory()
+    :return: The path to the directory, or an empty string if the cancel button was clicked
+    """
+
+    if headless:
+        return ''
+    import tkinter.filedialog
+    return call_on_main_thread(tkinter.filedialog.askdirectory, **options)
+
+
+def asksaveasfilename(**options):
+    """
+    This function asks the user where to save a file on the main thread, so it can be used by the running task.
+
+    :param options: The options of tkinter.filedialog.asksaveasfilename()
+    :return: The path to save the file to, or an empty string if the cancel button was clicked
+    """
+
+    if headless:
+        return ''
+    import tkinter.filedialog
+    return call_on_main_thread(tkinter.filedialog.asksaveasfilename, **options)
+
+
+# the dialogs used by the setup and analysis functions. tkinter is only imported when a dialog is shown.
+mb = types.SimpleNamespace(showerror=showerror)
+filedialog = types.SimpleNamespace(askdirectory=askdirectory, asksaveasfilename=asksaveasfilename)
+
+
+def report_progress(stage, done, total):
+    """
+    This function reports how far the running task is, so the progress bar of the main window can be updated.
+
+    :param stage: A short description of what the task is doing
+    :param done: The number of steps of the stage that are done
+    :param total: The number of steps of the stage
+    """
+
+    if tk_root is not None:
+        progress_events.put((stage, done, total))
+
+
+def check_cancelled():
+    """
+    This function stops the running task if the cancel button was clicked.
+
+    :except TaskCancelled: If the cancel button was clicked
+    """
+
+    if cancel_event.is_set():
+        raise TaskCancelled()
+
+
+def run_task(function):
+    """
+    This function starts a button command on the worker thread, so the main window keeps responding while it runs.
+    Only one command can run at a time.
+
+    :param function: The button command
+    """
+
+    global current_task
+
+    if current_task is not None and not current_task.done():
+        showerror('Task Error', 'run_task() error: Another button is still running! Please wait or cancel it first!')
+        print('run_task() error: Another button is still running! Please wait or cancel it first!')
+        return
+
+    cancel_event.clear()
+    current_task = task_executor.submit(function)
+
+
+def cancel_task():
+    """
+    This function asks the running task to stop. Raw data files that are being read are finished first, the files that
+    have not been started yet are skipped.
+    """
+
+    if current_task is not None and not current_task.done():
+        print('Cancelling... The program will stop after the raw data files that are being read.')
+        cancel_event.set()
+
+
+def close_window():
+    """
+    This function cancels the running task and closes the main window. Dialogs that the task is still waiting for are
+    not shown.
+    """
+
+    global window_closed
+
+    window_closed = True
+    cancel_event.set()
+    run_main_thread_calls()
+    tk_root.destroy()
+
+
+def poll_task(update_progress, task_finished):
+    """
+    This function is called by the main window every poll interval. It makes the calls that the running task needs from
+    the main thread, passes on the progress that was reported, and reports the result once the task is done.
+
+    :param update_progress: A function that takes the stage, the steps done and the total steps of the progress
+    :param task_finished: A function that takes a message describing how the task ended
+    """
+
+    global current_task
+
+    if window_closed:
+        return
+
+    run_main_thread_calls()
+
+    while True:
+        try:
+            update_progress(*progress_events.get_nowait())
+        except queue.Empty:
+            break
+
+    if current_task is not None and current_task.done():
+        task, current_task = current_task, None
+        error = task.exception()
+        if error is None:
+            task_finished('Done')
+        elif isinstance(error, TaskCancelled):
+            print('The program was cancelled!')
+            task_finished('Cancelled')
+        else:
+            traceback.print_exception(type(error), error, error.__traceback__)
+            showerror('Task Error', 'run_task() error: ' + repr(error))
+            task_finished('Failed')
+
+    tk_root.after(poll_interval, poll_task, update_progress, task_finished)
+
+
+def wrap_entry(entry_class):
+    """
+    This function creates entry boxes whose text can be read by the running task.
+
+    :param entry_class: The entry box class of the TKinter library
+    :return: A function that creates an entry box with the same arguments as the entry box class
+    """
+
+    def make_entry(*args, **kwargs):
+        entry = entry_class(*args, **kwargs)
+        read_entry = entry.get
+        entry.get = lambda: call_on_main_thread(read_entry)
+        return entry
+
+    return make_entry
+
+
+def wrap_button(button_class):
+    """
+    This function creates buttons whose command runs on the worker thread.
+
+    :param button_class: The button class of the TKinter library
+    :return: A function that creates a button with the same arguments as the button class
+    """
+
+    def make_button(*args, command=None, **kwargs):
+        if command is not None:
+            button_command = command
+            command = lambda: run_task(button_command)
+        return button_class(*args, command=command, **kwargs)
+
+    return make_button
+
+
+def make_task_tk(tk):
+    """
+    This function creates the TKinter library that is passed to the functions that create the buttons. The buttons run
+    their command on the worker thread and the entry boxes can be read from it.
+
+    :param tk: The TKinter library
+    :return: A namespace with the Button, Entry and Label classes used by the buttons
+    """
+
+    return types.SimpleNamespace(Button=wrap_button(tk.Button), Entry=wrap_entry(tk.Entry), Label=tk.Label)
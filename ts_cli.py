@@ -0,0 +1,133 @@
+import argparse
+import os
+import sys
+
+import task_runner
+from all_outputs import *
+
+# the options that an output needs on top of the criteria options
+output_options = {'select-day': ['day'], 'select-id': ['id'], 'select-block': ['block'], 'block-average': ['block'],
+                  'id-average': ['id', 'difficulty'], 'type-average': ['difficulty']}
+
+
+def make_parser():
+    """
+    This function creates the parser of the command line arguments.
+
+    :return: The argument parser
+    """
+
+    parser = argparse.ArgumentParser(
+        description='Clean the raw ABET data of a test and save one of its outputs without opening the application. '
+                    'The criteria options take the same values as the criteria boxes of the application.')
+    parser.add_argument('raw_data_directory', help='the directory that has all the raw data csv files')
+    parser.add_argument('test_type', choices=list(test_outputs), help='the type of test to clean')
+    parser.add_argument('output', choices=sorted(set(output for outputs in test_outputs.values()
+                                                     for output in outputs)) + ['all-outputs'],
+                        help='the output to make, the same as the buttons of the application. all-outputs saves '
+                             'every output that does not need a selected day, id or block from one cleaning')
+    parser.add_argument('output_path', help='the csv file to save the output to, or the directory to save the '
+                                            'workbooks to for the parameterized and all-outputs outputs')
+    parser.add_argument('--criteria', help='n days/n+1 days (LD Train, Ext) or n days in a row (Acq). The sweep output '
+                                           'takes many values separated by commas')
+    parser.add_argument('--min-reversal', help='the minimum required reversal number (LD Train)')
+    parser.add_argument('--min-trials', help='the minimum required trials (PI)')
+    parser.add_argument('--percent-one', help='the minimum percent correctness for the first day (PI)')
+    parser.add_argument('--percent-two', help='the minimum percent correctness for the second day (PI)')
+    parser.add_argument('--correct-amount', help='the minimum required correct trials (Acq)')
+    parser.add_argument('--session-length', help='the maximum session length in seconds (Acq)')
+    parser.add_argument('--omissions', help='the minimum required omissions (Ext)')
+    parser.add_argument('--day', type=int, help='the selected day')
+    parser.add_argument('--id', type=int, help='the selected animal id')
+    parser.add_argument('--block', type=int, help='the selected LD Probe block')
+    parser.add_argument('--difficulty', choices=['easy', 'hard'], help='the LD Probe difficulty to average')
+    parser.add_argument('--max-workers', type=int, help='the number of raw data files that are read at the same time')
+    parser.add_argument('--no-incremental', action='store_true',
+                        help='clean every animal again and replace the stored cleaned data, instead of only cleaning the '
+                             'animals with new or changed raw data files')
+    parser.add_argument('--update-cache', action='store_true',
+                        help='add new or changed raw data files to the columnar cache, which parses them with all their '
+                             'rows and columns instead of only the rows and columns of the test')
+    return parser
+
+
+def run_batch(arguments):
+    """
+    This function cleans the raw data of a test and saves the selected output, the same way the buttons of the
+    application do, without any dialog.
+
+    :param arguments: The parsed command line arguments, already checked by main() and with absolute paths
+    :return: True if the output was saved, False if there was an error
+    """
+
+    test_type, output, output_path = arguments.test_type, arguments.output, arguments.output_path
+    sweep = output == 'sweep'
+    criteria_values = get_criteria_values(test_type, vars(arguments), sweep)
+
+    # a single test type is cleaned, so only the rows of its schedule are read
+    df = data_setup(test_type, arguments.max_workers, not arguments.no_incremental, arguments.raw_data_directory,
+                    partition_schedules=False, update_columnar_cache=arguments.update_cache)
+    if df is None or len(task_runner.headless_errors) != 0:
+        return False
+
+    if sweep:
+        save_file_message(get_sweep_output(df, test_type, criteria_values), output_path)
+    elif output == 'all-outputs':
+        write_all_outputs(df, test_type, criteria_values, output_path)
+    elif output == 'parameterized':
+        apply_test_criteria(df, test_type, criteria_values)
+        write_parameterized_output(df, test_type, output_path)
+    else:
+        df_criteria = apply_test_criteria(df, test_type, criteria_values)
+        save_file_message(get_output_view(df, test_type, output, df_criteria, arguments.day, arguments.id,
+                                          arguments.block, arguments.difficulty), output_path)
+
+    return len(task_runner.headless_errors) == 0
+
+
+def main(argv=None):
+    """
+    This function runs the command line version of the application. No window is opened and tkinter is never imported,
+    so it can be run on a server without a display, like from a cron job.
+
+    :param argv: The command line arguments, or None to use the ones the script was run with
+    :return: The exit code, 0 if the output was saved and 1 if there was an error
+    """
+
+    parser = make_parser()
+    arguments = parser.parse_args(argv)
+
+    if arguments.output not in test_outputs[arguments.test_type] + ['all-outputs']:
+        parser.error(arguments.test_type + ' does not have the ' + arguments.output + ' output! Choose from: ' +
+                     ', '.join(test_outputs[arguments.test_type]))
+    for option in output_options.get(arguments.output, list()):
+        if getattr(arguments, option) is None:
+            parser.error('the --' + option + ' option is needed for the ' + arguments.output + ' output!')
+    try:
+        get_criteria_values(arguments.test_type, vars(arguments), arguments.output == 'sweep')
+    except ValueError as error:
+        parser.error(str(error))
+    if not os.path.isdir(arguments.raw_data_directory):
+        parser.error(arguments.raw_data_directory + ' is not a directory!')
+    output_directory = os.path.dirname(os.path.abspath(arguments.output_path))
+    if arguments.output not in ['parameterized', 'all-outputs'] and not os.path.isdir(output_directory):
+        parser.error(output_directory + ' is not a directory!')
+
+    # the paths are resolved first, since data_setup() changes the working directory
+    arguments.raw_data_directory = os.path.abspath(arguments.raw_data_directory)
+    arguments.output_path = os.path.abspath(arguments.output_path)
+
+    task_runner.headless = True
+    if run_batch(arguments):
+        print('The output has been saved to:', arguments.output_path)
+        return 0
+
+    for title, message in task_runner.headless_errors:
+        print(title + ':', message, file=sys.stderr)
+    if len(task_runner.headless_errors) == 0:
+        print('There was no cleaned data to save!', file=sys.stderr)
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,66 @@
+import importlib
+import threading
+import time
 import tkinter as tk
+import tkinter.ttk as ttk
 import webbrowser
-from parameterized import *
+import task_runner
 
-root = tk.Tk()
-root.geometry('404x765')
-root.title('Raymon Shi Touchscreen Data Analysis App')
-root.rowconfigure(0, weight=1)
-root.columnconfigure(0, weight=1)
+# when the application was started, to report how long it took to show the main menu
+start_time = time.perf_counter()
+
+# the module and the function that create the buttons of every sub-menu. The analysis modules import pandas and numpy,
+# which takes most of the start up time, so they are only imported after the main menu is shown.
+sub_menu_buttons = {'general_ts': ('general_touchscreen', 'make_general_ts_buttons'),
+                    'ld_train': ('ld_train', 'make_ld_train_buttons'),
+                    'ld_probe': ('ld_probe', 'make_ld_probe_buttons'),
+                    'extinction': ('acquisition_extinction', 'make_extinction_buttons'),
+                    'parameterized': ('parameterized', 'make_parameterized_button'),
+                    'all_outputs': ('all_outputs', 'make_all_outputs_buttons')}
+built_sub_menus = set()
+
+
+def make_window():
+    """
+    This function creates the main window and the frames of every sub-menu. The window is only created when the
+    application starts, so the processes that write the parameterized workbooks can import this file without opening
+    a window of their own.
+    """
+
+    global root, main_page_frame, general_ts_frame, ld_train_frame, ld_probe_frame, extinction_paradigm_frame, \
+        parameterized_frame, all_outputs_frame, progress_frame
+
+    root = tk.Tk()
+    root.geometry('404x815')
+    root.title('Raymon Shi Touchscreen Data Analysis App')
+    root.rowconfigure(0, weight=1)
+    root.columnconfigure(0, weight=1)
+
+    main_page_frame = tk.Frame(root)
+    main_page_frame.grid(row=0, column=0, sticky='nsew')
+    main_page_frame.columnconfigure(0, weight=1)
+
+    general_ts_frame = tk.Frame(root)
+    general_ts_frame.grid(row=0, column=0, sticky='nsew')
+
+    ld_train_frame = tk.Frame(root)
+    ld_train_frame.grid(row=0, column=0, sticky='nsew')
+
+    ld_probe_frame = tk.Frame(root)
+    ld_probe_frame.grid(row=0, column=0, sticky='nsew')
+
+    extinction_paradigm_frame = tk.Frame(root)
+    extinction_paradigm_frame.grid(row=0, column=0, sticky='nsew')
+
+    parameterized_frame = tk.Frame(root)
+    parameterized_frame.grid(row=0, column=0, sticky='nsew')
+
+    all_outputs_frame = tk.Frame(root)
+    all_outputs_frame.grid(row=0, column=0, sticky='nsew')
+
+    progress_frame = tk.Frame(root)
+    progress_frame.grid(row=1, column=0, sticky='ew')
+    progress_frame.columnconfigure(0, weight=1)
 
 
 def display_frame(frame_page):
@@ -19,24 +73,47 @@ def display_frame(frame_page):
     frame_page.tkraise()
 
 
-main_page_frame = tk.Frame(root)
-main_page_frame.grid(row=0, column=0, sticky='nsew')
-main_page_frame.columnconfigure(0, weight=1)
+def open_sub_menu(frame_page, sub_menu):
+    """
+    This function raises a sub-menu to the top. The buttons of the sub-menu are created the first time it is opened,
+    which imports its analysis module if warm_up_imports() has not done it yet.
 
-general_ts_frame = tk.Frame(root)
-general_ts_frame.grid(row=0, column=0, sticky='nsew')
+    :param frame_page: The frame of the sub-menu
+    :param sub_menu: The name of the sub-menu, one of sub_menu_buttons
+    """
 
-ld_train_frame = tk.Frame(root)
-ld_train_frame.grid(row=0, column=0, sticky='nsew')
+    if sub_menu not in built_sub_menus:
+        module_name, function_name = sub_menu_buttons[sub_menu]
+        make_buttons = getattr(importlib.import_module(module_name), function_name)
+        make_buttons(task_tk, frame_page)
+        main_menu_buttons(frame_page)
+        built_sub_menus.add(sub_menu)
 
-ld_probe_frame = tk.Frame(root)
-ld_probe_frame.grid(row=0, column=0, sticky='nsew')
+    display_frame(frame_page)
 
-extinction_paradigm_frame = tk.Frame(root)
-extinction_paradigm_frame.grid(row=0, column=0, sticky='nsew')
 
-parameterized_frame = tk.Frame(root)
-parameterized_frame.grid(row=0, column=0, sticky='nsew')
+def warm_up_imports():
+    """
+    This function imports the analysis modules on a background thread once the main menu is shown, so opening a
+    sub-menu does not have to wait for pandas and numpy to be imported.
+    """
+
+    def import_analysis_modules():
+        import_start = time.perf_counter()
+        for module_name, function_name in sub_menu_buttons.values():
+            importlib.import_module(module_name)
+        print('The analysis modules were imported in the background in %.2f s' % (time.perf_counter() - import_start))
+
+    threading.Thread(target=import_analysis_modules, name='warm-up', daemon=True).start()
+
+
+def main_menu_shown():
+    """
+    This function reports how long it took to show the main menu and starts importing the analysis modules.
+    """
+
+    print('The main menu was shown in %.2f s' % (time.perf_counter() - start_time))
+    warm_up_imports()
 
 
 def main_page_frame_buttons():
@@ -45,23 +122,26 @@ def main_page_frame_buttons():
     """
 
     main_general_ts_btn = tk.Button(main_page_frame, text='General Touchscreen',
-                                    command=lambda: display_frame(general_ts_frame))
+                                    command=lambda: open_sub_menu(general_ts_frame, 'general_ts'))
     main_general_ts_btn.grid(row=1, column=0)
     main_ld_train_btn = tk.Button(main_page_frame, text='LD Train',
-                                  command=lambda: display_frame(ld_train_frame))
+                                  command=lambda: open_sub_menu(ld_train_frame, 'ld_train'))
     main_ld_train_btn.grid(row=2, column=0)
     main_ld_probe_btn = tk.Button(main_page_frame, text='LD Probe',
-                                  command=lambda: display_frame(ld_probe_frame))
+                                  command=lambda: open_sub_menu(ld_probe_frame, 'ld_probe'))
     main_ld_probe_btn.grid(row=3, column=0)
     main_extinction_btn = tk.Button(main_page_frame, text='Extinction Paradigm',
-                                    command=lambda: display_frame(extinction_paradigm_frame))
+                                    command=lambda: open_sub_menu(extinction_paradigm_frame, 'extinction'))
     main_extinction_btn.grid(row=4, column=0)
     main_parameterized_btn = tk.Button(main_page_frame, text='Parameterized',
-                                       command=lambda: display_frame(parameterized_frame))
+                                       command=lambda: open_sub_menu(parameterized_frame, 'parameterized'))
     main_parameterized_btn.grid(row=5, column=0)
+    main_all_outputs_btn = tk.Button(main_page_frame, text='All Outputs',
+                                     command=lambda: open_sub_menu(all_outputs_frame, 'all_outputs'))
+    main_all_outputs_btn.grid(row=6, column=0)
     main_github_code_btn = tk.Button(main_page_frame, text='Github Code Page', command=lambda: webbrowser.open(
         'https://github.com/raymon-shi/ts-data-analysis-app'))
-    main_github_code_btn.grid(row=6, column=0)
+    main_github_code_btn.grid(row=7, column=0)
 
 
 def main_menu_buttons(frame):
@@ -77,30 +157,53 @@ def main_menu_buttons(frame):
     main_menu_btn.grid(columnspan=2)
 
 
-def make_gui():
+def progress_frame_widgets():
     """
-    This function creates all the buttons and main graphic user interface for the application.
+    This function creates the progress bar, the status text and the cancel button that are shown under every frame.
+    The buttons of the sub-menus run on a worker thread, and the main window checks on them every poll interval to
+    update the progress bar and show their dialogs.
     """
 
-    make_general_ts_buttons(tk, general_ts_frame)
-    main_menu_buttons(general_ts_frame)
+    status_label = tk.Label(progress_frame, text='Ready', anchor='w')
+    status_label.grid(row=0, column=0, columnspan=2, sticky='ew')
+    progress_bar = ttk.Progressbar(progress_frame, orient='horizontal', mode='determinate', maximum=100)
+    progress_bar.grid(row=1, column=0, sticky='ew', padx=(0, 5))
+    cancel_btn = tk.Button(progress_frame, text='Cancel', command=task_runner.cancel_task)
+    cancel_btn.grid(row=1, column=1)
 
-    make_ld_train_buttons(tk, ld_train_frame)
-    main_menu_buttons(ld_train_frame)
+    def update_progress(stage, done, total):
+        progress_bar['value'] = 100 * done / total if total != 0 else 0
+        status_label['text'] = '%s... (%d/%d)' % (stage, done, total)
 
-    make_ld_probe_buttons(tk, ld_probe_frame)
-    main_menu_buttons(ld_probe_frame)
+    def task_finished(message):
+        progress_bar['value'] = 0
+        status_label['text'] = message
 
-    make_extinction_buttons(tk, extinction_paradigm_frame)
-    main_menu_buttons(extinction_paradigm_frame)
+    task_runner.tk_root = root
+    root.protocol('WM_DELETE_WINDOW', task_runner.close_window)
+    root.after(task_runner.poll_interval, task_runner.poll_task, update_progress, task_finished)
 
-    make_parameterized_button(tk, parameterized_frame)
-    main_menu_buttons(parameterized_frame)
+
+def make_gui():
+    """
+    This function creates all the buttons and main graphic user interface for the application.
+    """
+
+    global task_tk
+
+    make_window()
+    progress_frame_widgets()
+
+    # the buttons of the sub-menus run their command on the worker thread
+    task_tk = task_runner.make_task_tk(tk)
 
     display_frame(main_page_frame)
 
     main_page_frame_buttons()
 
+    # the sub-menus are created when they are first opened, so the main menu is shown first
+    root.after_idle(main_menu_shown)
+
     root.mainloop()
 
 